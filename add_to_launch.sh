@@ -27,14 +27,9 @@ for batch_file in ./task_*_fixed-effects.batch; do
         sed -n "${line_range}p" subs.txt | while IFS= read -r id || [ -n "$id" ]; do
             echo "Processing ID: $id"
             echo "" >> "$batch_file"
-            echo "echo ./analyze_lev1_v4.py ${task_name} ${id} rt_centered --fixed_effects --simplified_events" >> "$batch_file"
-            echo "python3 ./analyze_lev1_v4.py ${task_name} ${id} rt_centered --fixed_effects --simplified_events" >> "$batch_file"
-            echo "echo ./analyze_lev1_v4.py ${task_name} ${id} rt_centered --fixed_effects --simplified_events --model_break" >> "$batch_file"
-            echo "python3 ./analyze_lev1_v4.py ${task_name} ${id} rt_centered --fixed_effects --simplified_events --model_break" >> "$batch_file"
-            echo "echo ./analyze_lev1_v4.py ${task_name} ${id} rt_centered --fixed_effects --simplified_events --omit_deriv" >> "$batch_file"
-            echo "python3 ./analyze_lev1_v4.py ${task_name} ${id} rt_centered --fixed_effects --simplified_events --omit_deriv" >> "$batch_file"
-            echo "echo ./analyze_lev1_v4.py ${task_name} ${id} rt_centered --fixed_effects --simplified_events --model_break --omit_deriv" >> "$batch_file"
-            echo "python3 ./analyze_lev1_v4.py ${task_name} ${id} rt_centered --fixed_effects --simplified_events --model_break --omit_deriv" >> "$batch_file"
+            # All four model variants are fit from a single load of each session
+            echo "echo ./analyze_lev1_v4.py ${task_name} ${id} rt_centered --fixed_effects --simplified_events --variants base model_break omit_deriv model_break+omit_deriv" >> "$batch_file"
+            echo "python3 ./analyze_lev1_v4.py ${task_name} ${id} rt_centered --fixed_effects --simplified_events --variants base model_break omit_deriv model_break+omit_deriv" >> "$batch_file"
             echo "" >> "$batch_file"
         done
     else
@@ -1,145 +1,45 @@
 #TODO: get rid of duration_choice
 
 #!/usr/bin/env python
-import glob
 import numpy as np
-import pandas as pd
 import json
 import sys
 import os
-import nibabel as nb
 from argparse import ArgumentParser, RawTextHelpFormatter
-from utils_lev1.qa import qa_design_matrix, add_to_html_summary, get_all_contrast_vif, create_fixed_effects_html
 
-def get_confounds_tedana(confounds_file, task):
-    """
-    Creates nuisance regressors from fmriprep confounds timeseries.
-    input:
-      confounds_file: path to confounds file from fmriprep
-    output:
-      confound_regressors: includes aCompCor, FD, 6 motion regressors + derivatives,
-                            cosine basis set (req with compcor use)
-    """
-    confounds_df = pd.read_csv(confounds_file, sep="\t", na_values=["n/a"]).fillna(0)
-    
-    """
-    Use the code below only for the discovery sample, not the validation sample. 
-
-    The code below is used to address an issue with the nback blocked design in the discovery sample. 
-
-    # if task == 'nBack':
-    #     confounds = confounds_df.filter(regex='cosine0[0-4]'
-    #                                 '|trans_x$|trans_x_derivative1$|trans_x_power2$|trans_x_derivative1_power2$'
-    #                                 '|trans_y$|trans_y_derivative1$|trans_y_power2$|trans_y_derivative1_power2$'
-    #                                 '|trans_z$|trans_z_derivative1$|trans_z_power2$|trans_z_derivative1_power2$'
-    #                                 '|rot_x$|rot_x_derivative1$|rot_x_power2$|rot_x_derivative1_power2$'
-    #                                 '|rot_y$|rot_y_derivative1$|rot_y_power2$|rot_y_derivative1_power2$'
-    #                                 '|rot_z$|rot_z_derivative1$|rot_z_power2$|rot_z_derivative1_power2$')
-    # else:
-    # confounds = confounds_df.filter(
-    #     regex='cosine'
-    #     '|trans_x$|trans_x_derivative1$|trans_x_power2$|trans_x_derivative1_power2$'
-    #     '|trans_y$|trans_y_derivative1$|trans_y_power2$|trans_y_derivative1_power2$'
-    #     '|trans_z$|trans_z_derivative1$|trans_z_power2$|trans_z_derivative1_power2$'
-    #     '|rot_x$|rot_x_derivative1$|rot_x_power2$|rot_x_derivative1_power2$'
-    #     '|rot_y$|rot_y_derivative1$|rot_y_power2$|rot_y_derivative1_power2$'
-    #     '|rot_z$|rot_z_derivative1$|rot_z_power2$|rot_z_derivative1_power2$'
-    # )
-
-    """
-
-    confounds = confounds_df.filter(
-        regex='cosine|trans_x$|trans_x_derivative1$|trans_x_power2$|trans_x_derivative1_power2$'
-        '|trans_y$|trans_y_derivative1$|trans_y_power2$|trans_y_derivative1_power2$'
-        '|trans_z$|trans_z_derivative1$|trans_z_power2$|trans_z_derivative1_power2$'
-        '|rot_x$|rot_x_derivative1$|rot_x_power2$|rot_x_derivative1_power2$'
-        '|rot_y$|rot_y_derivative1$|rot_y_power2$|rot_y_derivative1_power2$'
-        '|rot_z$|rot_z_derivative1$|rot_z_power2$|rot_z_derivative1_power2$'
-    )
-    confounds = confounds.reset_index(drop=True)
-
-    return confounds
-
-def get_nscans(timeseries_data_file):
+def get_nscans(timeseries_data_file, root=None, index_file=None, manifest_file=None):
     """
     Get the number of time points from 4D data file
     input: time_series_data_file: Path to 4D file
+        root, index_file (optional): glm_data root and scan count index
+            (utils_lev1.scan_index).  If not given the header is read directly.
     output: nscans: number of time points
     """
+    from utils_lev1.scan_index import lookup_nscans, read_nscans
 
-    fmri_data = nb.load(timeseries_data_file)
-    n_scans = fmri_data.shape[3]
-    return n_scans
+    if index_file is not None:
+        return lookup_nscans(timeseries_data_file, root, index_file, manifest_file)
+    return read_nscans(timeseries_data_file)
 
-def get_tr(root, task):
+def get_tr(root, task, manifest_file=None):
     """
     Get the TR from the bold json file
     input:
         root: Root for BIDS data directory
         task: Task name
+        manifest_file (optional): file manifest (utils_lev1.manifest) used
+            instead of globbing
     output: TR as reported in json file (presumable in s)
     """
-    json_file = glob.glob(f"{root}/sub-*/ses-*/*{task}_bold.json")[0]
+    from utils_lev1.manifest import glob_files
+
+    json_file = glob_files(f"{root}/sub-*/ses-*/*{task}_bold.json", root, manifest_file)[0]
     with open(json_file, "rb") as f:
         task_info = json.load(f)
     tr = task_info["RepetitionTime"]
     return tr
 
 
-def make_desmat_contrasts(
-    root,
-    task,
-    events_file,
-    duration_choice,
-    add_deriv,
-    n_scans,
-    mean_rt,
-    confounds_file=None,
-    regress_rt="no_rt",
-    model_break=False
-):
-    """
-    Creates design matrices and contrasts for each task.  Should work for any
-    style of design matrix as well as the regressors are defined within
-    the imported make_task_desmat_fcn_map (dictionary of functions).
-    A single RT regressor can be added using regress_rt='rt_uncentered'
-    Input:
-        root:  Root directory (for BIDS data)
-        task: Task name
-        events_file: File path to events.tsv for the given task
-        duration_choice: used for duration in regressors
-        add_deriv: 'deriv_yes' or 'deriv_no', recommended to use 'deriv_yes'
-        n_scans: Number of scans
-        confound_file (optional): File path to fmriprep confounds file
-        regress_rt: 'no_rt' or 'rt_uncentered' or 'rt_centered'
-    Output:
-        design_matrix, contrasts: Full design matrix and contrasts for nilearn model
-        percent junk: percentage of trials labeled as "junk".  Used in later QA.
-        percent high motion: percentage of time points that are high motion.  Used later in QA.
-    """
-    from utils_lev1.first_level_designs_new_event_files import make_task_desmat_fcn_dict
-
-    if confounds_file is not None:
-        confound_regressors = get_confounds_tedana(confounds_file, task)
-    else:
-        confound_regressors = None
-
-    tr = 1.49
-    print('model_break: ', model_break)
-    design_matrix, contrasts, percent_junk, simplified_events_df = make_task_desmat_fcn_dict[task](
-        events_file,
-        duration_choice,
-        add_deriv,
-        regress_rt,
-        mean_rt,
-        n_scans,
-        tr,
-        confound_regressors,
-        model_break
-    )
-    return design_matrix, contrasts, tr, percent_junk, simplified_events_df
-
-
 def check_file(glob_out, task):
     """
     Checks if file exists
@@ -178,7 +78,7 @@ def check_file(glob_out, task):
     return file, file_missing
 
 
-def get_files(root, subid, task):
+def get_files(root, subid, task, manifest_file=None):
     """Fetches files (events.tsv, confounds, mask, data)
     if files are not present, excluded_subjects.csv is updated and
     program exits
@@ -186,50 +86,56 @@ def get_files(root, subid, task):
         root:  Root directory
         subid: subject ID (without s prefix)
         task: Task
+        manifest_file (optional): file manifest (utils_lev1.manifest) used
+            instead of globbing
     output:
        files: Dictionary with file paths (or empty lists).  Needs to be further
            processed by check_file() to pick up instances when task is not available
            for a given subject (missing data files)
            Dictionary contains events_file, mask_file, confounds_file, data_file
     """
+    from utils_lev1.manifest import glob_files
+
     files = {}
 
     files["events_file"] = sorted(
-        glob.glob(f"{root}/sub-{subid}/ses-*/func/*{task}_*events*tsv")
+        glob_files(f"{root}/sub-{subid}/ses-*/func/*{task}_*events*tsv", root, manifest_file)
     )
 
     files["confounds_file"] = sorted(
-        glob.glob(f"{root}/sub-{subid}/ses-*/func/*{task}_*confounds*.tsv")
+        glob_files(f"{root}/sub-{subid}/ses-*/func/*{task}_*confounds*.tsv", root, manifest_file)
     )
 
     files["mask_file"] = sorted(
-        glob.glob(f"{root}/sub-{subid}/ses-*/func/*{task}_*T1w*mask*.nii.gz")
+        glob_files(f"{root}/sub-{subid}/ses-*/func/*{task}_*T1w*mask*.nii.gz", root, manifest_file)
     )
 
     files["data_file"] = sorted(
-        glob.glob(f"{root}/sub-{subid}/ses-*/func/*{task}_*T1w*_desc-optcom_bold.nii.gz")
+        glob_files(f"{root}/sub-{subid}/ses-*/func/*{task}_*T1w*_desc-optcom_bold.nii.gz", root, manifest_file)
     )
 
     return files
 
-def calculate_mean_rt(root, task):
-    event_files = glob.glob(root+f'/*/*/func/*{task}_*events.tsv')
-    mean_rts = []
-    if 'stopSignal' in task:
-        for event_file in event_files:
-            df = pd.read_csv(event_file, sep='\t')
-            df['trial_type'].fillna('n/a', inplace=True)
-            subset = df.query("(trial_type.str.contains('go') and response_time >= 0.2 and key_press == correct_response)" +
-                                "or (trial_type.str.contains('stop_failure') and response_time >= 0.2)", engine='python')
-            mean_rt = subset['response_time'].mean()
-            mean_rts.append(mean_rt)
-    else:
-        for event_file in event_files:
-            df = pd.read_csv(event_file, sep='\t')
-            subset = df.query("key_press == correct_response and trial_id == 'test_trial' and response_time >= 0.2")
-            mean_rt = subset['response_time'].mean()
-            mean_rts.append(mean_rt)
-    
+def calculate_mean_rt(root, task, index_dir=None, manifest_file=None):
+    """
+    Mean (across runs) of the per-run mean RT for a task, used to center
+    the RT regressor.
+    input:
+        root: Root for BIDS data directory
+        task: Task name
+        index_dir (optional): directory with the per-task RT index
+            (utils_lev1.rt_index).  If None, every events file is read.
+        manifest_file (optional): file manifest used to find events files
+    output: mean RT
+    """
+    from utils_lev1.rt_index import find_events_files, events_mean_rt, get_mean_rt
+
+    if index_dir is not None:
+        return get_mean_rt(root, task, index_dir, manifest_file=manifest_file)
+    mean_rts = [
+        events_mean_rt(event_file, task)[0]
+        for event_file in find_events_files(root, task, manifest_file)
+    ]
     return np.mean(mean_rts)
 
 def get_parser():
@@ -307,10 +213,188 @@ def get_parser():
         action="store_true",
         help=("Use this flag to create residual images"),
     )
+    parser.add_argument(
+        "--save_residuals",
+        action="store_true",
+        help=(
+            "Write residual images as well as the contrast estimates, from a\n"
+            "single fit (uses --glm_engine chunked).  Residuals are streamed\n"
+            "to disk as float32 instead of being held in memory."
+        ),
+    )
+    parser.add_argument(
+        "--variants",
+        nargs="+",
+        default=None,
+        help=(
+            "Fit several model variants from a single load of each session's data.\n"
+            "Each variant is 'base' or a '+' separated list of model_break,\n"
+            "omit_deriv and only_breaks_with_performance_feedback,\n"
+            "e.g. --variants base model_break omit_deriv model_break+omit_deriv\n"
+            "When given, --model_break, --omit_deriv and\n"
+            "--only_breaks_with_performance_feedback are ignored."
+        ),
+    )
+
+    parser.add_argument(
+        "--bold_cache_dir",
+        default=None,
+        help=(
+            "Directory for the cache of masked, smoothed BOLD matrices.\n"
+            "Defaults to <bids>/derivatives/lev_1_cache/masked_bold"
+        ),
+    )
+    parser.add_argument(
+        "--bold_cache_gb",
+        type=float,
+        default=0,
+        help=(
+            "Size cap (GB) for the masked BOLD cache, least recently used\n"
+            "entries are evicted first.  The cache is off by default (0),\n"
+            "e.g. --bold_cache_gb 50 turns it on."
+        ),
+    )
+
+    parser.add_argument(
+        "--design_cache_dir",
+        default=None,
+        help=(
+            "Directory for the cache of design matrices and contrasts.\n"
+            "Defaults to <bids>/derivatives/lev_1_cache/designs"
+        ),
+    )
+    parser.add_argument(
+        "--no_design_cache",
+        action="store_true",
+        help=("Always rebuild the design matrices from the events files"),
+    )
+    parser.add_argument(
+        "--design_cache_gb",
+        type=float,
+        default=1,
+        help=(
+            "Size cap (GB) for the design cache, least recently used\n"
+            "designs are evicted first."
+        ),
+    )
+
+    parser.add_argument(
+        "--vif_store_dir",
+        default="./vif_analysis/vif_store",
+        help=(
+            "Columnar store (utils_lev1.vif_store) the contrast and regressor\n"
+            "VIFs of this run are appended to"
+        ),
+    )
+
+    parser.add_argument(
+        "--glm_engine",
+        choices=["nilearn", "chunked"],
+        default="nilearn",
+        help=(
+            "nilearn: run_glm on the whole session at once.\n"
+            "chunked: AR(1) GLM from utils_lev1.ar1_glm, processed in\n"
+            "blocks of --chunk_size voxels to bound memory use.\n"
+            "With --residuals, chunked streams the residuals to disk."
+        ),
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=20000,
+        help=("Number of voxels per block for --glm_engine chunked"),
+    )
+
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help=(
+            "Refit every session.  By default the designs and QA of every\n"
+            "session are redone, but the fit of a session that passes QA is\n"
+            "skipped when its provenance record shows the same inputs, design\n"
+            "options and design code, and its outputs are still on disk."
+        ),
+    )
+
+    parser.add_argument(
+        "--manifest",
+        action="store_true",
+        help=(
+            "Look files up in the glm_data file manifest (utils_lev1.manifest)\n"
+            "instead of globbing the file system.  The manifest is brought up\n"
+            "to date first, only directories that changed are listed."
+        ),
+    )
 
     return parser
 
 
+def parse_variants(opts):
+    """
+    Turn the command line options into a list of model variants
+    input:
+        opts: parsed arguments from get_parser()
+    output:
+        variants: list of dictionaries with model_break,
+            only_breaks_with_performance_feedback and add_deriv
+    """
+    variant_flags = ["model_break", "omit_deriv", "only_breaks_with_performance_feedback"]
+    if opts.variants is None:
+        specs = [
+            {
+                "model_break": opts.model_break,
+                "omit_deriv": opts.omit_deriv,
+                "only_breaks_with_performance_feedback": opts.only_breaks_with_performance_feedback,
+            }
+        ]
+    else:
+        specs = []
+        for variant_string in opts.variants:
+            flags = [] if variant_string == "base" else variant_string.split("+")
+            for flag in flags:
+                if flag not in variant_flags:
+                    raise ValueError(
+                        f"Unknown variant flag '{flag}' in '{variant_string}'. "
+                        f"Use 'base' or a '+' separated list of {variant_flags}"
+                    )
+            specs.append({flag: flag in flags for flag in variant_flags})
+
+    variants = []
+    for spec in specs:
+        variant = {
+            "model_break": spec["model_break"],
+            "only_breaks_with_performance_feedback": spec["only_breaks_with_performance_feedback"],
+            "add_deriv": "deriv_no" if spec["omit_deriv"] else "deriv_yes",
+        }
+        if variant not in variants:
+            variants.append(variant)
+    return variants
+
+
+def get_contrast_dir(bids, task, regress_rt, model_break, only_breaks_with_performance_feedback, add_deriv):
+    """
+    Output directories for a given model variant
+    output:
+        outdir: lev_1_output directory for the task/variant
+        contrast_dir: directory for this rt model within outdir
+    """
+    if model_break:
+        if only_breaks_with_performance_feedback:
+            outdir = f"{bids}/derivatives/lev_1_output/{task}_lev1_model_break_performance_feedback_only"
+        else:
+            outdir = f"{bids}/derivatives/lev_1_output/{task}_lev1_model_break"
+    else:
+        outdir = f"{bids}/derivatives/lev_1_output/{task}_lev1_model"
+
+    if add_deriv == "deriv_yes":
+        outdir = f"{outdir}_deriv"
+    else:
+        outdir = f"{outdir}_no_deriv"
+
+    contrast_dir = f"{outdir}/task_{task}_rtmodel_{regress_rt}"
+    return outdir, contrast_dir
+
+
 def filter_files(files, subid, task):
     """
     Exclude certain task sessions for certain subjects and print removed files
@@ -365,8 +449,32 @@ def filter_files(files, subid, task):
         return files
 
 if __name__ == "__main__":
-    from nilearn.glm.first_level import FirstLevelModel
-    from nilearn.glm.contrasts import compute_fixed_effects
+    from utils_lev1.design import make_desmat_contrasts
+    from utils_lev1.session_glm import (
+        load_session_data,
+        fit_design,
+        compute_contrasts_batched,
+        write_maps,
+        get_residuals_image,
+        write_residuals_image,
+    )
+    from utils_lev1.ar1_glm import fit_ar1_contrasts, open_residuals_memmap
+    from utils_lev1.qa import qa_design_matrix, create_fixed_effects_html
+    from utils_lev1.qa_report import save_qa_artifacts
+    from utils_lev1.vif_store import new_vif_batch, write_vif_batch
+    from utils_lev1.fixed_effects import (
+        new_fixed_effects,
+        add_session_to_fixed_effects,
+        add_session_files_to_fixed_effects,
+        fixed_effects_images,
+    )
+    from utils_lev1.provenance import (
+        session_provenance,
+        get_provenance_file,
+        read_provenance,
+        is_up_to_date,
+        write_provenance,
+    )
 
     opts = get_parser().parse_args(sys.argv[1:])
     qa_only = opts.qa_only
@@ -376,39 +484,45 @@ if __name__ == "__main__":
     fixed_effects = opts.fixed_effects
     simplified_events = opts.simplified_events
     residuals = opts.residuals
-    model_break = opts.model_break
-    only_breaks_with_performance_feedback = opts.only_breaks_with_performance_feedback
-    print("Only model breaks with performance feedback: ",only_breaks_with_performance_feedback)
-
-    if opts.omit_deriv:
-        add_deriv = "deriv_no"
-    else:
-        add_deriv = "deriv_yes"
+    write_residuals = residuals or opts.save_residuals
+    # residuals are only streamed by the chunked engine
+    use_chunked_glm = opts.glm_engine == "chunked" or opts.save_residuals
+    variants = parse_variants(opts)
+    print("Model variants: ", variants)
     duration_choice = "constant"
 
     # Paths for validation sample
     bids = "/oak/stanford/groups/russpold/data/network_grant/validation_BIDS"
     root = f"{bids}/derivatives/glm_data"
-
-    if model_break:
-        if only_breaks_with_performance_feedback:
-            outdir = f"{bids}/derivatives/lev_1_output/{task}_lev1_model_break_performance_feedback_only"
-        else:
-            outdir = f"{bids}/derivatives/lev_1_output/{task}_lev1_model_break"
+    if opts.bold_cache_gb > 0:
+        bold_cache_dir = opts.bold_cache_dir or f"{bids}/derivatives/lev_1_cache/masked_bold"
     else:
-        outdir = f"{bids}/derivatives/lev_1_output/{task}_lev1_model"
-    
-    if add_deriv == "deriv_yes":
-        outdir = f"{outdir}_deriv"
+        bold_cache_dir = None
+    if opts.no_design_cache:
+        design_cache_dir = None
     else:
-        outdir = f"{outdir}_no_deriv"
+        design_cache_dir = opts.design_cache_dir or f"{bids}/derivatives/lev_1_cache/designs"
+    rt_index_dir = f"{bids}/derivatives/lev_1_cache/rt_index"
+    scan_index_file = f"{bids}/derivatives/lev_1_cache/scan_index.tsv"
+    if opts.manifest:
+        manifest_file = f"{bids}/derivatives/lev_1_cache/glm_data_manifest.sqlite"
+    else:
+        manifest_file = None
 
-    contrast_dir = f"{outdir}/task_{task}_rtmodel_{regress_rt}"
- 
-    os.makedirs(outdir, exist_ok=True)
-    os.makedirs(f"{contrast_dir}/contrast_estimates", exist_ok=True)
+    for variant in variants:
+        outdir, contrast_dir = get_contrast_dir(
+            bids,
+            task,
+            regress_rt,
+            variant["model_break"],
+            variant["only_breaks_with_performance_feedback"],
+            variant["add_deriv"],
+        )
+        variant["contrast_dir"] = contrast_dir
+        os.makedirs(outdir, exist_ok=True)
+        os.makedirs(f"{contrast_dir}/contrast_estimates", exist_ok=True)
 
-    files = get_files(root=root, subid=subid, task=task)
+    files = get_files(root=root, subid=subid, task=task, manifest_file=manifest_file)
 
     print("---- FILES BEFORE FILTERING ----")
     print(f"Total number of files: {len(files['data_file'])}")
@@ -429,146 +543,227 @@ if __name__ == "__main__":
     print(f"Total number of events files: {len(files['events_file'])}")
     print(f"Total number of confounds files: {len(files['confounds_file'])}")
 
-    effect_size_files = {}
-    variance_files = {}
-    mean_rt = calculate_mean_rt(root, task)
+    mean_rt = calculate_mean_rt(root, task, index_dir=rt_index_dir, manifest_file=manifest_file)
 
+    # running fixed effects sums per (contrast_dir, contrast name)
+    fixed_fx = {}
+    # VIFs of the current session's variants, appended to the store after each session
+    vif_batch = new_vif_batch()
     for data_file in files["data_file"]:
         ses = data_file.split("/")[-3]
         event_file = [i for i in files["events_file"] if ses in i][0]
         confounds_file = [i for i in files["confounds_file"] if ses in i][0]
         mask_file = [i for i in files["mask_file"] if ses in i][0]
-        n_scans = get_nscans(data_file)
-  
-        design_matrix, contrasts, tr, percent_junk, simplified_events_df = make_desmat_contrasts(
-            root,
-            task,
-            event_file,
-            duration_choice,
-            add_deriv,
-            n_scans,
-            mean_rt,
-            confounds_file,
-            regress_rt,
-            model_break
-        )
-        design_matrix['constant'] = 1
-        if simplified_events:
-            if not os.path.exists(f"{contrast_dir}/simplified_events"):
-                os.makedirs(f"{contrast_dir}/simplified_events")
-            simplified_filename = f"{contrast_dir}/simplified_events/sub-{subid}_{ses}_task-{task}_simplified-events.csv"
-            simplified_events_df.to_csv(simplified_filename)
-
-        exclusion, any_fail = qa_design_matrix(
-            contrast_dir,
-            contrasts,
-            design_matrix,
-            subid,
-            task,
-            ses,
-            percent_junk=percent_junk,
-        )
+        n_scans = get_nscans(data_file, root=root, index_file=scan_index_file, manifest_file=manifest_file)
+
+        # Build and QA every variant's design before touching the BOLD data
+        # so the data are only loaded (and smoothed) once per session, and
+        # only if some variant passes QA and is out of date
+        models_to_fit = []
+        for variant in variants:
+            contrast_dir = variant["contrast_dir"]
+            design_matrix, contrasts, tr, percent_junk, simplified_events_df = make_desmat_contrasts(
+                root,
+                task,
+                event_file,
+                duration_choice,
+                variant["add_deriv"],
+                n_scans,
+                mean_rt,
+                confounds_file,
+                regress_rt,
+                variant["model_break"],
+                cache_dir=design_cache_dir,
+                max_cache_gb=opts.design_cache_gb,
+            )
+            variant["contrasts"] = contrasts
+            if simplified_events:
+                if not os.path.exists(f"{contrast_dir}/simplified_events"):
+                    os.makedirs(f"{contrast_dir}/simplified_events")
+                simplified_filename = f"{contrast_dir}/simplified_events/sub-{subid}_{ses}_task-{task}_simplified-events.csv"
+                simplified_events_df.to_csv(simplified_filename)
+
+            exclusion, any_fail = qa_design_matrix(
+                contrast_dir,
+                contrasts,
+                design_matrix,
+                subid,
+                task,
+                ses,
+                percent_junk=percent_junk,
+                root=root,
+                scan_index_file=scan_index_file,
+                manifest_file=manifest_file,
+            )
 
-        add_to_html_summary(
-            subid,
-            contrasts,
-            design_matrix,
-            contrast_dir,
-            regress_rt,
-            duration_choice,
-            task,
-            any_fail,
-            exclusion,
-            ses,
-            percent_junk,
-            model_break,
-            add_deriv,
-            only_breaks_with_performance_feedback 
-        )
+            # plots are rendered later from these by render_qa_report.py
+            save_qa_artifacts(
+                contrast_dir,
+                subid,
+                ses,
+                task,
+                regress_rt,
+                contrasts,
+                design_matrix,
+                any_fail,
+                exclusion,
+                percent_junk,
+                variant["model_break"],
+                variant["add_deriv"],
+                variant["only_breaks_with_performance_feedback"],
+                vif_batch=vif_batch,
+            )
 
-        if not any_fail and qa_only == False:
-            print(f"Running model for {data_file}")
-            if not residuals:
-                fmri_glm = FirstLevelModel(
-                    tr,
-                    subject_label=subid,
-                    mask_img=mask_file,
-                    noise_model="ar1",
-                    standardize=False,
-                    drift_model=None,
-                    smoothing_fwhm=5,
-                    minimize_memory=True,
+            if any_fail or qa_only:
+                continue
+
+            provenance_file = get_provenance_file(contrast_dir, subid, ses, task, regress_rt)
+            inputs = session_provenance(
+                data_file,
+                event_file,
+                confounds_file,
+                mask_file,
+                mean_rt,
+                {
+                    "task": task,
+                    "regress_rt": regress_rt,
+                    "duration_choice": duration_choice,
+                    "add_deriv": variant["add_deriv"],
+                    "model_break": variant["model_break"],
+                    "only_breaks_with_performance_feedback": variant["only_breaks_with_performance_feedback"],
+                    "smoothing_fwhm": 5,
+                    "noise_model": "ar1",
+                },
+            )
+            # QA always runs (its cutoffs depend on the whole data set), only
+            # the data load and fit are skipped for up to date sessions
+            if not opts.force and is_up_to_date(
+                provenance_file, inputs, need_contrasts=not residuals, need_residuals=write_residuals
+            ):
+                print(f"Outputs for {data_file} in {contrast_dir} are up to date, skipping the fit")
+                record = read_provenance(provenance_file)
+                if fixed_effects and not residuals:
+                    for con_name, con_files in record["outputs"]["contrasts"].items():
+                        key = (contrast_dir, con_name)
+                        if key not in fixed_fx:
+                            fixed_fx[key] = new_fixed_effects(precision_weighted=False)
+                        add_session_files_to_fixed_effects(
+                            fixed_fx[key],
+                            mask_file,
+                            con_files["effect_size"],
+                            con_files["effect_variance"],
+                        )
+                continue
+
+            models_to_fit.append((variant, design_matrix, contrasts, provenance_file, inputs))
+
+        # one part per session, so a crash later in the run keeps these
+        write_vif_batch(opts.vif_store_dir, vif_batch)
+        if not models_to_fit:
+            continue
+
+        print(f"Loading data for {data_file}")
+        data, masker = load_session_data(
+            data_file,
+            mask_file,
+            smoothing_fwhm=5,
+            cache_dir=bold_cache_dir,
+            max_cache_gb=opts.bold_cache_gb,
+            mean_scale=not use_chunked_glm,
+        )
+        session_voxels = np.flatnonzero(np.asanyarray(masker.mask_img_.dataobj))
+
+        for variant, design_matrix, contrasts, provenance_file, inputs in models_to_fit:
+            contrast_dir = variant["contrast_dir"]
+            print(f"Running model for {data_file} in {contrast_dir}")
+            residuals_filename = f"{contrast_dir}/contrast_estimates/sub-{subid}_{ses}_task-{task}_rtmodel-{regress_rt}_residuals.nii.gz"
+            if use_chunked_glm:
+                residuals_out = None
+                if write_residuals:
+                    residuals_out = open_residuals_memmap(*data.shape)
+                con_estimates = fit_ar1_contrasts(
+                    data,
+                    design_matrix,
+                    contrasts,
+                    chunk_size=opts.chunk_size,
+                    residuals_out=residuals_out,
+                )
+            else:
+                labels, results = fit_design(
+                    data, design_matrix, noise_model="ar1", minimize_memory=not residuals
                 )
 
-                out = fmri_glm.fit(data_file, design_matrices=design_matrix)
-
-                contrast_names = []
-                for con_name, con in contrasts.items():
-                    con_est = out.compute_contrast(con, output_type="all")
-                    contrast_names.append(con_name)
-                    effect_size_filename = (
-                        f"{contrast_dir}/contrast_estimates/sub-{subid}_{ses}_task-{task}_contrast-{con_name}"
-                        f"_rtmodel-{regress_rt}_stat"
-                        f"-effect-size.nii.gz"
-                    )
-                    con_est["effect_size"].to_filename(effect_size_filename)
-                    variance_filename = (
-                        f"{contrast_dir}/contrast_estimates/sub-{subid}_{ses}_task-{task}_contrast-{con_name}"
-                        f"_rtmodel-{regress_rt}_stat"
-                        f"-variance.nii.gz"
-                    )
-                    con_est["effect_variance"].to_filename(variance_filename)
-                    zscore_filename = (
+            contrast_files = {}
+            if not residuals:
+                if not use_chunked_glm:
+                    con_estimates = compute_contrasts_batched(labels, results, design_matrix, contrasts)
+                    del labels, results
+                maps_to_write = {}
+                for con_name, con_est in con_estimates.items():
+                    file_root = (
                         f"{contrast_dir}/contrast_estimates/sub-{subid}_{ses}_task-{task}_contrast-{con_name}"
                         f"_rtmodel-{regress_rt}_stat"
-                        f"-z_score.nii.gz"
                     )
-                    con_est["z_score"].to_filename(zscore_filename)
+                    maps_to_write[f"{file_root}-effect-size.nii.gz"] = con_est["effect_size"]
+                    maps_to_write[f"{file_root}-variance.nii.gz"] = con_est["effect_variance"]
+                    maps_to_write[f"{file_root}-z_score.nii.gz"] = con_est["z_score"]
+                    contrast_files[con_name] = {
+                        "effect_size": f"{file_root}-effect-size.nii.gz",
+                        "effect_variance": f"{file_root}-variance.nii.gz",
+                        "z_score": f"{file_root}-z_score.nii.gz",
+                    }
+                write_maps(masker, maps_to_write)
+                if fixed_effects:
+                    for con_name, con_est in con_estimates.items():
+                        key = (contrast_dir, con_name)
+                        if key not in fixed_fx:
+                            fixed_fx[key] = new_fixed_effects(precision_weighted=False)
+                        add_session_to_fixed_effects(
+                            fixed_fx[key],
+                            masker.mask_img_,
+                            session_voxels,
+                            con_est["effect_size"],
+                            con_est["effect_variance"],
+                        )
+                contrast_names = list(con_estimates.keys())
                 print(f"Contrast names: {contrast_names}")
                 contrast_names.remove("task-baseline")
 
             # saving residuals for Mahalanobis distance analysis
-            if residuals:
-                fmri_glm = FirstLevelModel(
-                    tr,
-                    subject_label=subid,
-                    mask_img=mask_file,
-                    noise_model="ar1",
-                    standardize=False,
-                    drift_model=None,
-                    smoothing_fwhm=5,
-                    minimize_memory=False,
-                )
-                out = fmri_glm.fit(data_file, design_matrices=design_matrix)
-
-                residuals_filename = f"{contrast_dir}/contrast_estimates/sub-{subid}_{ses}_task-{task}_rtmodel-{regress_rt}_residuals.nii.gz"
-                fmri_glm.residuals[0].to_filename(residuals_filename)
+            if write_residuals and use_chunked_glm:
+                write_residuals_image(residuals_out, masker, residuals_filename)
+                del residuals_out
+            elif residuals:
+                get_residuals_image(masker, labels, results, n_scans).to_filename(residuals_filename)
+                del labels, results
+            write_provenance(
+                provenance_file,
+                inputs,
+                contrasts=contrasts,
+                contrast_files=contrast_files,
+                residuals_file=residuals_filename if write_residuals else None,
+            )
+        del data
 
     if fixed_effects:
-        print('Contrasts: ', contrasts)
-        # Save out fixed effects contrasts to separate directory
-        fixed_effects_dir = f'{contrast_dir}/contrast_estimates'.replace('lev_1_output', 'within_subject_fixed_effects')
-        os.makedirs(fixed_effects_dir, exist_ok=True)
-
-        for con_name, con in contrasts.items():
-            effect_size_files = sorted(
-                glob.glob(
-                    f"{contrast_dir}/contrast_estimates/sub-{subid}_*contrast-{con_name}*effect-size.nii.gz"
+        for variant in variants:
+            contrast_dir = variant["contrast_dir"]
+            contrasts = variant.get("contrasts", {})
+            print('Contrasts: ', contrasts)
+            # Save out fixed effects contrasts to separate directory
+            fixed_effects_dir = f'{contrast_dir}/contrast_estimates'.replace('lev_1_output', 'within_subject_fixed_effects')
+            os.makedirs(fixed_effects_dir, exist_ok=True)
+
+            for con_name in contrasts:
+                if (contrast_dir, con_name) not in fixed_fx:
+                    print(f"No sessions were fit for {con_name} in {contrast_dir}, skipping fixed effects")
+                    continue
+                fixed_fx_contrast, fixed_fx_variance, fixed_fx_stat = fixed_effects_images(
+                    fixed_fx[(contrast_dir, con_name)]
                 )
-            )
-            variance_files = sorted(
-                glob.glob(
-                    f"{contrast_dir}/contrast_estimates/sub-{subid}_*contrast-{con_name}*variance.nii.gz"
+                fixed_effects_filename = (
+                    f"{fixed_effects_dir}/sub-{subid}_task-{task}_contrast-{con_name}_rtmodel-{regress_rt}"
+                    + "_stat-fixed-effects_t-test.nii.gz"
                 )
-            )
-            fixed_fx_contrast, fixed_fx_variance, fixed_fx_stat = compute_fixed_effects(
-                effect_size_files, variance_files, precision_weighted=False
-            )
-            fixed_effects_filename = (
-                f"{fixed_effects_dir}/sub-{subid}_task-{task}_contrast-{con_name}_rtmodel-{regress_rt}"
-                + "_stat-fixed-effects_t-test.nii.gz"
-            )
-            fixed_fx_stat.to_filename(fixed_effects_filename)
-            create_fixed_effects_html(fixed_effects_filename, fixed_fx_contrast, fixed_fx_variance, fixed_fx_stat)
-            
-    # -
+                fixed_fx_stat.to_filename(fixed_effects_filename)
+                create_fixed_effects_html(fixed_effects_filename, fixed_fx_contrast, fixed_fx_variance, fixed_fx_stat)
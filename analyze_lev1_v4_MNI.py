@@ -256,12 +256,31 @@ def get_parser():
         action="store_true",
         help=("Use this flag to create residual images"),
     )
+    parser.add_argument(
+        "--bold_cache_dir",
+        default=None,
+        help=(
+            "Directory for the cache of masked, smoothed BOLD matrices.\n"
+            "Defaults to <bids>/derivatives/lev_1_cache/masked_bold"
+        ),
+    )
+    parser.add_argument(
+        "--bold_cache_gb",
+        type=float,
+        default=0,
+        help=(
+            "Size cap (GB) for the masked BOLD cache, least recently used\n"
+            "entries are evicted first.  The cache is off by default (0),\n"
+            "e.g. --bold_cache_gb 50 turns it on."
+        ),
+    )
     return parser
 
 
 if __name__ == "__main__":
     from nilearn.glm.first_level import FirstLevelModel
     from nilearn.glm.contrasts import compute_fixed_effects
+    from utils_lev1.session_glm import load_session_data, fit_design, compute_contrast_images
 
     opts = get_parser().parse_args(sys.argv[1:])
     qa_only = opts.qa_only
@@ -282,6 +301,10 @@ if __name__ == "__main__":
     root = f'{bids}/derivatives/glm_data'
     outdir = f'{bids}/derivatives/output_v4_MNI/{task}_lev1_output'
     tedana_root = f'{bids}/derivatives/tedana_kundu'
+    if opts.bold_cache_gb > 0:
+        bold_cache_dir = opts.bold_cache_dir or f"{bids}/derivatives/lev_1_cache/masked_bold"
+    else:
+        bold_cache_dir = None
     contrast_dir = f"{outdir}/task_{task}_rtmodel_{regress_rt}"
     
     os.makedirs(outdir, exist_ok=True)
@@ -335,6 +358,8 @@ if __name__ == "__main__":
             task,
             ses,
             percent_junk=percent_junk,
+            root=root,
+            scan_index_file=f'{bids}/derivatives/lev_1_cache/scan_index.tsv',
         )
 
         add_to_html_summary(
@@ -354,22 +379,19 @@ if __name__ == "__main__":
         if not any_fail and qa_only == False:
             print(f"Running model for {data_file}")
             if not residuals:
-                fmri_glm = FirstLevelModel(
-                    tr,
-                    subject_label=subid,
-                    mask_img=mask_file,
-                    noise_model="ar1",
-                    standardize=False,
-                    drift_model=None,
+                data, masker = load_session_data(
+                    data_file,
+                    mask_file,
                     smoothing_fwhm=5,
-                    minimize_memory=True,
+                    cache_dir=bold_cache_dir,
+                    max_cache_gb=opts.bold_cache_gb,
                 )
-
-                out = fmri_glm.fit(data_file, design_matrices=design_matrix)
+                labels, results = fit_design(data, design_matrix, noise_model="ar1")
+                del data
 
                 contrast_names = []
                 for con_name, con in contrasts.items():
-                    con_est = out.compute_contrast(con, output_type="all")
+                    con_est = compute_contrast_images(masker, labels, results, design_matrix, con)
                     contrast_names.append(con_name)
                     effect_size_filename = (
                         f"{contrast_dir}/contrast_estimates/sub-{subid}_{ses}_task-{task}_contrast-{con_name}"
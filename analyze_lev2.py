@@ -90,17 +90,34 @@ def check_valid_contrasts():
     return task_con_names        
 
 
+def get_manifest_files(manifest_dir):
+    """
+    File manifests (utils_lev1.manifest) for the raw BIDS tree and fmriprep
+    derivatives.  Returns (None, None) when manifest_dir is None, in which
+    case the file system is globbed directly.
+    """
+    if manifest_dir is None:
+        return None, None
+    return (f'{manifest_dir}/bids_manifest.sqlite',
+            f'{manifest_dir}/fmriprep_manifest.sqlite')
+
+
 def get_design_mat_row_subject(
     subid, task, root, rt_subset_dict, rt_trial_grouping, rt_diff_definition,
-    model_lev2, confounds_btwn_sub
+    model_lev2, confounds_btwn_sub, manifest_dir=None
 ):
+    from utils_lev1.manifest import glob_files
+
+    bids_manifest, fmriprep_manifest = get_manifest_files(manifest_dir)
     confounds_this_sub = confounds_btwn_sub.loc[confounds_btwn_sub['index'] == f"s{subid}"]
-    confounds_file = glob.glob(
-        f'{root}/derivatives/fmriprep/sub-s{subid}/ses-[0-9]/func/*{task}*confounds*.tsv'
+    confounds_file = glob_files(
+        f'{root}/derivatives/fmriprep/sub-s{subid}/ses-[0-9]/func/*{task}*confounds*.tsv',
+        f'{root}/derivatives/fmriprep', fmriprep_manifest
     )[0]
     confounds_within_sub= pd.read_csv(confounds_file, sep = '\t')
-    events_tsv_file = glob.glob(
-        f'{root}/sub-s{subid}/ses-[0-9]/func/*{task}*tsv'
+    events_tsv_file = glob_files(
+        f'{root}/sub-s{subid}/ses-[0-9]/func/*{task}*tsv',
+        root, bids_manifest, exclude=('derivatives', 'sourcedata', '.git')
     )[0]
     events_tsv = pd.read_csv(events_tsv_file, sep = '\t')
     if confounds_btwn_sub['index'].str.contains(f's{subid}').any():
@@ -169,7 +186,7 @@ def get_bold_and_sublist(lev1_task_contrast):
 
 def build_desmat_all(
     lev1_task_contrast, model_lev2, root, rt_subset_dict, rt_trial_grouping, 
-    rt_diff_definition, rt_diff_dv_checker
+    rt_diff_definition, rt_diff_dv_checker, manifest_dir=None
 ):
     task, lev1_contrast, rtmodel, duration =  lev1_task_contrast.split(':')
     confounds_btwn_sub_file = (
@@ -190,7 +207,7 @@ def build_desmat_all(
         for subid in sub_list:    
             design, regressor_names = get_design_mat_row_subject(
                  subid, task, root, rt_subset_dict, rt_trial_grouping, 
-                 rt_diff_definition, model_lev2, confounds_btwn_sub
+                 rt_diff_definition, model_lev2, confounds_btwn_sub, manifest_dir
             )
             desmat_all.append(design)
         desmat_all = np.array(desmat_all)
@@ -218,15 +235,16 @@ def build_desmat_all(
     return desmat_final, bold_files_final, regressor_names, summary_missing
 
   
-def make_4d_data_mask(bold_files_final, outdir, lev1_task_contrast):
+def make_4d_data_mask(stack_file, outdir, lev1_task_contrast):
     from nilearn.maskers import NiftiMasker
+    from utils_lev2.stack import stack_mean_img, stack_to_img
     task, lev1_contrast, rtmodel, duration =  lev1_task_contrast.split(':')
-    data4d = nf.funcs.concat_images(bold_files_final)
     filename_root = (f'{outdir}/{task}_lev1_contrast_{lev1_contrast}_rtmod_{rtmodel}_'
               f'duration_{duration}')
-    data4d.to_filename(f'{filename_root}.nii.gz')
+    stack_to_img(stack_file).to_filename(f'{filename_root}.nii.gz')
 
-    mask = NiftiMasker().fit(data4d).mask_img_
+    # the background mask only depends on the mean image
+    mask = NiftiMasker().fit(stack_mean_img(stack_file)).mask_img_
     mask.to_filename(f'{filename_root}_mask.nii.gz')
 
 
@@ -329,9 +347,90 @@ def run_it(outdir, model_lev2, lev1_task_contrast):
         f.write(script_out.decode('ascii'))
 
 
+def get_contrast_matrix(contrasts, regressor_names, model_lev2):
+    from nilearn.glm.contrasts import expression_to_contrast_vector
+    if model_lev2 == 'one_sampt':
+        regressor_names = ['intercept']
+    return np.array([
+        expression_to_contrast_vector(contrast[0], regressor_names) for contrast in contrasts
+    ])
+
+
+def run_parametric_models(
+    lev1_task_contrast, models_lev2, root, manifest_dir, outdir
+    ):
+    """
+    Parametric OLS t and F maps (utils_lev2.parametric) of several level 2
+    models in one pass over the subject maps.  Models whose regressors don't
+    work with this contrast, or whose design is rank deficient, are skipped.
+    Writes
+    {outdir}/parametric_output_model_{model}_tstat1.nii.gz, ... (p maps as 1 - p)
+    """
+    from nilearn.maskers import NiftiMasker
+    from utils_lev2.parametric import fit_ols_models, get_ols_model, write_ols_maps
+    from utils_lev2.stack import (build_subject_stack, masked_stack,
+                                  remove_subject_stack, stack_mean_img)
+
+    sub_list, bold_files = get_bold_and_sublist(lev1_task_contrast)
+    models = {}
+    for model_lev2 in models_lev2:
+        try:
+            desmat_final, bold_files_final, regressor_names, summary_missing = build_desmat_all(
+                lev1_task_contrast, model_lev2, root, rt_subset_dict, rt_trial_grouping,
+                rt_diff_definition, rt_diff_dv_checker, manifest_dir
+            )
+        except ValueError as err:
+            print(f'Skipping model {model_lev2}: {err}')
+            continue
+        rows = [bold_files.index(bold_file) for bold_file in bold_files_final]
+        contrast_matrix = get_contrast_matrix(
+            contrast_definition_by_model[model_lev2], regressor_names, model_lev2
+        )
+        try:
+            # rank deficient designs would stop every model in fit_ols_models
+            get_ols_model(desmat_final, contrast_matrix, rows)
+        except ValueError as err:
+            print(f'Skipping model {model_lev2}: {err}')
+            continue
+        models[model_lev2] = (desmat_final, contrast_matrix, rows)
+        print(f'Model {model_lev2}: N={len(rows)}')
+
+    stack_file = build_subject_stack(bold_files, f'{outdir}/subject_stack.npy')
+    mask_img = NiftiMasker().fit(stack_mean_img(stack_file)).mask_img_
+    results = fit_ols_models(masked_stack(stack_file, mask_img), models)
+    write_ols_maps(results, mask_img, f'{outdir}/parametric_output')
+    remove_subject_stack(stack_file)
+
+
+def run_permutations_numpy(
+    desmat_final, regressor_names, contrasts, outdir, model_lev2,
+    lev1_task_contrast, stack_file, n_perm=5000, n_jobs=1, tfce=True
+    ):
+    """
+    Same tests as the randomise call (one sided t-tests and the 1DF F-tests,
+    sign flipping for one_sampt, all subjects exchangeable otherwise) with the
+    NumPy permutation engine, writing the same randomise_output_model_* files
+    (voxelwise and TFCE, uncorrected and max statistic FWE corrected)
+    """
+    from utils_lev2.permutation import run_permutation_inference
+    from utils_lev2.stack import masked_stack
+
+    task, lev1_contrast, rtmodel, duration =  lev1_task_contrast.split(':')
+    filename_input_root = (f'{outdir}/{task}_lev1_contrast_{lev1_contrast}_rtmod_{rtmodel}_'
+              f'duration_{duration}')
+    contrast_matrix = get_contrast_matrix(contrasts, regressor_names, model_lev2)
+    mask_file = f'{filename_input_root}_mask.nii.gz'
+    run_permutation_inference(
+        f'{filename_input_root}.nii.gz', mask_file,
+        desmat_final, contrast_matrix, f'{outdir}/randomise_output_model_{model_lev2}',
+        n_perm=n_perm, n_jobs=n_jobs, tfce=tfce,
+        data=masked_stack(stack_file, nf.load(mask_file))
+    )
+
+
 def make_html_summary(
     desmat_final, bold_files_final, regressor_names, contrasts, 
-    summary_missing, outdir
+    summary_missing, outdir, stack_file
     ):
     import seaborn as sns
     from matplotlib import pyplot as plt
@@ -341,6 +440,8 @@ def make_html_summary(
     from nilearn.plotting import plot_design_matrix, plot_carpet, plot_stat_map
     from nilearn import masking
     from statsmodels.stats.outliers_influence import variance_inflation_factor
+    from utils_lev2.stack import (load_subject_stack, stack_mean_img,
+                                  stack_nonzero_quantile, stack_to_img)
 
     total_n = len(bold_files_final)
     if summary_missing is not None:
@@ -417,15 +518,14 @@ def make_html_summary(
         html_desmat = ' '
         html_contrast = ''
 
-    data4d = nf.funcs.concat_images(bold_files_final)
-    data4d_array = data4d.get_fdata()
+    data4d = stack_to_img(stack_file)
+    stack, volume_shape, affine = load_subject_stack(stack_file)
     sub_list_final = [
         re.search('_sub_(.*)_rtmodel_', val).group(1) for val in bold_files_final
     ] 
     
-    data_nonzero = data4d_array[data4d_array.nonzero()]
-    cutoff = np.quantile(np.abs(data_nonzero), .99)
-    mask_img = masking.compute_epi_mask(data4d)
+    cutoff = stack_nonzero_quantile(stack_file, .99)
+    mask_img = masking.compute_epi_mask(stack_mean_img(stack_file))
     carpet = plot_carpet(data4d, mask_img, t_r=1, title='Raw data for all subjects',
                          cmap='Greys', vmin = -1*cutoff, vmax = cutoff, detrend=False)
     plt.xlabel('Subjects')
@@ -443,12 +543,12 @@ def make_html_summary(
     for idx, ax in enumerate(axs.ravel()):
         if idx < total_n:
             ax.set_title(f"subject {sub_list_final[idx]}", fontsize=10)
-            ax.imshow(np.flipud(np.transpose(data4d_array[:, :, 40, idx])), cmap='Greys',
+            ax.imshow(np.flipud(np.transpose(stack[idx].reshape(volume_shape)[:, :, 40])), cmap='Greys',
                 vmin = -1*cutoff, vmax = cutoff, aspect='auto')
             ax.axis('off')
         if idx >= total_n:
             ax.set_title('blank', fontsize=10)
-            ax.imshow(np.zeros(data4d_array[:, :, 40, 1].shape), cmap='Greys',
+            ax.imshow(np.zeros(volume_shape[:2]), cmap='Greys',
                 vmin = -1*cutoff, vmax = cutoff)
             ax.axis('off')
     plt.tight_layout()
@@ -492,11 +592,48 @@ def get_parser():
     )
     parser.add_argument(
         'model_lev2',
-        choices=['one_sampt', 'rt_diff', 'rt_diff_w_confounds'],
+        choices=['one_sampt', 'rt_diff', 'rt_diff_w_confounds', 'all'],
         action='store',
         help=("Use to specify model. rt_diff and rt_diff_w_confounds only works "
               "with congruency_parametric, stop_failure-go, task_switch_cost_900, "
-              "AY-BY, crit_go-noncrit_signal.  Intercept is always included."
+              "AY-BY, crit_go-noncrit_signal.  Intercept is always included. "
+              "all (only with --engine parametric) fits every model."
+        ),
+    )
+    parser.add_argument(
+        '--engine',
+        choices=['randomise', 'numpy', 'parametric'],
+        default='randomise',
+        help=("randomise: write the randomise batch file (default). numpy: run the "
+              "permutation tests here (utils_lev2.permutation), writing the "
+              "randomise_output_model_* maps. parametric: quick OLS t/F maps "
+              "(utils_lev2.parametric), parametric_output_model_* maps."
+        ),
+    )
+    parser.add_argument(
+        '--n_perm',
+        type=int,
+        default=5000,
+        help="Number of permutations (numpy engine).",
+    )
+    parser.add_argument(
+        '--n_jobs',
+        type=int,
+        default=1,
+        help="Number of processes running permutations (numpy engine).",
+    )
+    parser.add_argument(
+        '--no_tfce',
+        action='store_true',
+        help="Skip TFCE, only voxelwise inference (numpy engine).",
+    )
+    parser.add_argument(
+        '--manifest_dir',
+        default=None,
+        help=("Directory of the file manifests (utils_lev1.manifest) used to "
+              "find the events and confounds files instead of globbing, "
+              "e.g. /oak/stanford/groups/russpold/data/uh2/aim1_mumford/output/manifests. "
+              "By default the file system is globbed."
         ),
     )
     return parser
@@ -504,12 +641,16 @@ def get_parser():
  
 if __name__ == "__main__":
     argv = sys.argv[1:]
-    opts = get_parser().parse_args(argv)
+    parser = get_parser()
+    opts = parser.parse_args(argv)
+    if opts.model_lev2 == 'all' and opts.engine != 'parametric':
+        parser.error('model_lev2 all only works with --engine parametric')
     lev1_task_contrast = opts.lev1_task_contrast
     model_lev2 = opts.model_lev2
 
     batch_stub = '/oak/stanford/groups/russpold/data/uh2/aim1_mumford/code/run_stub.batch'
     root = '/oak/stanford/groups/russpold/data/uh2/aim1/BIDS'
+    manifest_dir = opts.manifest_dir
     task, lev1_contrast, rtmodel, duration =  lev1_task_contrast.split(':')
 
     outdir = Path(f"/oak/stanford/groups/russpold/data/uh2/aim1_mumford/output/"
@@ -519,18 +660,32 @@ if __name__ == "__main__":
         shutil.rmtree(outdir)
     outdir.mkdir(parents=True)
 
+    if opts.engine == 'parametric':
+        models_lev2 = list(contrast_definition_by_model) if model_lev2 == 'all' else [model_lev2]
+        run_parametric_models(lev1_task_contrast, models_lev2, root, manifest_dir, outdir)
+        sys.exit(0)
+
     desmat_final, bold_files_final, regressor_names, summary_missing = build_desmat_all(
     lev1_task_contrast, model_lev2, root, rt_subset_dict, rt_trial_grouping, 
-    rt_diff_definition, rt_diff_dv_checker
+    rt_diff_definition, rt_diff_dv_checker, manifest_dir
     )
     contrasts = contrast_definition_by_model[model_lev2]
+    from utils_lev2.stack import build_subject_stack, remove_subject_stack
+    stack_file = build_subject_stack(bold_files_final, f'{outdir}/subject_stack.npy')
     make_html_summary(
         desmat_final, bold_files_final, regressor_names, contrasts, 
-        summary_missing, outdir
+        summary_missing, outdir, stack_file
     )
-    make_4d_data_mask(bold_files_final, outdir, lev1_task_contrast)
+    make_4d_data_mask(stack_file, outdir, lev1_task_contrast)
     make_randomise_files(desmat_final, regressor_names, contrasts, outdir, model_lev2)
-    make_batch_file(outdir, model_lev2, lev1_task_contrast, batch_stub)
+    if opts.engine == 'numpy':
+        run_permutations_numpy(
+            desmat_final, regressor_names, contrasts, outdir, model_lev2,
+            lev1_task_contrast, stack_file, opts.n_perm, opts.n_jobs, not opts.no_tfce
+        )
+    else:
+        make_batch_file(outdir, model_lev2, lev1_task_contrast, batch_stub)
+    remove_subject_stack(stack_file)
     #run_it(outdir, model_lev2, lev1_task_contrast)
 
 
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+import os
+import re
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# What the batch files pay before any work is done: starting each CLI up to
+# argument parsing, and importing the library modules
+ENTRY_POINTS = {
+    "analyze_lev1_v4.py --help": [sys.executable, "analyze_lev1_v4.py", "--help"],
+    "render_qa_report.py --help": [sys.executable, "render_qa_report.py", "--help"],
+    "analyze_lev2.py --help": [sys.executable, "analyze_lev2.py", "--help"],
+}
+MODULES = [
+    "analyze_lev1_v4",
+    "utils_lev1.qa",
+    "utils_lev1.qa_report",
+    "utils_lev1.first_level_designs_new_event_files",
+    "utils_lev1.session_glm",
+    "utils_lev1.fixed_effects",
+]
+# modules that should only be loaded when a code path needs them
+HEAVY_MODULES = ["matplotlib", "seaborn", "nilearn", "nibabel", "sklearn", "statsmodels"]
+
+
+def time_command(command, repeats):
+    """
+    Median wall time (seconds) of running command in a fresh interpreter
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=REPO_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def import_profile(module):
+    """
+    Import time (seconds) of each package that module pulls in, from
+    python -X importtime (cumulative time wherever another package first
+    imports it)
+    output:
+        dictionary of package: seconds, sorted from slowest
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( +)(\S+)", line)
+        if match is not None:
+            depth = (len(match.group(2)) - 1) // 2
+            entries.append((depth, match.group(3).split(".")[0], int(match.group(1)) / 1e6))
+    # importtime lists children before their parent, reversed the parent
+    # of each entry is the last one seen one level up
+    packages = {}
+    parents = []
+    for depth, package, seconds in reversed(entries):
+        parents[depth:] = [package]
+        if package != module.split(".")[0] and (depth == 0 or parents[depth - 1] != package):
+            packages[package] = packages.get(package, 0) + seconds
+    return dict(sorted(packages.items(), key=lambda item: -item[1]))
+
+
+def get_parser():
+    """Build parser object"""
+    parser = ArgumentParser(
+        prog="benchmark_startup",
+        description=(
+            "benchmark_startup: Times the start up of the command line entry\n"
+            "points and the import of the utils_lev1 modules"
+        ),
+        formatter_class=RawTextHelpFormatter,
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=5,
+        help=("Number of runs per entry point (the median is reported)"),
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help=("Append the timings to this tsv file to track them over time"),
+    )
+    parser.add_argument(
+        "--max_seconds",
+        type=float,
+        default=None,
+        help=("Exit with an error if any entry point takes longer than this"),
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    opts = get_parser().parse_args(sys.argv[1:])
+    rows = []
+    for name, command in ENTRY_POINTS.items():
+        if not os.path.exists(os.path.join(REPO_DIR, command[1])):
+            continue
+        rows.append(("entry_point", name, time_command(command, opts.repeats)))
+    for module in MODULES:
+        command = [sys.executable, "-c", f"import {module}"]
+        rows.append(("import", module, time_command(command, opts.repeats)))
+
+    for kind, name, seconds in rows:
+        print(f"{seconds:7.3f} s  {kind:12s} {name}")
+
+    print("\nSlowest packages imported by the library modules (python -X importtime):")
+    for module in MODULES:
+        profile = import_profile(module)
+        heavy = [package for package in profile if package in HEAVY_MODULES]
+        slowest = ", ".join(f"{package} {seconds:.2f} s" for package, seconds in list(profile.items())[:3])
+        print(f"  {module}: {slowest}")
+        if heavy:
+            print(f"    heavy modules loaded at import: {', '.join(heavy)}")
+
+    if opts.output is not None:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, stdout=subprocess.PIPE, universal_newlines=True
+        ).stdout.strip()
+        write_header = not os.path.exists(opts.output)
+        with open(opts.output, "a") as f:
+            if write_header:
+                f.write("date\tcommit\tkind\tname\tseconds\n")
+            for kind, name, seconds in rows:
+                f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')}\t{commit}\t{kind}\t{name}\t{seconds:.4f}\n")
+
+    slow = [name for kind, name, seconds in rows if opts.max_seconds is not None and seconds > opts.max_seconds]
+    if slow:
+        print(f"Slower than {opts.max_seconds} s: {', '.join(slow)}")
+        sys.exit(1)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+import sys
+from argparse import ArgumentParser, RawTextHelpFormatter
+from utils_lev1.qa_report import render_qa_report
+
+
+def get_parser():
+    """Build parser object"""
+    parser = ArgumentParser(
+        prog="render_qa_report",
+        description=(
+            "render_qa_report: Renders the level 1 QA html report from the QA\n"
+            "artifacts analyze_lev1_v4.py saves in <contrast_dir>/qa"
+        ),
+        formatter_class=RawTextHelpFormatter,
+    )
+    parser.add_argument(
+        "contrast_dirs",
+        nargs="+",
+        help=(
+            "Level 1 contrast directories, e.g.\n"
+            "<bids>/derivatives/lev_1_output/cuedTS_lev1_model_deriv/task_cuedTS_rtmodel_rt_centered"
+        ),
+    )
+    parser.add_argument(
+        "--n_jobs",
+        type=int,
+        default=4,
+        help=("Number of processes rendering subjects in parallel"),
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help=("Rerender every subject, not only those with new QA artifacts"),
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    opts = get_parser().parse_args(sys.argv[1:])
+    for contrast_dir in opts.contrast_dirs:
+        index_file = render_qa_report(contrast_dir, n_jobs=opts.n_jobs, force=opts.force)
+        print(f"QA report written to {index_file}")
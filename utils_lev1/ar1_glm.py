@@ -0,0 +1,200 @@
+import numpy as np
+
+
+def mean_scale_chunk(Y):
+    """
+    nilearn's mean_scaling (percent signal change) for a block of voxels.
+    The scaling is per voxel, so it can be applied chunk by chunk.
+    """
+    mean = np.maximum(Y.mean(axis=0), 1)
+    return 100 * (Y / mean - 1)
+
+
+def whiten(X, rho):
+    """
+    AR(1) whitening along the time axis (same as nilearn's ARModel.whiten)
+    """
+    X = np.asarray(X, np.float64)
+    whitened_X = X.copy()
+    whitened_X[1:] = whitened_X[1:] - rho * X[:-1]
+    return whitened_X
+
+
+def _chunks(n_voxels, chunk_size):
+    for start in range(0, n_voxels, chunk_size):
+        yield start, min(start + chunk_size, n_voxels)
+
+
+def _load_chunk(Y, start, stop, mean_scale):
+    # scale in the stored precision (as nilearn does) before the float64 fit
+    Y_chunk = np.asarray(Y[:, start:stop])
+    if mean_scale:
+        Y_chunk = mean_scale_chunk(Y_chunk)
+    return Y_chunk.astype(np.float64)
+
+
+def estimate_ar1_coefficients(Y, X, chunk_size=20000, bins=100, mean_scale=True):
+    """
+    First pass of the AR(1) GLM: OLS fit and Yule-Walker AR(1) estimate for
+    every voxel, quantized into bins as in nilearn's run_glm.
+    Only the per-voxel sums needed for the lag-0/lag-1 autocovariances are
+    kept, so memory does not grow with the number of time points.
+    input:
+        Y: time x voxel data (array or memmap), not yet mean scaled
+        X: time x regressor design array
+        chunk_size: number of voxels processed at once
+        bins: number of bins for the AR coefficient
+        mean_scale: apply nilearn's mean scaling to each chunk
+    output:
+        rho: binned AR(1) coefficient per voxel
+    """
+    from scipy.linalg import pinv
+
+    n_scans, n_voxels = Y.shape
+    calc_beta = pinv(X)
+    sum_sq = np.zeros(n_voxels)
+    sum_lag1 = np.zeros(n_voxels)
+    sum_all = np.zeros(n_voxels)
+    sum_head = np.zeros(n_voxels)
+    sum_tail = np.zeros(n_voxels)
+    for start, stop in _chunks(n_voxels, chunk_size):
+        Y_chunk = _load_chunk(Y, start, stop, mean_scale)
+        resid = Y_chunk - X @ (calc_beta @ Y_chunk)
+        sum_sq[start:stop] = np.sum(resid ** 2, 0)
+        sum_lag1[start:stop] = np.sum(resid[:-1] * resid[1:], 0)
+        sum_all[start:stop] = resid.sum(0)
+        sum_head[start:stop] = resid[:-1].sum(0)
+        sum_tail[start:stop] = resid[1:].sum(0)
+
+    # nilearn's Yule-Walker removes the grand mean of all residuals before
+    # computing autocovariances; expand the sums around that mean
+    grand_mean = sum_all.sum() / (n_scans * n_voxels)
+    r0 = sum_sq - 2 * grand_mean * sum_all + n_scans * grand_mean ** 2
+    r1 = sum_lag1 - grand_mean * (sum_head + sum_tail) + (n_scans - 1) * grand_mean ** 2
+    r0 = r0 / (n_scans * n_scans)
+    r1 = r1 / ((n_scans - 1) * n_scans)
+    rho = r1 / r0
+    return (rho * bins).astype(int) * 1.0 / bins
+
+
+def fit_ar1_contrasts(
+    Y, design_matrix, contrasts, chunk_size=20000, bins=100, mean_scale=True, residuals_out=None
+):
+    """
+    Mass univariate AR(1) prewhitened GLM, processed in blocks of voxels so
+    peak memory is set by chunk_size rather than the size of the run.
+    Numerically equivalent to run_glm(noise_model="ar1") followed by
+    compute_contrasts_batched (see compare_with_nilearn).
+    input:
+        Y: time x voxel data (array or memmap, e.g. from utils_lev1.bold_cache)
+        design_matrix: pandas data frame, one row per time point
+        contrasts: dictionary of contrast name: contrast expression
+        chunk_size: number of voxels processed at once
+        bins: number of bins for the AR coefficient
+        mean_scale: apply nilearn's mean scaling (set False if Y is already scaled)
+        residuals_out (optional): writable time x voxel array (e.g. a float32
+            memmap from open_residuals_memmap) that receives the residuals of
+            the same fit, one chunk at a time
+    output:
+        dictionary of contrast name: {"effect_size", "effect_variance",
+            "z_score"}, each an in-mask array (n_voxels,)
+    """
+    from scipy.linalg import pinv
+    from nilearn.glm.contrasts import Contrast, expression_to_contrast_vector
+
+    X = np.asarray(design_matrix.values, np.float64)
+    n_scans, n_voxels = Y.shape
+    if X.shape[0] != n_scans:
+        raise ValueError(
+            f"Design matrix has {X.shape[0]} rows but the data have {n_scans} time points"
+        )
+    contrast_names = list(contrasts.keys())
+    contrast_matrix = np.array([
+        expression_to_contrast_vector(contrasts[con_name], design_matrix.columns.tolist())
+        for con_name in contrast_names
+    ])
+
+    rho = estimate_ar1_coefficients(Y, X, chunk_size=chunk_size, bins=bins, mean_scale=mean_scale)
+
+    # The whitened design only depends on the binned AR coefficient
+    rank_tol = np.abs(X).sum() * np.finfo(np.float64).eps
+    dof = n_scans - np.linalg.matrix_rank(X, rank_tol)
+    models = {}
+    for rho_value in np.unique(rho):
+        whitened_design = whiten(X, rho_value)
+        calc_beta = pinv(whitened_design)
+        contrast_cov = np.einsum(
+            "ij,jk,ik->i", contrast_matrix, calc_beta @ calc_beta.T, contrast_matrix
+        )
+        models[rho_value] = (whitened_design, calc_beta, contrast_cov)
+
+    n_contrasts = len(contrast_names)
+    effect = np.zeros((n_contrasts, n_voxels))
+    variance = np.zeros((n_contrasts, n_voxels))
+    for start, stop in _chunks(n_voxels, chunk_size):
+        Y_chunk = _load_chunk(Y, start, stop, mean_scale)
+        rho_chunk = rho[start:stop]
+        for rho_value in np.unique(rho_chunk):
+            whitened_design, calc_beta, contrast_cov = models[rho_value]
+            columns = np.flatnonzero(rho_chunk == rho_value)
+            whitened_Y = whiten(Y_chunk[:, columns], rho_value)
+            theta = calc_beta @ whitened_Y
+            whitened_resid = whitened_Y - whitened_design @ theta
+            dispersion = np.sum(whitened_resid ** 2, 0) / (X.shape[0] - X.shape[1])
+            effect[:, start + columns] = contrast_matrix @ theta
+            if residuals_out is not None:
+                # same definition as nilearn's RegressionResults.residuals
+                residuals_out[:, start + columns] = Y_chunk[:, columns] - whitened_design @ theta
+            variance[:, start + columns] = contrast_cov[:, None] * dispersion[None, :]
+
+    z_scores = Contrast(
+        effect=effect.ravel(), variance=variance.ravel(), dim=1, dof=dof, stat_type="t"
+    ).z_score().reshape(n_contrasts, n_voxels)
+
+    return {
+        con_name: {
+            "effect_size": effect[idx],
+            "effect_variance": variance[idx],
+            "z_score": z_scores[idx],
+        }
+        for idx, con_name in enumerate(contrast_names)
+    }
+
+
+def open_residuals_memmap(n_scans, n_voxels, directory=None):
+    """
+    Float32 time x voxel memmap for fit_ar1_contrasts(residuals_out=...),
+    backed by an unlinked temporary file so it is cleaned up on exit
+    input:
+        directory (optional): where to put the backing file (default $TMPDIR)
+    """
+    import tempfile
+
+    with tempfile.TemporaryFile(dir=directory) as backing_file:
+        return np.memmap(backing_file, dtype=np.float32, mode="w+", shape=(n_scans, n_voxels))
+
+
+def compare_with_nilearn(Y, design_matrix, contrasts, chunk_size=20000):
+    """
+    Fits the same data with nilearn's run_glm and with fit_ar1_contrasts
+    and returns the largest absolute difference per output type.  Used to
+    check the chunked engine on real runs.
+    input:
+        Y: time x voxel data, not yet mean scaled
+    output:
+        dictionary of output type: max absolute difference over contrasts
+    """
+    from nilearn.glm.first_level.first_level import mean_scaling
+    from utils_lev1.session_glm import fit_design, compute_contrasts_batched
+
+    Y_scaled, _ = mean_scaling(np.asarray(Y), 0)
+    labels, results = fit_design(Y_scaled, design_matrix, noise_model="ar1")
+    reference = compute_contrasts_batched(labels, results, design_matrix, contrasts)
+    chunked = fit_ar1_contrasts(Y, design_matrix, contrasts, chunk_size=chunk_size)
+    max_diff = {}
+    for output_type in ["effect_size", "effect_variance", "z_score"]:
+        max_diff[output_type] = max(
+            np.max(np.abs(reference[con][output_type] - chunked[con][output_type]))
+            for con in contrasts
+        )
+    return max_diff
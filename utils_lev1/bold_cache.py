@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Bump if the cached matrix changes meaning (e.g. different masker settings)
+CACHE_VERSION = 1
+
+
+def file_checksum(path, memo_dir=None, block_size=2**20):
+    """
+    sha1 of a file's contents.  With memo_dir the checksum is memoized on
+    (path, size, mtime) in a small file per input, so unchanged inputs are
+    only read once and concurrent jobs never rewrite each other's memos.
+    input:
+        path: file to hash
+        memo_dir: optional directory of checksum memos
+    output:
+        hex digest string
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    memo_key = f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+    if memo_dir is not None:
+        memo_file = f"{memo_dir}/{hashlib.sha1(path.encode()).hexdigest()}.json"
+        try:
+            with open(memo_file) as f:
+                memo = json.load(f)
+            if memo["key"] == memo_key:
+                return memo["checksum"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            sha.update(block)
+    checksum = sha.hexdigest()
+
+    if memo_dir is not None:
+        # one memo per input path, replaced when the input changes
+        os.makedirs(memo_dir, exist_ok=True)
+        _atomic_write_json({"key": memo_key, "checksum": checksum}, memo_file)
+    return checksum
+
+
+def cache_key(data_file, mask_file, smoothing_fwhm, cache_dir=None):
+    """
+    Key for a masked, smoothed BOLD matrix.  Covers the input paths,
+    smoothing kernel and contents of both files.
+    """
+    memo_dir = None if cache_dir is None else f"{cache_dir}/checksums"
+    key_parts = {
+        "version": CACHE_VERSION,
+        "data_file": os.path.abspath(data_file),
+        "mask_file": os.path.abspath(mask_file),
+        "smoothing_fwhm": smoothing_fwhm,
+        "data_checksum": file_checksum(data_file, memo_dir),
+        "mask_checksum": file_checksum(mask_file, memo_dir),
+    }
+    key = hashlib.sha1(json.dumps(key_parts, sort_keys=True).encode()).hexdigest()
+    return key, key_parts
+
+
+def load_masked_bold(data_file, mask_file, smoothing_fwhm, cache_dir, max_cache_gb=50):
+    """
+    Returns the in-mask, smoothed time x voxel matrix for a run, reading it
+    from cache_dir as a memory map when available and otherwise computing
+    and storing it (float32).
+    input:
+        data_file: path to 4D BOLD data
+        mask_file: path to mask
+        smoothing_fwhm: smoothing kernel in mm
+        cache_dir: directory holding cached matrices
+        max_cache_gb: size cap for cache_dir, least recently used entries
+            are removed when it is exceeded
+    output:
+        data: time x voxel float32 read-only memmap
+        masker: fitted NiftiMasker for inverse transforms
+    """
+    from nilearn.maskers import NiftiMasker
+
+    os.makedirs(cache_dir, exist_ok=True)
+    masker = NiftiMasker(
+        mask_img=mask_file,
+        smoothing_fwhm=smoothing_fwhm,
+        standardize=False,
+    ).fit()
+    voxels = np.flatnonzero(masker.mask_img_.get_fdata())
+
+    key, key_parts = cache_key(data_file, mask_file, smoothing_fwhm, cache_dir)
+    data_path = Path(f"{cache_dir}/{key}.npy")
+    voxel_path = Path(f"{cache_dir}/{key}_voxels.npy")
+    meta_path = Path(f"{cache_dir}/{key}.json")
+
+    if data_path.exists() and voxel_path.exists() and meta_path.exists():
+        if np.array_equal(np.load(voxel_path), voxels):
+            print(f"Using cached masked data {data_path}")
+            # the metadata mtime is used as the last access time for LRU
+            os.utime(meta_path)
+            return np.load(data_path, mmap_mode="r"), masker
+        print(f"Voxel index mismatch for {data_path}, recomputing")
+
+    tmp_suffix = f".{os.getpid()}.tmp"
+    stream_masked_bold(masker, data_file, f"{data_path}{tmp_suffix}", dtype=np.float32)
+    with open(f"{voxel_path}{tmp_suffix}", "wb") as f:
+        np.save(f, voxels)
+    os.replace(f"{data_path}{tmp_suffix}", data_path)
+    os.replace(f"{voxel_path}{tmp_suffix}", voxel_path)
+    data = np.load(data_path, mmap_mode="r")
+    key_parts["shape"] = list(data.shape)
+    key_parts["n_bytes"] = data_path.stat().st_size + voxel_path.stat().st_size
+    _atomic_write_json(key_parts, meta_path)
+    print(f"Cached masked data to {data_path}")
+
+    evict_lru(cache_dir, max_cache_gb * 1e9, keep=key)
+    return data, masker
+
+
+def stream_masked_bold(masker, data_file, out_file, block_size=50, dtype=None):
+    """
+    Masks and smooths a run block_size volumes at a time into a .npy file,
+    so the 4D data are never all in memory.  Smoothing is spatial only, so
+    this gives the same values as masker.transform(data_file).
+    input:
+        masker: fitted NiftiMasker
+        data_file: path to 4D BOLD data
+        out_file: .npy file to write
+        block_size: number of volumes masked at once
+        dtype: stored dtype, the masker's output dtype if None
+    output:
+        out_file
+    """
+    import nibabel as nib
+
+    # keep the (gzip) file open so each block continues where the last stopped
+    img = nib.load(data_file, keep_file_open=True)
+    n_scans = img.shape[3]
+    data = None
+    for start in range(0, n_scans, block_size):
+        block = masker.transform(img.slicer[..., start:start + block_size])
+        if data is None:
+            data = np.lib.format.open_memmap(
+                out_file, mode="w+", dtype=dtype or block.dtype, shape=(n_scans, block.shape[1])
+            )
+        data[start:start + block.shape[0]] = block
+    data.flush()
+    del data
+    return out_file
+
+
+def evict_lru(cache_dir, max_bytes, keep=None, data_suffixes=(".npy", "_voxels.npy")):
+    """
+    Removes least recently used entries until cache_dir is under max_bytes.
+    An entry is {key}.json (its mtime is the last access time) plus the
+    {key}{suffix} data files.
+    input:
+        cache_dir: cache directory
+        max_bytes: size cap in bytes
+        keep: key that should never be removed (e.g. the one just written)
+        data_suffixes: data files of an entry
+    """
+    entries = []
+    for meta_path in Path(cache_dir).glob("*.json"):
+        key = meta_path.stem
+        files = [meta_path] + [Path(f"{cache_dir}/{key}{suffix}") for suffix in data_suffixes]
+        try:
+            n_bytes = sum(f.stat().st_size for f in files if f.exists())
+            last_used = meta_path.stat().st_mtime
+        except FileNotFoundError:
+            # removed by a concurrent job
+            continue
+        entries.append((last_used, key, files, n_bytes))
+
+    total_bytes = sum(entry[3] for entry in entries)
+    for last_used, key, files, n_bytes in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        if key == keep:
+            continue
+        print(f"Evicting {cache_dir}/{key} (last used {time.ctime(last_used)})")
+        for f in files:
+            try:
+                f.unlink()
+            except FileNotFoundError:
+                pass
+        total_bytes -= n_bytes
+
+
+def _atomic_write_json(obj, path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(obj, f, indent=4)
+    os.replace(tmp_path, path)
@@ -0,0 +1,129 @@
+"""
+Level 1 design matrices: fmriprep confound regressors and the task design
+and contrasts of one run.  Kept out of the driver so that the design cache
+and the provenance records only depend on the code that builds designs.
+"""
+import pandas as pd
+
+
+def get_confounds_tedana(confounds_file, task):
+    """
+    Creates nuisance regressors from fmriprep confounds timeseries.
+    input:
+      confounds_file: path to confounds file from fmriprep
+    output:
+      confound_regressors: includes aCompCor, FD, 6 motion regressors + derivatives,
+                            cosine basis set (req with compcor use)
+    """
+    confounds_df = pd.read_csv(confounds_file, sep="\t", na_values=["n/a"]).fillna(0)
+    
+    """
+    Use the code below only for the discovery sample, not the validation sample. 
+
+    The code below is used to address an issue with the nback blocked design in the discovery sample. 
+
+    # if task == 'nBack':
+    #     confounds = confounds_df.filter(regex='cosine0[0-4]'
+    #                                 '|trans_x$|trans_x_derivative1$|trans_x_power2$|trans_x_derivative1_power2$'
+    #                                 '|trans_y$|trans_y_derivative1$|trans_y_power2$|trans_y_derivative1_power2$'
+    #                                 '|trans_z$|trans_z_derivative1$|trans_z_power2$|trans_z_derivative1_power2$'
+    #                                 '|rot_x$|rot_x_derivative1$|rot_x_power2$|rot_x_derivative1_power2$'
+    #                                 '|rot_y$|rot_y_derivative1$|rot_y_power2$|rot_y_derivative1_power2$'
+    #                                 '|rot_z$|rot_z_derivative1$|rot_z_power2$|rot_z_derivative1_power2$')
+    # else:
+    # confounds = confounds_df.filter(
+    #     regex='cosine'
+    #     '|trans_x$|trans_x_derivative1$|trans_x_power2$|trans_x_derivative1_power2$'
+    #     '|trans_y$|trans_y_derivative1$|trans_y_power2$|trans_y_derivative1_power2$'
+    #     '|trans_z$|trans_z_derivative1$|trans_z_power2$|trans_z_derivative1_power2$'
+    #     '|rot_x$|rot_x_derivative1$|rot_x_power2$|rot_x_derivative1_power2$'
+    #     '|rot_y$|rot_y_derivative1$|rot_y_power2$|rot_y_derivative1_power2$'
+    #     '|rot_z$|rot_z_derivative1$|rot_z_power2$|rot_z_derivative1_power2$'
+    # )
+
+    """
+
+    confounds = confounds_df.filter(
+        regex='cosine|trans_x$|trans_x_derivative1$|trans_x_power2$|trans_x_derivative1_power2$'
+        '|trans_y$|trans_y_derivative1$|trans_y_power2$|trans_y_derivative1_power2$'
+        '|trans_z$|trans_z_derivative1$|trans_z_power2$|trans_z_derivative1_power2$'
+        '|rot_x$|rot_x_derivative1$|rot_x_power2$|rot_x_derivative1_power2$'
+        '|rot_y$|rot_y_derivative1$|rot_y_power2$|rot_y_derivative1_power2$'
+        '|rot_z$|rot_z_derivative1$|rot_z_power2$|rot_z_derivative1_power2$'
+    )
+    confounds = confounds.reset_index(drop=True)
+
+    return confounds
+
+
+def make_desmat_contrasts(
+    root,
+    task,
+    events_file,
+    duration_choice,
+    add_deriv,
+    n_scans,
+    mean_rt,
+    confounds_file=None,
+    regress_rt="no_rt",
+    model_break=False,
+    cache_dir=None,
+    max_cache_gb=1,
+):
+    """
+    Creates design matrices and contrasts for each task.  Should work for any
+    style of design matrix as well as the regressors are defined within
+    the imported make_task_desmat_fcn_map (dictionary of functions).
+    A single RT regressor can be added using regress_rt='rt_uncentered'
+    Input:
+        root:  Root directory (for BIDS data)
+        task: Task name
+        events_file: File path to events.tsv for the given task
+        duration_choice: used for duration in regressors
+        add_deriv: 'deriv_yes' or 'deriv_no', recommended to use 'deriv_yes'
+        n_scans: Number of scans
+        confound_file (optional): File path to fmriprep confounds file
+        regress_rt: 'no_rt' or 'rt_uncentered' or 'rt_centered'
+        cache_dir (optional): design cache (utils_lev1.design_cache).  Designs
+            are reused when the events, confounds and options are unchanged.
+        max_cache_gb: size cap for cache_dir
+    Output:
+        design_matrix, contrasts: Full design matrix (with a constant column)
+            and contrasts for nilearn model
+        percent junk: percentage of trials labeled as "junk".  Used in later QA.
+        percent high motion: percentage of time points that are high motion.  Used later in QA.
+    """
+    from utils_lev1.first_level_designs_new_event_files import make_task_desmat_fcn_dict
+    from utils_lev1.design_cache import design_cache_key, cached_design
+
+    tr = 1.49
+    print('model_break: ', model_break)
+
+    def build_design():
+        if confounds_file is not None:
+            confound_regressors = get_confounds_tedana(confounds_file, task)
+        else:
+            confound_regressors = None
+        return make_task_desmat_fcn_dict[task](
+            events_file,
+            duration_choice,
+            add_deriv,
+            regress_rt,
+            mean_rt,
+            n_scans,
+            tr,
+            confound_regressors,
+            model_break
+        )
+
+    if cache_dir is None:
+        design = build_design()
+    else:
+        key, key_parts = design_cache_key(
+            task, events_file, confounds_file, n_scans, tr, mean_rt,
+            add_deriv, regress_rt, model_break, duration_choice,
+        )
+        design = cached_design(cache_dir, key, key_parts, build_design, max_cache_gb)
+    design_matrix, contrasts, percent_junk, simplified_events_df = design
+    design_matrix['constant'] = 1
+    return design_matrix, contrasts, tr, percent_junk, simplified_events_df
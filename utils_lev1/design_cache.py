@@ -0,0 +1,168 @@
+import functools
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Bump if the stored layout changes
+DESIGN_CACHE_VERSION = 1
+
+# Code that determines a design matrix (confounds, task specs, convolution).
+# A change to any of these files gives new cache keys.
+DESIGN_CODE_FILES = [
+    "utils_lev1/design.py",
+    "utils_lev1/first_level_designs_new_event_files.py",
+    "utils_lev1/task_specs.py",
+    "utils_lev1/trial_predicates.py",
+    "utils_lev1/hrf_engine.py",
+]
+
+
+@functools.lru_cache(maxsize=None)
+def design_code_checksum():
+    from utils_lev1.provenance import code_checksum
+
+    return code_checksum(DESIGN_CODE_FILES)
+
+
+def small_file_checksum(path):
+    """
+    sha1 of a small file (events/confounds tsv), read directly: that is
+    cheaper than keeping a memo of it
+    """
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def design_cache_key(
+    task,
+    events_file,
+    confounds_file,
+    n_scans,
+    tr,
+    mean_rt,
+    add_deriv,
+    regress_rt,
+    model_break,
+    duration_choice,
+):
+    """
+    Key for a design matrix, its contrasts, percent junk and simplified
+    events.  Covers the contents of the events and confounds files, every
+    design option and the design code.
+    output:
+        key: hex digest used for the file names
+        key_parts: dictionary the key was made from
+    """
+    if regress_rt != "rt_centered":
+        # mean_rt only enters rt_centered designs
+        mean_rt = None
+    key_parts = {
+        "version": DESIGN_CACHE_VERSION,
+        "task": task,
+        "events": small_file_checksum(events_file),
+        "confounds": None if confounds_file is None else small_file_checksum(confounds_file),
+        "n_scans": int(n_scans),
+        "tr": float(tr),
+        "mean_rt": None if mean_rt is None else float(mean_rt),
+        "add_deriv": add_deriv,
+        "regress_rt": regress_rt,
+        "model_break": bool(model_break),
+        "duration_choice": duration_choice,
+        "code": design_code_checksum(),
+    }
+    key = hashlib.sha1(json.dumps(key_parts, sort_keys=True).encode()).hexdigest()
+    return key, key_parts
+
+
+def _frame_arrays(df, prefix):
+    # one array per column (by position, names can repeat) to keep dtypes
+    return {f"{prefix}_{idx}": df.iloc[:, idx].to_numpy() for idx in range(df.shape[1])}
+
+
+def _frame_from_arrays(arrays, prefix, columns):
+    df = pd.DataFrame({idx: arrays[f"{prefix}_{idx}"] for idx in range(len(columns))})
+    df.columns = columns
+    return df
+
+
+def save_design(
+    cache_dir, key, key_parts, design_matrix, contrasts, percent_junk, simplified_events_df
+):
+    """
+    Stores a design as {key}.npz (design matrix and simplified events
+    columns) plus {key}.json (column names, contrasts, percent junk)
+    """
+    arrays = {
+        **_frame_arrays(design_matrix, "design"),
+        **_frame_arrays(simplified_events_df, "events"),
+    }
+    if any(values.dtype == object for values in arrays.values()):
+        print(f"Design {key} has non-numeric columns, not cached")
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    metadata = {
+        "key_parts": key_parts,
+        "design_columns": list(design_matrix.columns),
+        "events_columns": list(simplified_events_df.columns),
+        "contrasts": contrasts,
+        "percent_junk": float(percent_junk),
+    }
+    tmp_suffix = f".{os.getpid()}.tmp"
+    with open(f"{cache_dir}/{key}.npz{tmp_suffix}", "wb") as f:
+        np.savez(f, **arrays)
+    with open(f"{cache_dir}/{key}.json{tmp_suffix}", "w") as f:
+        json.dump(metadata, f, indent=4)
+    # metadata last, so a json file always has its arrays
+    os.replace(f"{cache_dir}/{key}.npz{tmp_suffix}", f"{cache_dir}/{key}.npz")
+    os.replace(f"{cache_dir}/{key}.json{tmp_suffix}", f"{cache_dir}/{key}.json")
+
+
+def load_design(cache_dir, key):
+    """
+    Reads a design stored by save_design
+    output:
+        (design_matrix, contrasts, percent_junk, simplified_events_df), or
+        None if the key is not cached
+    """
+    meta_path = f"{cache_dir}/{key}.json"
+    data_path = f"{cache_dir}/{key}.npz"
+    if not (os.path.exists(meta_path) and os.path.exists(data_path)):
+        return None
+    try:
+        with open(meta_path) as f:
+            metadata = json.load(f)
+        with np.load(data_path, allow_pickle=False) as arrays:
+            design_matrix = _frame_from_arrays(arrays, "design", metadata["design_columns"])
+            simplified_events_df = _frame_from_arrays(arrays, "events", metadata["events_columns"])
+    except (ValueError, KeyError, OSError) as e:
+        print(f"Could not read cached design {key} ({e}), rebuilding")
+        return None
+    return design_matrix, metadata["contrasts"], metadata["percent_junk"], simplified_events_df
+
+
+def cached_design(cache_dir, key, key_parts, build_design, max_cache_gb=1):
+    """
+    load_design, falling back to build_design() and storing its output
+    input:
+        cache_dir: design cache directory
+        key, key_parts: output of design_cache_key
+        build_design: function returning (design_matrix, contrasts,
+            percent_junk, simplified_events_df)
+        max_cache_gb: size cap for cache_dir, least recently used designs
+            are removed when it is exceeded
+    """
+    from utils_lev1.bold_cache import evict_lru
+
+    design = load_design(cache_dir, key)
+    if design is not None:
+        print(f"Using cached design {cache_dir}/{key}.npz")
+        # the metadata mtime is used as the last access time for LRU
+        os.utime(f"{cache_dir}/{key}.json")
+        return design
+    design = build_design()
+    save_design(cache_dir, key, key_parts, *design)
+    evict_lru(cache_dir, max_cache_gb * 1e9, keep=key, data_suffixes=(".npz",))
+    return design
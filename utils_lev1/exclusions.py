@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+QA exclusion records of a contrast directory.
+
+Every level 1 job used to read, extend and rewrite
+<contrast_dir>/excluded_subject.csv, so parallel jobs of a task raced and
+lost rows.  Each excluded session is now one small json record in
+<contrast_dir>/exclusions, written atomically (a rerun replaces that
+session's record), so jobs never touch each other's files.  A rerun that
+now passes QA replaces the record with a "cleared" record, which also hides
+the session's row of a compacted excluded_subject.csv.  read_exclusions
+gives the consolidated table (including rows of an older
+excluded_subject.csv) and compact_exclusions writes it back to
+excluded_subject.csv; nothing else rewrites that file.  Compact a contrast directory with:
+    python -m utils_lev1.exclusions <contrast_dir>
+"""
+import glob
+import json
+import os
+import sys
+
+import pandas as pd
+
+
+def get_exclusion_dir(contrast_dir):
+    return f"{contrast_dir}/exclusions"
+
+
+def record_exclusion(current_exclusion, subid, task, ses, contrast_dir):
+    """
+    Stores the QA failures of one session
+    input:
+      current_exclusion: one row data frame from qa_design_matrix
+      subid, task, ses: session
+      contrast_dir: output contrast directory
+    output:
+      path of the record
+    """
+    record = json.loads(current_exclusion.to_json(orient="records"))[0]
+    return _write_record(record, subid, task, ses, contrast_dir)
+
+
+def clear_exclusion(subid, task, ses, contrast_dir):
+    """
+    Marks a session that now passes QA as cleared, replacing its record.
+    Only needed (and only written) if the session may have been excluded
+    before: it has a record or there is a compacted excluded_subject.csv
+    output:
+      path of the record, None if nothing was written
+    """
+    record_file = f"{get_exclusion_dir(contrast_dir)}/{subid}_{task}_{ses}.json"
+    if not (os.path.exists(record_file) or os.path.exists(f"{contrast_dir}/excluded_subject.csv")):
+        return None
+    return _write_record({"cleared": True}, subid, task, ses, contrast_dir)
+
+
+def _write_record(record, subid, task, ses, contrast_dir):
+    exclusion_dir = get_exclusion_dir(contrast_dir)
+    os.makedirs(exclusion_dir, exist_ok=True)
+    record["subid_task"] = f"{subid}_{task}_{ses}"
+    record_file = f"{exclusion_dir}/{subid}_{task}_{ses}.json"
+    tmp_file = f"{record_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(record, f)
+    os.replace(tmp_file, record_file)
+    return record_file
+
+
+def read_exclusions(contrast_dir):
+    """
+    Consolidated exclusion table of a contrast directory, one row per
+    session (the records take precedence over rows of excluded_subject.csv,
+    cleared sessions are left out)
+    """
+    records = []
+    cleared = []
+    for record_file in sorted(glob.glob(f"{get_exclusion_dir(contrast_dir)}/*.json")):
+        with open(record_file) as f:
+            record = json.load(f)
+        if record.get("cleared"):
+            cleared.append(record["subid_task"])
+        else:
+            records.append(record)
+    exclusions = pd.DataFrame(records)
+    csv_file = f"{contrast_dir}/excluded_subject.csv"
+    if os.path.exists(csv_file):
+        old_exclusions = pd.read_csv(csv_file)
+        replaced = cleared + (list(exclusions["subid_task"]) if len(exclusions) else [])
+        old_exclusions = old_exclusions[~old_exclusions["subid_task"].isin(replaced)]
+        exclusions = pd.concat([old_exclusions, exclusions], axis=0, sort=False)
+    if len(exclusions):
+        columns = ["subid_task"] + [c for c in exclusions.columns if c != "subid_task"]
+        exclusions = exclusions[columns].fillna(0).reset_index(drop=True)
+    return exclusions
+
+
+def compact_exclusions(contrast_dir):
+    """
+    Writes the consolidated exclusion table to excluded_subject.csv
+    output:
+      the table
+    """
+    exclusions = read_exclusions(contrast_dir)
+    csv_file = f"{contrast_dir}/excluded_subject.csv"
+    tmp_file = f"{csv_file}.{os.getpid()}.tmp"
+    exclusions.to_csv(tmp_file, index=False)
+    os.replace(tmp_file, csv_file)
+    return exclusions
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    for contrast_dir in sys.argv[1:]:
+        exclusions = compact_exclusions(contrast_dir)
+        print(f"{len(exclusions)} excluded sessions in {contrast_dir}/excluded_subject.csv")
@@ -0,0 +1,115 @@
+import numpy as np
+
+# same floor nilearn applies to the variances in compute_fixed_effects
+TINY = 1.0e-16
+
+
+def new_fixed_effects(precision_weighted=False):
+    """
+    Empty running fixed effects for one contrast.  Sessions are added with
+    add_session_to_fixed_effects as they are fit, so the per-session maps do
+    not have to be read back from disk.
+    input:
+        precision_weighted: weight sessions by their inverse variance
+    output:
+        dictionary holding the running sums (filled in by the first session)
+    """
+    return {"precision_weighted": precision_weighted, "n_sessions": 0, "voxels": None}
+
+
+def add_session_to_fixed_effects(fixed_fx, mask_img, voxels, effect, variance):
+    """
+    Adds one session's contrast estimate to the running sums.  Sums are kept
+    for the union of the session masks (as flat voxel indices into the mask
+    grid); voxels outside a session's mask count as effect 0 with the floor
+    variance, as they did when the written maps were averaged.
+    input:
+        fixed_fx: output of new_fixed_effects
+        mask_img: the session's mask image (defines the grid)
+        voxels: flat indices of the session's in-mask voxels
+        effect: in-mask effect size (n_voxels,)
+        variance: in-mask effect variance (n_voxels,)
+    """
+    if fixed_fx["voxels"] is None:
+        fixed_fx["shape"] = mask_img.shape[:3]
+        fixed_fx["affine"] = mask_img.affine
+        fixed_fx["voxels"] = np.array([], dtype=np.int64)
+        fixed_fx["n_present"] = np.zeros(0, dtype=np.int32)
+        sum_keys = ["sum_weights", "sum_weighted_effect"] if fixed_fx["precision_weighted"] \
+            else ["sum_effect", "sum_variance"]
+        for key in sum_keys:
+            fixed_fx[key] = np.zeros(0)
+        fixed_fx["sum_keys"] = sum_keys
+    if fixed_fx["shape"] != mask_img.shape[:3]:
+        raise ValueError(
+            f"Session mask shape {mask_img.shape[:3]} differs from {fixed_fx['shape']}"
+        )
+
+    all_voxels = np.union1d(fixed_fx["voxels"], voxels)
+    if len(all_voxels) != len(fixed_fx["voxels"]):
+        old_position = np.searchsorted(all_voxels, fixed_fx["voxels"])
+        for key in fixed_fx["sum_keys"] + ["n_present"]:
+            grown = np.zeros(len(all_voxels), dtype=fixed_fx[key].dtype)
+            grown[old_position] = fixed_fx[key]
+            fixed_fx[key] = grown
+        fixed_fx["voxels"] = all_voxels
+
+    position = np.searchsorted(fixed_fx["voxels"], voxels)
+    variance = np.maximum(variance, TINY)
+    if fixed_fx["precision_weighted"]:
+        fixed_fx["sum_weights"][position] += 1.0 / variance
+        fixed_fx["sum_weighted_effect"][position] += effect / variance
+    else:
+        fixed_fx["sum_effect"][position] += effect
+        fixed_fx["sum_variance"][position] += variance
+    fixed_fx["n_present"][position] += 1
+    fixed_fx["n_sessions"] += 1
+
+
+def add_session_files_to_fixed_effects(fixed_fx, mask_file, effect_file, variance_file):
+    """
+    add_session_to_fixed_effects for a session that was not refit, reading
+    its effect and variance maps from disk
+    """
+    import nibabel as nib
+
+    mask_img = nib.load(mask_file)
+    voxels = np.flatnonzero(np.asanyarray(mask_img.dataobj))
+    effect = nib.load(effect_file).get_fdata().ravel()[voxels]
+    variance = nib.load(variance_file).get_fdata().ravel()[voxels]
+    add_session_to_fixed_effects(fixed_fx, mask_img, voxels, effect, variance)
+
+
+def compute_fixed_effects_maps(fixed_fx):
+    """
+    Fixed effects contrast, variance and t maps from the running sums,
+    same formulas as nilearn's compute_fixed_effects
+    output:
+        contrast, variance, stat: arrays over fixed_fx["voxels"]
+    """
+    n_sessions = fixed_fx["n_sessions"]
+    n_missing = n_sessions - fixed_fx["n_present"]
+    if fixed_fx["precision_weighted"]:
+        variance = 1.0 / (fixed_fx["sum_weights"] + n_missing / TINY)
+        contrast = fixed_fx["sum_weighted_effect"] * variance
+    else:
+        variance = (fixed_fx["sum_variance"] + n_missing * TINY) / n_sessions / n_sessions
+        contrast = fixed_fx["sum_effect"] / n_sessions
+    stat = contrast / np.sqrt(variance)
+    return contrast, variance, stat
+
+
+def fixed_effects_images(fixed_fx):
+    """
+    compute_fixed_effects_maps put back into images on the session mask grid
+    output:
+        contrast_img, variance_img, stat_img: nibabel images
+    """
+    import nibabel as nib
+
+    images = []
+    for values in compute_fixed_effects_maps(fixed_fx):
+        volume = np.zeros(int(np.prod(fixed_fx["shape"])))
+        volume[fixed_fx["voxels"]] = values
+        images.append(nib.Nifti1Image(volume.reshape(fixed_fx["shape"]), fixed_fx["affine"]))
+    return tuple(images)
@@ -0,0 +1,213 @@
+"""
+Batched HRF convolution for level 1 design matrices.
+
+nilearn's compute_regressor builds the oversampled time grid and HRF kernels
+and runs a direct np.convolve over the whole oversampled run for every
+condition, then keeps only the values at the acquisition times.  Here the
+grid, kernels and resampling indices are built once per
+(tr, n_scans, hrf_model).  Since every condition is a sum of boxcars, its
+convolution is a sum of shifted step responses (cumulative sums of the
+kernels), so all conditions of a run are evaluated in one vectorized pass,
+only at the samples needed for the resampling and only over the kernel
+length around each onset/offset.  The
+regressors match compute_regressor up to floating point rounding.
+"""
+import functools
+
+import numpy as np
+
+HRF_COLUMN_SUFFIXES = {
+    "spm": [""],
+    "spm + derivative": ["", "_derivative"],
+    "spm + derivative + dispersion": ["", "_derivative", "_dispersion"],
+    "glover": [""],
+    "glover + derivative": ["", "_derivative"],
+    "glover + derivative + dispersion": ["", "_derivative", "_dispersion"],
+}
+
+
+def get_frame_times(n_scans, tr):
+    """
+    Acquisition times used for all designs (shifted by tr/2 for the slice
+    timing reference of fMRIPrep outputs)
+    """
+    return np.arange(n_scans) * tr + tr / 2
+
+
+def _kernel_tr(frame_times):
+    try:
+        from nilearn.glm.first_level.hemodynamic_models import _calculate_tr
+    except ImportError:
+        # nilearn < 0.10 uses the average tr over the run
+        return float(frame_times.max()) / (np.size(frame_times) - 1)
+    return _calculate_tr(frame_times)
+
+
+@functools.lru_cache(maxsize=32)
+def get_hrf_basis(tr, n_scans, hrf_model, oversampling=50, min_onset=-24):
+    """
+    Everything compute_regressor derives from the timing alone, cached per
+    (tr, n_scans, hrf_model)
+    output:
+        dictionary with the high resolution frame times, the step response of
+        each kernel and the linear interpolation indices/weights back to the
+        acquisition times
+    """
+    from nilearn.glm.first_level.hemodynamic_models import _hrf_kernel, _sample_condition
+
+    if hrf_model not in HRF_COLUMN_SUFFIXES:
+        raise ValueError(f"Unsupported hrf_model {hrf_model}, use one of {list(HRF_COLUMN_SUFFIXES)}")
+    frame_times = get_frame_times(n_scans, tr)
+    _, hr_frame_times = _sample_condition(
+        (np.array([]), np.array([]), np.array([])), frame_times, oversampling, min_onset
+    )
+    kernels = _hrf_kernel(hrf_model, _kernel_tr(frame_times), oversampling)
+    n_hr = hr_frame_times.size
+    # step_response[k, m + 1] is the response m samples after a unit step
+    # starts (0 before it starts, constant once the kernel has ended)
+    kernel_length = max(len(k) for k in kernels)
+    step_response = np.zeros((len(kernels), kernel_length + 1))
+    for idx, kernel in enumerate(kernels):
+        step_response[idx, 1:len(kernel) + 1] = np.cumsum(kernel)
+        step_response[idx, len(kernel) + 1:] = step_response[idx, len(kernel)]
+
+    # same arithmetic as scipy's interp1d(kind="linear")
+    hi = np.clip(np.searchsorted(hr_frame_times, frame_times), 1, n_hr - 1)
+    lo = hi - 1
+    x_lo = hr_frame_times[lo]
+    step = hr_frame_times[hi] - x_lo
+    offset = frame_times - x_lo
+    samples, sample_index = np.unique(np.concatenate([lo, hi]), return_inverse=True)
+    return {
+        "hr_frame_times": hr_frame_times,
+        "step_response": step_response,
+        "samples": samples,
+        "sample_lo": sample_index[:n_scans],
+        "sample_hi": sample_index[n_scans:],
+        "lo": lo,
+        "hi": hi,
+        "step": step,
+        "offset": offset,
+    }
+
+
+def get_event_samples(onsets, durations, hr_frame_times):
+    """
+    Start and end sample of each event on the high resolution grid, with
+    the same rounding as nilearn's _sample_condition
+    """
+    n_hr = hr_frame_times.size
+    onsets = np.asarray(onsets, dtype=float)
+    durations = np.asarray(durations, dtype=float)
+    t_onset = np.minimum(np.searchsorted(hr_frame_times, onsets), n_hr - 1)
+    t_offset = np.minimum(np.searchsorted(hr_frame_times, onsets + durations), n_hr - 1)
+    # zero durations still get one sample
+    t_offset = np.where((t_offset < n_hr - 1) & (t_offset == t_onset), t_offset + 1, t_offset)
+    return t_onset, t_offset
+
+
+def _orthogonalize(X):
+    from scipy.linalg import pinv
+
+    for i in range(1, X.shape[1]):
+        X[:, i] -= np.dot(np.dot(X[:, i], X[:, :i]), pinv(X[:, :i]))
+    return X
+
+
+def convolve_conditions(conditions, n_scans, tr, hrf_model="spm", oversampling=50, min_onset=-24):
+    """
+    Convolves all conditions of a run with the HRF (and derivatives) at once
+    input:
+        conditions: list of (cond_id, onsets, durations, modulations)
+        n_scans: number of time points
+        tr: repetition time
+        hrf_model: "spm" or "spm + derivative" (or the glover equivalents)
+    output:
+        regressors: n_scans x n_columns float array
+        names: column names (cond_id, cond_id_derivative, ...)
+    """
+    # all events of all conditions in flat arrays
+    onsets, durations, modulations = (
+        np.concatenate([np.zeros(0)] + [np.asarray(condition[column], dtype=float) for condition in conditions])
+        for column in (1, 2, 3)
+    )
+    event_condition = np.concatenate([np.zeros(0, dtype=np.int64)] + [
+        np.full(np.size(condition[1]), idx) for idx, condition in enumerate(conditions)
+    ])
+    regressors = convolve_events(
+        onsets, durations, modulations, event_condition, len(conditions),
+        n_scans, tr, hrf_model, oversampling, min_onset,
+    )
+    suffixes = HRF_COLUMN_SUFFIXES[hrf_model]
+    names = [f"{cond_id}{suffix}" for cond_id, *_ in conditions for suffix in suffixes]
+    return regressors, names
+
+
+def convolve_events(
+    onsets, durations, modulations, event_condition, n_conditions,
+    n_scans, tr, hrf_model="spm", oversampling=50, min_onset=-24,
+):
+    """
+    convolve_conditions on flat event arrays
+    input:
+        onsets, durations, modulations: one value per event
+        event_condition: condition index (0 .. n_conditions-1) of each event
+        n_conditions: number of conditions (conditions without events give
+            columns of zeros)
+    output:
+        n_scans x (n_conditions * n_kernels) float array, columns ordered as
+        in convolve_conditions
+    """
+    basis = get_hrf_basis(tr, n_scans, hrf_model, oversampling, min_onset)
+    n_kernels = len(HRF_COLUMN_SUFFIXES[hrf_model])
+    regressors = np.zeros((n_scans, n_conditions * n_kernels))
+    if n_conditions == 0:
+        return regressors
+    t_onsets, t_offsets = get_event_samples(onsets, durations, basis["hr_frame_times"])
+    values = np.asarray(modulations, dtype=float)
+    event_condition = np.asarray(event_condition, dtype=np.int64)
+
+    # A boxcar starting at sample a contributes value * step_response(t - a)
+    # and one ending at b contributes -value * step_response(t - b).  The
+    # step response only changes during the kernel, so each edge adds a short
+    # window of samples plus a constant step from the end of the kernel on.
+    step_response = basis["step_response"]
+    kernel_length = step_response.shape[1] - 1
+    samples = basis["samples"]
+    n_samples = samples.size
+    edges = np.concatenate([t_onsets, t_offsets])
+    weights = np.concatenate([values, -values])
+    edge_condition = np.concatenate([event_condition, event_condition])
+
+    window_start = np.searchsorted(samples, edges)
+    window_end = np.searchsorted(samples, edges + kernel_length)
+    max_window = (window_end - window_start).max() if edges.size else 0
+    window = window_start[:, None] + np.arange(max(max_window, 1))
+    in_window = window < window_end[:, None]
+    window = np.where(in_window, window, 0)
+    lag = np.where(in_window, samples[window] - edges[:, None], 0)
+    flat_index = (edge_condition[:, None] * n_samples + window)[in_window]
+
+    convolved = np.zeros((n_conditions, step_response.shape[0], n_samples))
+    for k in range(step_response.shape[0]):
+        window_response = (step_response[k, lag + 1] * weights[:, None])[in_window]
+        convolved[:, k, :] = np.bincount(
+            flat_index, window_response, minlength=n_conditions * n_samples
+        ).reshape(n_conditions, n_samples)
+        # constant part once the kernel has ended
+        steps = np.bincount(
+            edge_condition * (n_samples + 1) + window_end,
+            weights * step_response[k, -1],
+            minlength=n_conditions * (n_samples + 1),
+        ).reshape(n_conditions, n_samples + 1)
+        convolved[:, k, :] += np.cumsum(steps, axis=1)[:, :n_samples]
+
+    y_lo = convolved[..., basis["sample_lo"]]
+    y_hi = convolved[..., basis["sample_hi"]]
+    resampled = (y_hi - y_lo) / basis["step"] * basis["offset"] + y_lo
+    for idx in range(n_conditions):
+        columns = resampled[idx].T.copy()
+        if n_kernels > 1:
+            columns = _orthogonalize(columns)
+        regressors[:, idx * n_kernels:(idx + 1) * n_kernels] = columns
+    return regressors
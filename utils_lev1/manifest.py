@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+"""
+SQLite manifest of the files under a BIDS-style directory tree.
+
+The level 1/2 scripts used to run several recursive globs per call, which is
+slow on Oak with hundreds of subjects.  The manifest stores path, parsed
+entities (sub, ses, task, space, desc, suffix, extension), size and mtime
+for every file, plus the mtime of every directory.  It is built with one
+threaded walk and refreshed incrementally: only directories whose mtime
+changed are listed again.  manifest_glob() answers glob patterns from it,
+after bringing it up to date (directory mtimes stat-checked) the first time
+it is queried in a process.  It can also be refreshed by hand with:
+    python -m utils_lev1.manifest <root> <manifest file> [--full]
+
+The manifest is only ever replaced as a whole (written to a temporary file
+and moved into place), so it is opened read only and immutable: sqlite takes
+no locks on it, which are unreliable on network file systems like Oak.
+The drivers only use it when asked to (--manifest / --manifest_dir).
+"""
+import fnmatch
+import glob
+import os
+import re
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+DEFAULT_EXCLUDE = ("sourcedata", ".git")
+ENTITIES = ["sub", "ses", "task", "space", "desc"]
+
+# (root, manifest file) pairs already brought up to date by this process
+_refreshed = set()
+
+
+def parse_entities(name):
+    """
+    BIDS entities, suffix and extension from a file name
+    """
+    entities = {}
+    for entity in ENTITIES:
+        match = re.search(f"(?:^|_){entity}-([^_.]+)", name)
+        entities[entity] = match.group(1) if match else None
+    stem, _, ext = name.partition(".")
+    entities["suffix"] = stem.split("_")[-1] if "_" in stem else None
+    entities["ext"] = f".{ext}" if ext else ""
+    return entities
+
+
+def _scan_dir(path, exclude):
+    """
+    List one directory: (files, subdirectories, directory mtime)
+    files are (path, size, mtime_ns)
+    """
+    files, subdirs = [], []
+    dir_mtime = os.stat(path).st_mtime_ns
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=True):
+                if entry.name not in exclude:
+                    subdirs.append(entry.path)
+            elif entry.is_file(follow_symlinks=True):
+                stat = entry.stat()
+                files.append((entry.path, stat.st_size, stat.st_mtime_ns))
+    return files, subdirs, dir_mtime
+
+
+def _connect_read_only(manifest_file):
+    """
+    Read only connection that takes no file locks
+    """
+    uri = f"file:{quote(os.path.abspath(manifest_file))}?mode=ro&immutable=1"
+    return sqlite3.connect(uri, uri=True)
+
+
+def _create_tables(con):
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, dir TEXT, name TEXT, "
+        "sub TEXT, ses TEXT, task TEXT, space TEXT, desc TEXT, suffix TEXT, ext TEXT, "
+        "size INTEGER, mtime_ns INTEGER)"
+    )
+    con.execute("CREATE INDEX IF NOT EXISTS files_dir ON files (dir)")
+    con.execute("CREATE INDEX IF NOT EXISTS files_sub_task ON files (sub, task)")
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, parent TEXT, mtime_ns INTEGER)"
+    )
+
+
+def refresh_manifest(root, manifest_file, n_workers=16, exclude=DEFAULT_EXCLUDE, full=False):
+    """
+    Builds or refreshes the manifest for root.  Directories whose mtime is
+    unchanged reuse their stored listing (use full=True to relist everything,
+    e.g. after files were rewritten in place).  The new manifest is written to
+    a temporary file and moved into place so readers never see a partial one,
+    and nothing is written when no directory changed.
+    input:
+        root: top of the directory tree
+        manifest_file: sqlite file
+        n_workers: number of threads used to list directories
+        exclude: directory names that are not descended into
+        full: ignore the stored listing
+    output:
+        number of directories that were (re)listed
+    """
+    root = os.path.abspath(root)
+    old_dirs, old_files = {}, {}
+    if os.path.exists(manifest_file) and not full:
+        old_con = _connect_read_only(manifest_file)
+        for path, parent, mtime_ns in old_con.execute("SELECT path, parent, mtime_ns FROM dirs"):
+            old_dirs[path] = mtime_ns
+        for row in old_con.execute("SELECT dir, path, size, mtime_ns FROM files"):
+            old_files.setdefault(row[0], []).append(row[1:])
+        old_con.close()
+    old_children = {}
+    for path in old_dirs:
+        old_children.setdefault(os.path.dirname(path), []).append(path)
+
+    dir_rows, file_rows = [], []
+    n_listed = 0
+    frontier = [root]
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        while frontier:
+            mtimes = list(pool.map(lambda d: os.stat(d).st_mtime_ns, frontier))
+            to_list = [d for d, m in zip(frontier, mtimes) if old_dirs.get(d) != m]
+            listed = dict(zip(to_list, pool.map(lambda d: _scan_dir(d, exclude), to_list)))
+            n_listed += len(to_list)
+            next_frontier = []
+            for directory, mtime_ns in zip(frontier, mtimes):
+                if directory in listed:
+                    files, subdirs, mtime_ns = listed[directory]
+                else:
+                    files = old_files.get(directory, [])
+                    subdirs = old_children.get(directory, [])
+                dir_rows.append((directory, os.path.dirname(directory), mtime_ns))
+                for path, size, file_mtime in files:
+                    name = os.path.basename(path)
+                    entities = parse_entities(name)
+                    file_rows.append(
+                        (path, directory, name)
+                        + tuple(entities[key] for key in ENTITIES + ["suffix", "ext"])
+                        + (size, file_mtime)
+                    )
+                next_frontier.extend(subdirs)
+            frontier = next_frontier
+
+    if old_dirs and n_listed == 0:
+        print(f"Manifest {manifest_file}: {len(file_rows)} files, up to date")
+        return n_listed
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_file)), exist_ok=True)
+    tmp_file = f"{manifest_file}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+    with sqlite3.connect(tmp_file) as con:
+        # private file until it is moved into place: no journal, one lock
+        con.execute("PRAGMA journal_mode = OFF")
+        con.execute("PRAGMA locking_mode = EXCLUSIVE")
+        _create_tables(con)
+        con.executemany("INSERT INTO dirs VALUES (?, ?, ?)", dir_rows)
+        con.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", file_rows)
+    con.close()
+    os.replace(tmp_file, manifest_file)
+    print(f"Manifest {manifest_file}: {len(file_rows)} files in {len(dir_rows)} directories, "
+          f"{n_listed} directories listed")
+    return n_listed
+
+
+def _glob_match(pattern, path):
+    """
+    glob.glob semantics: wildcards do not cross '/' and hidden files
+    are only matched by patterns starting with '.'
+    """
+    pattern_parts = pattern.split("/")
+    path_parts = path.split("/")
+    if len(pattern_parts) != len(path_parts):
+        return False
+    for pattern_part, path_part in zip(pattern_parts, path_parts):
+        if path_part.startswith(".") and not pattern_part.startswith("."):
+            return False
+        if not fnmatch.fnmatchcase(path_part, pattern_part):
+            return False
+    return True
+
+
+def manifest_glob(pattern, root, manifest_file, exclude=DEFAULT_EXCLUDE):
+    """
+    Drop-in replacement for glob.glob(pattern) for patterns below root.
+    Only files are matched, not directories.  The manifest is built, or
+    refreshed, the first time it is queried in a process.
+    input:
+        pattern: glob pattern (absolute, under root)
+        root: root the manifest was built for
+        manifest_file: sqlite file
+        exclude: directory names skipped when the manifest is refreshed
+    output:
+        list of matching paths (unsorted, like glob.glob)
+    """
+    root = os.path.abspath(root)
+    pattern = os.path.abspath(pattern)
+    if (root, manifest_file) not in _refreshed:
+        refresh_manifest(root, manifest_file, exclude=exclude)
+        _refreshed.add((root, manifest_file))
+    con = _connect_read_only(manifest_file)
+    # sqlite GLOB lets '*' cross '/', so it only narrows the candidates
+    candidates = [row[0] for row in con.execute("SELECT path FROM files WHERE path GLOB ?", (pattern,))]
+    con.close()
+    return [path for path in candidates if _glob_match(pattern, path)]
+
+
+def glob_files(pattern, root=None, manifest_file=None, exclude=DEFAULT_EXCLUDE):
+    """
+    glob.glob(pattern), answered from the manifest when manifest_file is given
+    """
+    if manifest_file is None:
+        return glob.glob(pattern)
+    return manifest_glob(pattern, root, manifest_file, exclude=exclude)
+
+
+def query_manifest(manifest_file, **entities):
+    """
+    Paths of files matching the given entities, e.g.
+    query_manifest(manifest_file, sub='s01', task='cuedTS', suffix='events')
+    output:
+        sorted list of paths
+    """
+    for key in entities:
+        if key not in ENTITIES + ["suffix", "ext"]:
+            raise ValueError(f"Unknown entity {key}")
+    where = " AND ".join(f"{key} = ?" for key in entities) or "1"
+    con = _connect_read_only(manifest_file)
+    paths = [row[0] for row in con.execute(
+        f"SELECT path FROM files WHERE {where} ORDER BY path", tuple(entities.values())
+    )]
+    con.close()
+    return paths
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [3, 4]:
+        print(__doc__)
+        sys.exit(1)
+    refresh_manifest(sys.argv[1], sys.argv[2], full="--full" in sys.argv[3:])
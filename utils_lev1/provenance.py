@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+
+# Bump if the record layout changes (forces every session to be refit once)
+PROVENANCE_VERSION = 1
+
+# Code that determines the design matrices and estimates.  A change to any
+# of these files makes every session out of date.
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DESIGN_CODE_FILES = [
+    "utils_lev1/design.py",
+    "utils_lev1/first_level_designs_new_event_files.py",
+    "utils_lev1/task_specs.py",
+    "utils_lev1/trial_predicates.py",
+    "utils_lev1/hrf_engine.py",
+    "utils_lev1/design_cache.py",
+    "utils_lev1/session_glm.py",
+    "utils_lev1/ar1_glm.py",
+]
+
+
+def code_checksum(code_files=DESIGN_CODE_FILES):
+    """
+    sha1 over the contents of the design/model code
+    """
+    sha = hashlib.sha1()
+    for code_file in code_files:
+        sha.update(code_file.encode())
+        with open(f"{REPO_DIR}/{code_file}", "rb") as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+def bold_header_checksum(data_file):
+    """
+    sha1 of the NIfTI header plus the file size.  Only the header is read,
+    so this is cheap even for large runs.
+    """
+    import nibabel as nib
+
+    header = nib.load(data_file).header
+    sha = hashlib.sha1(header.binaryblock)
+    sha.update(str(os.path.getsize(data_file)).encode())
+    return sha.hexdigest()
+
+
+def session_provenance(
+    data_file, events_file, confounds_file, mask_file, mean_rt, design_options
+):
+    """
+    Everything a session's level 1 outputs depend on
+    input:
+        data_file, events_file, confounds_file, mask_file: session inputs
+        mean_rt: task mean RT (only used by rt_centered models)
+        design_options: dictionary of the model settings (task, regress_rt,
+            add_deriv, model_break, ...)
+    output:
+        dictionary that can be compared with a stored record
+    """
+    from utils_lev1.bold_cache import file_checksum
+
+    if design_options.get("regress_rt") != "rt_centered":
+        # mean_rt does not enter the design, new subjects should not
+        # invalidate these models
+        mean_rt = None
+    return {
+        "version": PROVENANCE_VERSION,
+        "data_file": os.path.abspath(data_file),
+        "bold_header": bold_header_checksum(data_file),
+        "events": file_checksum(events_file),
+        "confounds": None if confounds_file is None else file_checksum(confounds_file),
+        "mask": file_checksum(mask_file),
+        "mean_rt": None if mean_rt is None else float(mean_rt),
+        "design_options": design_options,
+        "code": code_checksum(),
+    }
+
+
+def get_provenance_file(contrast_dir, subid, ses, task, regress_rt):
+    return f"{contrast_dir}/contrast_estimates/sub-{subid}_{ses}_task-{task}_rtmodel-{regress_rt}_provenance.json"
+
+
+def read_provenance(provenance_file):
+    if not os.path.exists(provenance_file):
+        return None
+    try:
+        with open(provenance_file) as f:
+            return json.load(f)
+    except ValueError:
+        return None
+
+
+def is_up_to_date(provenance_file, inputs, need_contrasts=True, need_residuals=False):
+    """
+    True if the stored record was made from the same inputs and every output
+    it lists (including the ones this run needs) is still on disk
+    input:
+        provenance_file: record written by write_provenance
+        inputs: output of session_provenance for this run
+        need_contrasts: contrast maps are required
+        need_residuals: a residual image is required
+    """
+    record = read_provenance(provenance_file)
+    if record is None or record.get("inputs") != json.loads(json.dumps(inputs)):
+        return False
+    outputs = record["outputs"]
+    if need_contrasts and not outputs["contrasts"]:
+        return False
+    if need_residuals and outputs["residuals"] is None:
+        return False
+    return all(os.path.exists(f) for f in outputs["files"])
+
+
+def write_provenance(provenance_file, inputs, contrasts=None, contrast_files=None, residuals_file=None):
+    """
+    Stores the inputs and outputs of a fitted session
+    input:
+        provenance_file: json file
+        inputs: output of session_provenance
+        contrasts (optional): dictionary of contrast name: contrast expression
+        contrast_files (optional): dictionary of contrast name:
+            {"effect_size", "effect_variance", "z_score"} files
+        residuals_file (optional): residual image
+    """
+    contrast_files = contrast_files or {}
+    files = [f for con_files in contrast_files.values() for f in con_files.values()]
+    if residuals_file is not None:
+        files.append(residuals_file)
+    record = {
+        "inputs": inputs,
+        "outputs": {
+            "contrast_definitions": contrasts or {},
+            "contrasts": contrast_files,
+            "residuals": residuals_file,
+            "files": files,
+        },
+    }
+    tmp_file = f"{provenance_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(record, f, indent=4)
+    os.replace(tmp_file, provenance_file)
@@ -1,29 +1,35 @@
-from nilearn.plotting import plot_design_matrix
-from nilearn.glm.contrasts import expression_to_contrast_vector
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import seaborn as sns
+# nilearn, matplotlib and seaborn are imported in the functions that use
+# them, they take seconds to import and most runs never plot
 import numpy as np
 import pandas as pd
-import glob
-import nibabel as nib
 import base64
 from io import BytesIO
-from pathlib import Path
 import json
 import os
+import functools
+
+GLM_DATA_ROOT = '/oak/stanford/groups/russpold/data/network_grant/validation_BIDS/derivatives/glm_data'
+SCAN_INDEX_FILE = '/oak/stanford/groups/russpold/data/network_grant/validation_BIDS/derivatives/lev_1_cache/scan_index.tsv'
 
 #this needs to be updated to use new dataset and include dual tasks
-def create_tr_dict(average=True):
+def create_tr_dict(average=True, root=GLM_DATA_ROOT, index_file=SCAN_INDEX_FILE,
+                   manifest_file=None):
+    """
+    Number of time points per run for each task, read from the scan count
+    index (utils_lev1.scan_index) instead of loading every bold file
+    input:
+      average: if True return the mean number of time points per task,
+        otherwise the list of run lengths
+      root: glm_data directory the index is built from
+      index_file: scan count index table
+      manifest_file (optional): file manifest used instead of globbing
+    """
+    from utils_lev1.scan_index import load_scan_index
+    scan_index = load_scan_index(root, index_file, manifest_file)
     tr_dict = {}
     for task in ['cuedTS', 'directedForgetting', 'flanker', 'goNogo',
             'nBack', 'stopSignal', 'spatialTS', 'shapeMatching']:
-        tr_list = []
-        img_files = glob.glob(f'/oak/stanford/groups/russpold/data/network_grant/validation_BIDS_old/derivatives/glm_data/*/*/func/*task-{task}_*_bold.nii.gz')
-        for img in img_files:
-            img = nib.load(img)
-            tr_list.append(img.shape[-1])
+        tr_list = list(scan_index.loc[scan_index['task'] == task, 'n_scans'])
         if average:
             tr_dict[task] = sum(tr_list)/len(tr_list)
         else:
@@ -35,7 +41,8 @@ def get_behav_exclusion(subid, task, ses):
     behav_exclusion_this_sub = behav_exclusion[behav_exclusion['subid_task_ses'].str.contains(f'{subid}_{task}_{ses}')]
     return behav_exclusion_this_sub
 
-def qa_design_matrix(contrast_dir, contrasts, desmat, subid, task, ses, percent_junk=0):
+def qa_design_matrix(contrast_dir, contrasts, desmat, subid, task, ses, percent_junk=0,
+                     root=GLM_DATA_ROOT, scan_index_file=SCAN_INDEX_FILE, manifest_file=None):
     """
     Check design matrix for regressors that are included in contrasts that have 
     all zeros. >10% junk trials and unusually low number of TRs 
@@ -46,13 +53,19 @@ def qa_design_matrix(contrast_dir, contrasts, desmat, subid, task, ses, percent_
       subid: subject id number (without 's')
       task: task name 
       percent_junk: percent of junk trials (calculated when design matrix is made)
+      root, scan_index_file, manifest_file (optional): glm_data root, scan
+        count index and file manifest the run lengths are read from
     return:
       any_fail: True=skip this run due to QA failures, False=design good to go
       error_message: Message explaining why subject was excluded (written to file as well)
-      If errors are found, the excluded.csv file is updated
+      If errors are found, an exclusion record is written (utils_lev1.exclusions),
+      otherwise an earlier exclusion of the session is marked as cleared
     """
     import functools as ft
-    num_time_point_cutoff = create_tr_dict(average=True)
+    from utils_lev1.exclusions import record_exclusion, clear_exclusion
+    from nilearn.glm.contrasts import expression_to_contrast_vector
+    num_time_point_cutoff = create_tr_dict(average=True, root=root, index_file=scan_index_file,
+                                           manifest_file=manifest_file)
     #behav_exclusion_this_sub = get_behav_exclusion(subid, task)
     design_column_names = desmat.columns.tolist()
     contrast_matrix = []
@@ -82,28 +95,78 @@ def qa_design_matrix(contrast_dir, contrasts, desmat, subid, task, ses, percent_
         print(f"Subject {subid} {task} {ses} excluded due to QA failures")
         print(f'Any_fail: {any_fail}')
         print(f'All exclusion: {all_exclusion}')
-        update_excluded_subject_csv(all_exclusion, subid, task, ses, contrast_dir)
-        print('Exclusion file updated')
+        record_exclusion(all_exclusion, subid, task, ses, contrast_dir)
+        print('Exclusion recorded')
+    else:
+        # a rerun that now passes marks an earlier failure as cleared
+        clear_exclusion(subid, task, ses, contrast_dir)
     return all_exclusion, any_fail
 
 
 def est_vif(desmat_vif):
-    from statsmodels.stats.outliers_influence import variance_inflation_factor
-    from numpy.linalg import LinAlgError
-
+    """
+    Variance inflation factors of all regressors (plus an added intercept).
+    The VIF of a regressor is 1/(1 - R^2) of its regression on all others,
+    which is the diagonal of the inverse of the regressors' correlation
+    matrix, so one inversion gives all of them.
+    input:
+      desmat_vif: design matrix
+    return:
+      pandas DataFrame with regressor, VIF.  Constant regressors get a VIF of
+      1 (nan if all zeros), regressors that are a linear combination of the
+      others get inf.
+    """
     desmat_with_intercept = desmat_vif.copy()
     desmat_with_intercept['intercept'] = 1
     vif_data = pd.DataFrame()
     vif_data["regressor"] = desmat_with_intercept.columns
 
+    X = desmat_with_intercept.to_numpy(dtype=float)
+    # time points with missing values (e.g. before the first interpolated
+    # value) are left out
+    X = X[np.isfinite(X).all(axis=1)]
+    vifs = np.where((X == 0).all(axis=0), np.nan, 1.0)
+    varying = np.flatnonzero(X.std(axis=0) > 0)
+    if varying.size:
+        vifs[varying] = _inverse_corr_diagonal(X[:, varying])
+    vif_data["VIF"] = vifs
+    return vif_data
+
+
+def _inverse_corr_diagonal(X):
+    centered = X - X.mean(axis=0)
+    scaled = centered / np.sqrt((centered ** 2).sum(axis=0))
+    corr = scaled.T @ scaled
     try:
-        vif_data["VIF"] = [variance_inflation_factor(desmat_with_intercept.values, i)
-                        for i in range(desmat_with_intercept.shape[1])]
-    except LinAlgError:
-        print("SVD did not converge. Handling the error...")
-        vif_data["VIF"] = [0 for i in range(desmat_with_intercept.shape[1])]
+        diagonal = np.diag(np.linalg.inv(corr))
+    except np.linalg.LinAlgError:
+        print("Singular regressor correlation matrix, using pseudo-inverse")
+        diagonal = _pinv_corr_diagonal(corr)
+    # non-positive values only come from rounding with (nearly) collinear
+    # regressors
+    return np.where(np.isfinite(diagonal) & (diagonal > 0), diagonal, np.inf)
+
+
+def _pinv_corr_diagonal(corr):
+    """
+    VIFs from a singular correlation matrix.  Regressors in the span of the
+    others (a component in the null space) get inf.  Every other regressor
+    is in any basis of the regressors, so its VIF is the inverse diagonal
+    over a basis chosen by pivoted QR.
+    """
+    from scipy.linalg import qr
+
+    eigenvalues, eigenvectors = np.linalg.eigh(corr)
+    tol = eigenvalues.max() * corr.shape[0] * np.finfo(float).eps
+    null_space = eigenvectors[:, eigenvalues <= tol]
+    collinear = (null_space ** 2).sum(axis=1) > 1e-8
+    rank = corr.shape[0] - null_space.shape[1]
+    basis = np.sort(qr(corr, pivoting=True)[2][:rank])
+    diagonal = np.full(corr.shape[0], np.inf)
+    diagonal[basis] = np.diag(np.linalg.pinv(corr[np.ix_(basis, basis)]))
+    diagonal[collinear] = np.inf
+    return diagonal
 
-    return vif_data
 
 def est_contrast_vifs(desmat, contrasts):
     """
@@ -117,39 +180,85 @@ def est_contrast_vifs(desmat, contrasts):
     contrasts : dictionary of contrasts, key=contrast name,  using the desmat column names to express the contrasts
     returns: pandas DataFrame with VIFs for each contrast
     """
-    desmat_copy = desmat.copy()
+    return est_contrast_vifs_batch([desmat], contrasts)[0]
+
+
+def _scaled_design(desmat):
     # find location of constant regressor and remove those columns (not needed here)
-    desmat_copy = desmat_copy.loc[
-        :, (desmat_copy.nunique() > 1) | (desmat_copy.isnull().any())
-    ]
+    desmat_copy = desmat.loc[:, (desmat.nunique() > 1) | (desmat.isnull().any())]
     # Scaling stabilizes the matrix inversion
     nsamp = desmat_copy.shape[0]
     desmat_copy = (desmat_copy - desmat_copy.mean()) / (
         (nsamp - 1) ** 0.5 * desmat_copy.std()
     )
-    vifs_contrasts = {}
-    for contrast_name, contrast_string in contrasts.items():
-        contrast_cvec = expression_to_contrast_vector(
-            contrast_string, desmat_copy.columns
-        )
-        true_var_contrast = (
-            contrast_cvec
-            @ np.linalg.inv(desmat_copy.transpose() @ desmat_copy)
-            @ contrast_cvec.transpose()
-        )
-        # The folllowing is the "best case" scenario because the between condition regressor correlations are set to 0
-        best_var_contrast = (
-            contrast_cvec
-            @ np.linalg.inv(
-                np.multiply(
-                    desmat_copy.transpose() @ desmat_copy,
-                    np.identity(desmat_copy.shape[1]),
-                )
-            )
-            @ contrast_cvec.transpose()
-        )
-        vifs_contrasts[contrast_name] = true_var_contrast / best_var_contrast
-    return vifs_contrasts
+    return desmat_copy
+
+
+@functools.lru_cache(maxsize=64)
+def _contrast_matrix(contrast_strings, columns):
+    from nilearn.glm.contrasts import expression_to_contrast_vector
+
+    return np.array([
+        expression_to_contrast_vector(contrast_string, list(columns))
+        for contrast_string in contrast_strings
+    ], dtype=float)
+
+
+def contrast_variances(gram, contrast_matrix):
+    """
+    True and best case (between regressor correlations set to 0) contrast
+    variances for a stack of designs
+    input:
+      gram: (..., p, p) X'X of the scaled design matrices
+      contrast_matrix: (k, p) contrast vectors
+    return:
+      true_var, best_var: (..., k) arrays
+    """
+    # one LU factorization of each X'X, solved for all contrasts at once
+    rhs = np.broadcast_to(contrast_matrix.T, gram.shape[:-1] + (contrast_matrix.shape[0],))
+    try:
+        solved = np.linalg.solve(gram, rhs)
+    except np.linalg.LinAlgError:
+        # one singular design fails the whole stack: solve one design at a
+        # time, with the pseudo-inverse for the singular ones
+        solved = np.empty(rhs.shape)
+        for idx in np.ndindex(gram.shape[:-2]):
+            try:
+                solved[idx] = np.linalg.solve(gram[idx], rhs[idx])
+            except np.linalg.LinAlgError:
+                print("Singular design matrix, using pseudo-inverse for contrast VIFs")
+                solved[idx] = np.linalg.pinv(gram[idx]) @ rhs[idx]
+    true_var = np.einsum('kp,...pk->...k', contrast_matrix, solved)
+    # X'X with the off diagonal set to 0 is inverted by its diagonal
+    diagonal = np.diagonal(gram, axis1=-2, axis2=-1)
+    best_var = np.einsum('kp,...p->...k', contrast_matrix ** 2, 1 / diagonal)
+    return true_var, best_var
+
+
+def est_contrast_vifs_batch(desmats, contrasts):
+    """
+    est_contrast_vifs for many design matrices (e.g. all sessions of a
+    task).  Designs with the same regressors are stacked and their contrast
+    VIFs computed in one batched solve.
+    desmats : list of pandas DataFrames, design matrices
+    contrasts : dictionary of contrasts, key=contrast name
+    returns: list of dictionaries of contrast name: VIF, one per design
+    """
+    scaled = [_scaled_design(desmat) for desmat in desmats]
+    groups = {}
+    for idx, desmat_copy in enumerate(scaled):
+        groups.setdefault(tuple(desmat_copy.columns), []).append(idx)
+
+    contrast_names = list(contrasts.keys())
+    vifs = [None] * len(desmats)
+    for columns, indices in groups.items():
+        contrast_matrix = _contrast_matrix(tuple(contrasts.values()), columns)
+        X = [scaled[idx].to_numpy(dtype=float) for idx in indices]
+        gram = np.stack([x.T @ x for x in X])
+        true_var, best_var = contrast_variances(gram, contrast_matrix)
+        for idx, vif_row in zip(indices, true_var / best_var):
+            vifs[idx] = dict(zip(contrast_names, vif_row))
+    return vifs
 
 
 def get_all_contrast_vif(desmat, contrasts):
@@ -194,8 +303,33 @@ def write_contrast_vifs_to_json(vif_contrasts, subid, task, session, model_break
         print(f"VIF data saved to {json_file}")
 
 
-def add_to_html_summary(subid, contrasts, desmat, outdir, regress_rt, duration_choice, task, any_fail, exclusion, session, percent_junk, model_break, add_deriv, only_breaks_with_performance_feedback):
-    desmat = desmat.interpolate()
+def get_qa_numbers(contrasts, desmat):
+    """
+    Numbers shown in the QA report for one design
+    input:
+      contrasts: dictionary of contrasts
+      desmat: design matrix (interpolated)
+    return:
+      vif_data, vif_contrasts, corr_matrix
+    """
+    vif_data = est_vif(desmat)
+    vif_contrasts = get_all_contrast_vif(desmat, contrasts)
+    corr_matrix = desmat.corr()
+    return vif_data, vif_contrasts, corr_matrix
+
+
+def render_session_html(subid, session, task, contrasts, desmat, corr_matrix, vif_data, vif_contrasts, any_fail, exclusion, percent_junk):
+    """
+    QA figures and tables for one session as an html string
+    (design matrix, contrast matrix, VIF tables and correlation heatmap)
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from nilearn.glm.contrasts import expression_to_contrast_vector
+    from nilearn.plotting import plot_design_matrix
+
     desmat_fig = plot_design_matrix(desmat)
     desmat_tmpfile = BytesIO()
     desmat_fig.figure.savefig(desmat_tmpfile, format='png', dpi=60)
@@ -233,20 +367,11 @@ def add_to_html_summary(subid, contrasts, desmat, outdir, regress_rt, duration_c
     contrast_fig.figure.savefig(contrast_tmpfile, format='png', dpi=75)
     contrast_encoded = base64.b64encode(contrast_tmpfile.getvalue()).decode('utf-8')
     html_contrast = f'<h2>{task} contrasts for subject {subid} {session} </h2>' + '<img src=\'data:image/png;base64,{}\'>'.format(contrast_encoded) + '<br>'
- 
-    desmat_vif = desmat
-    # [desmat.columns.drop(list(desmat.filter(regex=r'(reject)')))]
-    vif_data = est_vif(desmat_vif)
+
     vif_data_table = vif_data[~vif_data.regressor.str.contains(r'(?:reject|trans|rot|comp_cor|non_steady)')]
     vif_table = vif_data_table.to_html(index = False)
-
-    
-    vif_contrasts = get_all_contrast_vif(desmat, contrasts)
     vif_contrasts_table = vif_contrasts.to_html(index = False)
 
-    write_contrast_vifs_to_json(vif_contrasts, subid, task, session, model_break, add_deriv, only_breaks_with_performance_feedback)
-    
-    corr_matrix = desmat.corr()
     f,  heatmap= plt.subplots(figsize=(20,20)) 
     heatmap = sns.heatmap(corr_matrix, 
                       square = True,
@@ -261,35 +386,34 @@ def add_to_html_summary(subid, contrasts, desmat, outdir, regress_rt, duration_c
     heatmap.figure.savefig(cormat_tmpfile, format='png', dpi=60)
     cormat_encoded = base64.b64encode(cormat_tmpfile.getvalue()).decode('utf-8')
     html_cormat = '<img src=\'data:image/png;base64,{}\'>'.format(cormat_encoded) + '<br>'
+    plt.close('all')
+    return ''.join([
+        '<hr>',
+        f'<h2>Subject {subid} {session}</h2><br>',
+        f'<h3>Percent Junk: {percent_junk}</h3>',
+        html_desmat,
+        html_contrast,
+        f'<h2>Variance inflation factors subject {subid} {session}</h2><br>',
+        vif_table,
+        vif_contrasts_table,
+        html_cormat,
+    ])
+
+
+def add_to_html_summary(subid, contrasts, desmat, outdir, regress_rt, duration_choice, task, any_fail, exclusion, session, percent_junk, model_break, add_deriv, only_breaks_with_performance_feedback):
+    desmat = desmat.interpolate()
+    # [desmat.columns.drop(list(desmat.filter(regex=r'(reject)')))]
+    vif_data, vif_contrasts, corr_matrix = get_qa_numbers(contrasts, desmat)
+    write_contrast_vifs_to_json(vif_contrasts, subid, task, session, model_break, add_deriv, only_breaks_with_performance_feedback)
+    html_session = render_session_html(
+        subid, session, task, contrasts, desmat, corr_matrix, vif_data,
+        vif_contrasts, any_fail, exclusion, percent_junk
+    )
     html_file = (f'{outdir}/contrasts_task_{task}_rtmodel_{regress_rt}_'
                     f'duration_{duration_choice}_model_summary.html')
     with open(html_file,'a') as f:
-        f.write('<hr>')
-        f.write(f'<h2>Subject {subid} {session}</h2><br>')
-        f.write(f'<h3>Percent Junk: {percent_junk}</h3>')
-        f.write(html_desmat)
-        f.write(html_contrast) 
-        f.write(f'<h2>Variance inflation factors subject {subid} {session}</h2><br>')
-        f.write(vif_table)
-        f.write(vif_contrasts_table)
-        f.write(html_cormat)
-    plt.close('all')
-
+        f.write(html_session)
 
-def update_excluded_subject_csv(current_exclusion, subid, task, ses, contrast_dir):
-    import functools as ft
-    # behav_exclusion_this_sub = get_behav_exclusion(subid, task, ses)
-    # full_sub_exclusion = pd.merge(behav_exclusion_this_sub, current_exclusion, how='inner')
-    full_sub_exclusion = current_exclusion
-    exclusion_out_path = Path(f'{contrast_dir}/excluded_subject.csv')
-    if exclusion_out_path.exists():
-        old_exclusion_csv = pd.read_csv(exclusion_out_path)
-        full_sub_exclusion['subid_task'] = f'{subid}_{task}_{ses}'
-        old_and_new_exclusion = pd.concat([old_exclusion_csv, full_sub_exclusion], axis = 0)
-        old_and_new_exclusion.fillna(0, inplace=True)
-    else:
-        old_and_new_exclusion = current_exclusion
-    old_and_new_exclusion.to_csv(exclusion_out_path, index=False)
 
 def create_fixed_effects_html(outpath, contrast, variance, stat):
     print(outpath)
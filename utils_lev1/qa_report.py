@@ -0,0 +1,216 @@
+"""
+Level 1 QA in two stages.  While the models are set up, save_qa_artifacts
+stores only the numbers for each session (design matrix, correlations,
+regressor and contrast VIFs, exclusion flags) under <contrast_dir>/qa.
+render_qa_report later turns them into one html fragment per subject, with
+the subjects rendered in a process pool, plus a small index page.
+"""
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def get_qa_file_root(contrast_dir, subid, ses, task, regress_rt):
+    return f"{contrast_dir}/qa/sub-{subid}_{ses}_task-{task}_rtmodel-{regress_rt}_qa"
+
+
+def save_qa_artifacts(
+    contrast_dir,
+    subid,
+    ses,
+    task,
+    regress_rt,
+    contrasts,
+    desmat,
+    any_fail,
+    exclusion,
+    percent_junk,
+    model_break,
+    add_deriv,
+    only_breaks_with_performance_feedback,
+    vif_batch=None,
+):
+    """
+    Computes and stores the QA numbers of one session, as {file root}.npz
+    (design, correlation matrix, VIFs) and {file root}.json (names, contrasts,
+    exclusion flags).  The contrast and regressor VIFs are added to vif_batch
+    (utils_lev1.vif_store), or without a batch the contrast VIFs are written
+    to the old vif_analysis json file.
+    output:
+        file root (get_qa_file_root)
+    """
+    from utils_lev1.qa import get_qa_numbers, write_contrast_vifs_to_json
+    from utils_lev1.vif_store import add_vifs_to_batch
+
+    desmat = desmat.interpolate()
+    vif_data, vif_contrasts, corr_matrix = get_qa_numbers(contrasts, desmat)
+    if vif_batch is None:
+        write_contrast_vifs_to_json(
+            vif_contrasts, subid, task, ses, model_break, add_deriv, only_breaks_with_performance_feedback
+        )
+    else:
+        add_vifs_to_batch(
+            vif_batch, subid, ses, task, model_break, add_deriv, only_breaks_with_performance_feedback,
+            vif_contrasts=vif_contrasts, vif_data=vif_data,
+        )
+
+    file_root = get_qa_file_root(contrast_dir, subid, ses, task, regress_rt)
+    os.makedirs(os.path.dirname(file_root), exist_ok=True)
+    metadata = {
+        "subid": subid,
+        "session": ses,
+        "task": task,
+        "regress_rt": regress_rt,
+        "design_columns": [str(column) for column in desmat.columns],
+        "vif_regressors": [str(regressor) for regressor in vif_data["regressor"]],
+        "contrasts": contrasts,
+        "percent_junk": float(percent_junk),
+        "any_fail": bool(any_fail),
+        # to_json converts numpy scalars
+        "exclusion": json.loads(exclusion.to_json(orient="records"))[0],
+    }
+    tmp_suffix = f".{os.getpid()}.tmp"
+    with open(f"{file_root}.npz{tmp_suffix}", "wb") as f:
+        np.savez(
+            f,
+            design=desmat.to_numpy(dtype=float),
+            correlation=corr_matrix.to_numpy(dtype=float),
+            vif=vif_data["VIF"].to_numpy(dtype=float),
+            contrast_vif=vif_contrasts["VIF"].to_numpy(dtype=float),
+        )
+    with open(f"{file_root}.json{tmp_suffix}", "w") as f:
+        json.dump(metadata, f, indent=4)
+    os.replace(f"{file_root}.npz{tmp_suffix}", f"{file_root}.npz")
+    os.replace(f"{file_root}.json{tmp_suffix}", f"{file_root}.json")
+    return file_root
+
+
+def load_qa_metadata(file_root):
+    with open(f"{file_root}.json") as f:
+        return json.load(f)
+
+
+def load_qa_artifacts(file_root):
+    """
+    Reads what save_qa_artifacts stored
+    output:
+        dictionary with the metadata plus desmat, corr_matrix, vif_data,
+        vif_contrasts and exclusion as pandas DataFrames
+    """
+    artifacts = load_qa_metadata(file_root)
+    columns = artifacts["design_columns"]
+    with np.load(f"{file_root}.npz", allow_pickle=False) as arrays:
+        artifacts["desmat"] = pd.DataFrame(arrays["design"], columns=columns)
+        artifacts["corr_matrix"] = pd.DataFrame(arrays["correlation"], index=columns, columns=columns)
+        artifacts["vif_data"] = pd.DataFrame(
+            {"regressor": artifacts["vif_regressors"], "VIF": arrays["vif"]}
+        )
+        artifacts["vif_contrasts"] = pd.DataFrame(
+            {"contrast": list(artifacts["contrasts"].values()), "VIF": arrays["contrast_vif"]}
+        )
+    artifacts["exclusion"] = pd.DataFrame([artifacts["exclusion"]])
+    return artifacts
+
+
+def render_subject_fragment(subid, file_roots, fragment_file):
+    """
+    Renders the QA plots of all sessions of one subject into fragment_file
+    """
+    from utils_lev1.qa import render_session_html
+
+    html_sessions = []
+    for file_root in sorted(file_roots):
+        artifacts = load_qa_artifacts(file_root)
+        html_sessions.append(render_session_html(
+            subid,
+            artifacts["session"],
+            artifacts["task"],
+            artifacts["contrasts"],
+            artifacts["desmat"],
+            artifacts["corr_matrix"],
+            artifacts["vif_data"],
+            artifacts["vif_contrasts"],
+            artifacts["any_fail"],
+            artifacts["exclusion"],
+            artifacts["percent_junk"],
+        ))
+    tmp_file = f"{fragment_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "w") as f:
+        f.write(f"<html><body><a href='index.html'>index</a><h1>Subject {subid}</h1>")
+        f.write("".join(html_sessions))
+        f.write("</body></html>")
+    os.replace(tmp_file, fragment_file)
+    return fragment_file
+
+
+def _is_stale(fragment_file, file_roots):
+    if not os.path.exists(fragment_file):
+        return True
+    rendered = os.path.getmtime(fragment_file)
+    return any(os.path.getmtime(f"{file_root}.npz") > rendered for file_root in file_roots)
+
+
+def _index_row(metadata, fragment_name):
+    failed_checks = [
+        check for check, value in metadata["exclusion"].items()
+        if check != "subid_task" and value not in (0, None)
+    ]
+    return {
+        "subject": f"<a href='{fragment_name}'>{metadata['subid']}</a>",
+        "session": metadata["session"],
+        "percent_junk": metadata["percent_junk"],
+        "any_fail": metadata["any_fail"],
+        "failed_checks": ", ".join(failed_checks),
+    }
+
+
+def render_qa_report(contrast_dir, n_jobs=1, force=False):
+    """
+    Renders the html QA report of a contrast directory from the artifacts in
+    <contrast_dir>/qa
+    input:
+        contrast_dir: level 1 contrast directory
+        n_jobs: number of processes rendering subjects in parallel
+        force: also rerender subjects whose fragment is newer than their
+            artifacts
+    output:
+        path of the index page (<contrast_dir>/qa_report/index.html)
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    report_dir = f"{contrast_dir}/qa_report"
+    os.makedirs(report_dir, exist_ok=True)
+    file_roots = sorted(f[:-len(".json")] for f in glob.glob(f"{contrast_dir}/qa/*_qa.json"))
+    metadata = {file_root: load_qa_metadata(file_root) for file_root in file_roots}
+    subjects = {}
+    for file_root in file_roots:
+        subjects.setdefault(metadata[file_root]["subid"], []).append(file_root)
+
+    to_render = [
+        (subid, subject_roots, f"{report_dir}/sub-{subid}.html")
+        for subid, subject_roots in sorted(subjects.items())
+        if force or _is_stale(f"{report_dir}/sub-{subid}.html", subject_roots)
+    ]
+    print(f"Rendering QA fragments for {len(to_render)} of {len(subjects)} subjects in {contrast_dir}")
+    if n_jobs > 1 and len(to_render) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [executor.submit(render_subject_fragment, *job) for job in to_render]
+            for future in futures:
+                future.result()
+    else:
+        for job in to_render:
+            render_subject_fragment(*job)
+
+    index = pd.DataFrame([
+        _index_row(metadata[file_root], f"sub-{metadata[file_root]['subid']}.html")
+        for file_root in file_roots
+    ])
+    index_file = f"{report_dir}/index.html"
+    with open(index_file, "w") as f:
+        f.write(f"<html><body><h1>QA report {contrast_dir}</h1>")
+        f.write(index.to_html(index=False, escape=False))
+        f.write("</body></html>")
+    return index_file
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Per-task index of mean response times for every events file in glm_data.
+
+calculate_mean_rt used to read every events.tsv for a task on every
+analyze_lev1_v4.py call.  The index holds one row per run (events_file,
+size, mtime, mean_rt, n_trials) so a job only reads one small table.
+Every lookup stat-checks the task's events files against the index: only
+events files that are new or have a different size/mtime are re-read, and
+the index is only rewritten when something changed.  It can also be
+refreshed by hand with:
+    python -m utils_lev1.rt_index <glm_data root> <index dir> <task> [<task> ...]
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+INDEX_COLUMNS = ["events_file", "size", "mtime_ns", "mean_rt", "n_trials"]
+
+
+def get_rt_subset(events_df, task):
+    """
+    Boolean for the trials used in the mean RT (same rules as the original
+    calculate_mean_rt queries)
+    input:
+        events_df: events data frame
+        task: task name
+    output:
+        boolean pandas Series
+    """
+    rt_ok = events_df["response_time"] >= 0.2
+    if 'stopSignal' in task:
+        trial_type = events_df["trial_type"].fillna('n/a').astype(str)
+        correct = events_df["key_press"] == events_df["correct_response"]
+        return (trial_type.str.contains('go') & rt_ok & correct) | (
+            trial_type.str.contains('stop_failure') & rt_ok
+        )
+    return (
+        (events_df["key_press"] == events_df["correct_response"])
+        & (events_df["trial_id"] == 'test_trial')
+        & rt_ok
+    )
+
+
+def events_mean_rt(events_file, task):
+    """
+    Mean RT and number of trials used for a single events file
+    """
+    df = pd.read_csv(events_file, sep='\t')
+    rts = df.loc[get_rt_subset(df, task), 'response_time']
+    return rts.mean(), len(rts)
+
+
+def find_events_files(root, task, manifest_file=None):
+    from utils_lev1.manifest import glob_files
+
+    return glob_files(root + f'/*/*/func/*{task}_*events.tsv', root, manifest_file)
+
+
+def get_index_file(index_dir, task):
+    return f"{index_dir}/task-{task}_rt_index.tsv"
+
+
+def refresh_rt_index(root, task, index_dir, events_files=None, manifest_file=None):
+    """
+    Builds or incrementally updates the RT index for a task.  Rows for
+    events files that are unchanged (same size and mtime) are kept, changed
+    and new files are re-read and files that disappeared are dropped.
+    input:
+        root: glm_data root
+        task: task name
+        index_dir: directory holding the index tables
+        events_files (optional): list of events files, globbed if None
+        manifest_file (optional): file manifest (utils_lev1.manifest) used
+            instead of globbing
+    output:
+        index: pandas data frame with one row per events file
+    """
+    if events_files is None:
+        events_files = find_events_files(root, task, manifest_file)
+    index_file = get_index_file(index_dir, task)
+    if os.path.exists(index_file):
+        old_index = pd.read_csv(
+            index_file, sep='\t', dtype={'size': np.int64, 'mtime_ns': np.int64}
+        ).set_index('events_file')
+    else:
+        old_index = pd.DataFrame(columns=INDEX_COLUMNS).set_index('events_file')
+
+    rows = []
+    n_read = 0
+    for events_file in sorted(events_files):
+        stat = os.stat(events_file)
+        if events_file in old_index.index:
+            old_row = old_index.loc[events_file]
+            if old_row['size'] == stat.st_size and old_row['mtime_ns'] == stat.st_mtime_ns:
+                rows.append([events_file, stat.st_size, stat.st_mtime_ns,
+                             old_row['mean_rt'], int(old_row['n_trials'])])
+                continue
+        mean_rt, n_trials = events_mean_rt(events_file, task)
+        n_read += 1
+        rows.append([events_file, stat.st_size, stat.st_mtime_ns, mean_rt, n_trials])
+    index = pd.DataFrame(rows, columns=INDEX_COLUMNS)
+
+    n_dropped = len(set(old_index.index) - set(index['events_file']))
+    if n_read or n_dropped or not os.path.exists(index_file):
+        os.makedirs(index_dir, exist_ok=True)
+        tmp_file = f"{index_file}.{os.getpid()}.tmp"
+        index.to_csv(tmp_file, sep='\t', index=False)
+        os.replace(tmp_file, index_file)
+    print(f"RT index for {task}: {len(index)} runs, {n_read} (re)read, {n_dropped} dropped")
+    return index
+
+
+def get_mean_rt(root, task, index_dir, manifest_file=None):
+    """
+    Mean of the per-run mean RTs for a task, from the index after bringing
+    it up to date (new, changed and removed events files)
+    """
+    index = refresh_rt_index(root, task, index_dir, manifest_file=manifest_file)
+    return np.mean(index['mean_rt'].values)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print(__doc__)
+        sys.exit(1)
+    root, index_dir = sys.argv[1], sys.argv[2]
+    for task in sys.argv[3:]:
+        refresh_rt_index(root, task, index_dir)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Index of the number of scans in every *_bold.nii.gz under a glm_data root.
+
+create_tr_dict used to nib.load every BOLD file for eight tasks each time a
+session was QA'd.  The index stores task, subject, session, n_scans, size
+and mtime per file (read from the NIfTI header only) in one small table.
+Every process brings it up to date on first use; only files that are new
+or have a different size/mtime are re-read.  It can also be refreshed by
+hand with:
+    python -m utils_lev1.scan_index <glm_data root> <index file>
+"""
+import functools
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+INDEX_COLUMNS = ["bold_file", "task", "subject", "session", "size", "mtime_ns", "n_scans"]
+
+
+def read_nscans(bold_file):
+    """
+    Number of time points from the NIfTI header (the data block is not read)
+    """
+    import nibabel as nib
+
+    return int(nib.load(bold_file).header.get_data_shape()[3])
+
+
+def parse_bold_filename(bold_file):
+    """
+    task, subject and session entities from a BIDS file name
+    """
+    name = os.path.basename(bold_file)
+    entities = []
+    for entity in ["task", "sub", "ses"]:
+        match = re.search(f"{entity}-([^_]+)_", name)
+        entities.append(match.group(1) if match else None)
+    return entities
+
+
+def find_bold_files(root, manifest_file=None):
+    from utils_lev1.manifest import glob_files
+
+    return glob_files(f"{root}/*/*/func/*_bold.nii.gz", root, manifest_file)
+
+
+def refresh_scan_index(root, index_file, bold_files=None, manifest_file=None):
+    """
+    Builds or incrementally updates the scan count index.  Rows for files
+    that are unchanged (same size and mtime) are kept, changed and new files
+    have their header read and files that disappeared are dropped.
+    input:
+        root: glm_data root
+        index_file: tsv file holding the index
+        bold_files (optional): list of bold files, globbed if None
+        manifest_file (optional): file manifest (utils_lev1.manifest) used
+            instead of globbing
+    output:
+        index: pandas data frame with one row per bold file
+    """
+    if bold_files is None:
+        bold_files = find_bold_files(root, manifest_file)
+    if os.path.exists(index_file):
+        old_index = read_scan_index(index_file).set_index('bold_file')
+    else:
+        old_index = pd.DataFrame(columns=INDEX_COLUMNS).set_index('bold_file')
+
+    rows = []
+    n_read = 0
+    for bold_file in sorted(bold_files):
+        stat = os.stat(bold_file)
+        if bold_file in old_index.index:
+            old_row = old_index.loc[bold_file]
+            if old_row['size'] == stat.st_size and old_row['mtime_ns'] == stat.st_mtime_ns:
+                rows.append([bold_file, old_row['task'], old_row['subject'], old_row['session'],
+                             stat.st_size, stat.st_mtime_ns, int(old_row['n_scans'])])
+                continue
+        task, subject, session = parse_bold_filename(bold_file)
+        n_read += 1
+        rows.append([bold_file, task, subject, session, stat.st_size, stat.st_mtime_ns,
+                     read_nscans(bold_file)])
+    index = pd.DataFrame(rows, columns=INDEX_COLUMNS)
+
+    n_dropped = len(set(old_index.index) - set(index['bold_file']))
+    if n_read or n_dropped or not os.path.exists(index_file):
+        os.makedirs(os.path.dirname(os.path.abspath(index_file)), exist_ok=True)
+        tmp_file = f"{index_file}.{os.getpid()}.tmp"
+        index.to_csv(tmp_file, sep='\t', index=False)
+        os.replace(tmp_file, index_file)
+    print(f"Scan index: {len(index)} bold files, {n_read} (re)read, {n_dropped} dropped")
+    return index
+
+
+def read_scan_index(index_file):
+    return pd.read_csv(
+        index_file,
+        sep='\t',
+        dtype={'size': np.int64, 'mtime_ns': np.int64, 'n_scans': np.int64,
+               'subject': str, 'session': str},
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def load_scan_index(root, index_file, manifest_file=None):
+    """
+    Scan count index, brought up to date (files stat-checked, new and
+    changed ones re-read) the first time it is needed in a process.  Cached
+    for the life of the process since it is read once per session/variant.
+    """
+    return refresh_scan_index(root, index_file, manifest_file=manifest_file)
+
+
+def lookup_nscans(bold_file, root, index_file, manifest_file=None):
+    """
+    Number of scans for bold_file from the index.  Falls back to the file
+    header when the file is not in the index or has changed since indexing.
+    """
+    index = load_scan_index(root, index_file, manifest_file)
+    row = index.loc[index['bold_file'] == bold_file]
+    if len(row) == 1:
+        stat = os.stat(bold_file)
+        if row['size'].item() == stat.st_size and row['mtime_ns'].item() == stat.st_mtime_ns:
+            return int(row['n_scans'].item())
+    return read_nscans(bold_file)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    refresh_scan_index(sys.argv[1], sys.argv[2])
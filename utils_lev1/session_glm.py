@@ -0,0 +1,222 @@
+import os
+
+import numpy as np
+
+
+def load_session_data(
+    data_file, mask_file, smoothing_fwhm=5, cache_dir=None, max_cache_gb=50, mean_scale=True,
+    scratch_dir=None,
+):
+    """
+    Masks, smooths and mean scales one session's BOLD data once so that
+    several design matrices can be fit against it.  This reproduces the
+    preprocessing FirstLevelModel applies inside fit (standardize=False,
+    default signal_scaling)
+    input:
+        data_file: path to 4D BOLD data
+        mask_file: path to the brain mask for this session
+        smoothing_fwhm: smoothing kernel in mm
+        cache_dir (optional): directory for the masked/smoothed data cache
+            (see utils_lev1.bold_cache).  If None the data are not cached.
+        max_cache_gb: size cap for cache_dir
+        mean_scale: if False, the data are returned before mean scaling, as
+            a read-only memmap, for engines that read and scale one chunk of
+            voxels at a time.  Without a cache the data are streamed into a
+            file in scratch_dir that is removed as soon as it is mapped.
+            If True the whole array is in memory (nilearn's run_glm needs it)
+        scratch_dir (optional): directory for the streamed data, the system
+            temporary directory ($TMPDIR) if None
+    output:
+        Y: time x voxel array of in-mask, percent signal change data
+        masker: fitted NiftiMasker, used to turn estimates back into images
+    """
+    from nilearn.maskers import NiftiMasker
+    from nilearn.glm.first_level.first_level import mean_scaling
+
+    if cache_dir is not None:
+        from utils_lev1.bold_cache import load_masked_bold
+
+        Y, masker = load_masked_bold(
+            data_file, mask_file, smoothing_fwhm, cache_dir, max_cache_gb=max_cache_gb
+        )
+    else:
+        masker = NiftiMasker(
+            mask_img=mask_file,
+            smoothing_fwhm=smoothing_fwhm,
+            standardize=False,
+        ).fit()
+        if mean_scale:
+            Y = masker.transform(data_file)
+        else:
+            import tempfile
+            from utils_lev1.bold_cache import stream_masked_bold
+
+            fd, scratch_file = tempfile.mkstemp(suffix=".npy", dir=scratch_dir)
+            os.close(fd)
+            try:
+                stream_masked_bold(masker, data_file, scratch_file)
+                Y = np.load(scratch_file, mmap_mode="r")
+            finally:
+                # the memory map keeps the data readable after the unlink
+                os.remove(scratch_file)
+    if mean_scale:
+        Y, _ = mean_scaling(Y, 0)
+    return Y, masker
+
+
+def fit_design(Y, design_matrix, noise_model="ar1", minimize_memory=True):
+    """
+    Fits a single design matrix to data loaded with load_session_data
+    input:
+        Y: time x voxel data array
+        design_matrix: pandas data frame, one row per time point
+        noise_model: "ar1" or "ols"
+        minimize_memory: if True, only keep what is needed for contrasts
+    output:
+        labels, results: as returned by nilearn's run_glm
+    """
+    from nilearn.glm.first_level import run_glm
+    from nilearn.glm.regression import SimpleRegressionResults
+
+    labels, results = run_glm(Y, design_matrix.values, noise_model=noise_model)
+    if minimize_memory:
+        results = {
+            label: SimpleRegressionResults(result)
+            for label, result in results.items()
+        }
+    return labels, results
+
+
+def compute_contrast_images(masker, labels, results, design_matrix, contrast):
+    """
+    Equivalent of FirstLevelModel.compute_contrast(contrast, output_type="all")
+    restricted to the outputs that are written to disk
+    input:
+        masker: fitted NiftiMasker from load_session_data
+        labels, results: output of fit_design
+        design_matrix: design matrix that was fit
+        contrast: contrast expression using design matrix column names
+    output:
+        dictionary with effect_size, effect_variance and z_score images
+    """
+    from nilearn.glm.contrasts import compute_contrast, expression_to_contrast_vector
+
+    con_val = expression_to_contrast_vector(contrast, design_matrix.columns.tolist())
+    con = compute_contrast(labels, results, con_val)
+    return {
+        "effect_size": masker.inverse_transform(con.effect_size()),
+        "effect_variance": masker.inverse_transform(con.effect_variance()),
+        "z_score": masker.inverse_transform(con.z_score()),
+    }
+
+
+def get_residuals_image(masker, labels, results, n_scans):
+    """
+    Collects the residuals of a fit made with minimize_memory=False
+    into a 4D image (same as FirstLevelModel.residuals[0])
+    """
+    n_voxels = labels.shape[0]
+    residuals = np.zeros((n_scans, n_voxels))
+    for label, result in results.items():
+        residuals[:, labels == label] = result.residuals
+    return masker.inverse_transform(residuals)
+
+
+def compute_contrasts_batched(labels, results, design_matrix, contrasts):
+    """
+    Effect size, effect variance and z score for every t contrast at once.
+    All contrast vectors are stacked into one matrix so each group of voxels
+    sharing an AR(1) label needs a single matrix product, instead of one
+    Tcontrast call per contrast and label.
+    input:
+        labels, results: output of fit_design
+        design_matrix: design matrix that was fit
+        contrasts: dictionary of contrast name: contrast expression
+    output:
+        dictionary of contrast name: {"effect_size", "effect_variance",
+            "z_score"}, each an in-mask array (n_voxels,)
+    """
+    from nilearn.glm.contrasts import Contrast, expression_to_contrast_vector
+
+    design_columns = design_matrix.columns.tolist()
+    contrast_names = list(contrasts.keys())
+    contrast_matrix = np.array([
+        expression_to_contrast_vector(contrasts[con_name], design_columns)
+        for con_name in contrast_names
+    ])
+    n_contrasts = contrast_matrix.shape[0]
+    effect = np.zeros((n_contrasts, labels.size))
+    variance = np.zeros((n_contrasts, labels.size))
+    for label, result in results.items():
+        label_mask = labels == label
+        effect[:, label_mask] = contrast_matrix @ result.theta
+        # diag(C cov C') for all contrasts, scaled by each voxel's dispersion
+        contrast_cov = np.einsum("ij,jk,ik->i", contrast_matrix, result.cov, contrast_matrix)
+        variance[:, label_mask] = contrast_cov[:, None] * result.dispersion[None, :]
+        dof = result.df_residuals
+
+    # one Contrast over the flattened contrasts x voxels arrays gives the
+    # same z scores as nilearn computes per contrast
+    z_scores = Contrast(
+        effect=effect.ravel(), variance=variance.ravel(), dim=1, dof=dof, stat_type="t"
+    ).z_score().reshape(n_contrasts, labels.size)
+
+    return {
+        con_name: {
+            "effect_size": effect[idx],
+            "effect_variance": variance[idx],
+            "z_score": z_scores[idx],
+        }
+        for idx, con_name in enumerate(contrast_names)
+    }
+
+
+def write_maps(masker, maps, n_jobs=4):
+    """
+    Unmasks and writes a set of in-mask maps in parallel, one 3D image per
+    map, so only n_jobs full volumes are in memory at a time (gzip
+    compression releases the GIL)
+    input:
+        masker: fitted NiftiMasker
+        maps: dictionary of output filename: in-mask array (n_voxels,)
+        n_jobs: number of writer threads
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def write_one(filename):
+        masker.inverse_transform(maps[filename]).to_filename(filename)
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        list(pool.map(write_one, list(maps.keys())))
+
+
+def write_residuals_image(residuals, masker, filename):
+    """
+    Writes a time x voxel residual array (e.g. a memmap) as a 4D float32
+    NIfTI one volume at a time, so the 4D image is never held in memory
+    input:
+        residuals: time x voxel array of in-mask residuals
+        masker: fitted NiftiMasker used to mask the data
+        filename: output .nii or .nii.gz file
+    """
+    import gzip
+    import nibabel as nib
+
+    mask_img = masker.mask_img_
+    mask = np.asanyarray(mask_img.dataobj).astype(bool)
+    header = nib.Nifti1Header()
+    header.set_data_shape(mask.shape + (residuals.shape[0],))
+    header.set_data_dtype(np.float32)
+    header.set_qform(mask_img.affine, code=1)
+    header.set_sform(mask_img.affine, code=1)
+    header.set_data_offset(352)
+    opener = gzip.open if filename.endswith(".gz") else open
+    tmp_file = f"{filename}.{os.getpid()}.tmp"
+    with opener(tmp_file, "wb") as fileobj:
+        header.write_to(fileobj)
+        fileobj.write(b"\0" * (header.get_data_offset() - fileobj.tell()))
+        volume = np.zeros(mask.shape, dtype=np.float32)
+        for time_point in range(residuals.shape[0]):
+            volume[mask] = residuals[time_point]
+            fileobj.write(volume.tobytes(order="F"))
+    os.replace(tmp_file, filename)
@@ -0,0 +1,667 @@
+"""
+Level 1 model definitions, one entry per task.  The designs are built from
+these by utils_lev1.first_level_designs_new_event_files.make_task_desmat.
+
+Each task spec is a dictionary with
+    conditions: condition name: subset expression (DataFrame.query syntax)
+        selecting the trials of that condition, in design matrix order.
+        Conditions use a constant amplitude of 1.
+    durations (optional): condition name: duration column for conditions
+        that do not use a constant duration of 1
+    after_confounds (optional): conditions that go after the confound
+        regressors in the design matrix
+    nuisance_prefix (optional): prefix for the omission, commission and
+        rt_fast regressors ("go_" for the stop signal/go-nogo tasks)
+    nuisance_subset (optional): subset expression for the nuisance
+        regressors (all trials if missing)
+    lowercase_trial_type (optional): lower case trial_type after the
+        nuisance regressors are made
+    events_order (optional): regressor order for the simplified events
+        (default: design matrix order)
+    rt_subset: trials used for the response_time regressor (rt_centered)
+    contrasts: contrast name: contrast expression
+
+Every task also gets the break_period regressor (model_break) and the
+response_time regressor (rt_centered), see make_task_desmat.
+"""
+
+TASK_SPECS = {
+    "cuedTS": {
+        "nuisance_subset": "trial_type != 'tn/a_cn/a'",
+        "conditions": {
+            "task_stay_cue_switch": "key_press == correct_response and response_time >= 0.2 and trial_type == 'tstay_cswitch'",
+            "task_stay_cue_stay": "key_press == correct_response and response_time >= 0.2 and trial_type == 'tstay_cstay'",
+            "task_switch_cue_switch": "key_press == correct_response and response_time >= 0.2 and trial_type == 'tswitch_cswitch'",
+            "n/a": "trial_type == 'tn/a_cn/a'",
+        },
+        "after_confounds": ["n/a"],
+        "events_order": [
+            "omission", "commission", "rt_fast", "task_stay_cue_switch", "task_stay_cue_stay",
+            "task_switch_cue_switch",
+        ],
+        "rt_subset": "key_press == correct_response and response_time >= 0.2 and trial_type != 'tn/a_cn/a' and trial_id == 'test_trial'",
+        "contrasts": {
+            "task_switch_cost": "task_switch_cue_switch-task_stay_cue_switch",
+            "cue_switch_cost": "task_stay_cue_switch-task_stay_cue_stay",
+            "task_switch_cue_switch-task_stay_cue_stay": "task_switch_cue_switch-task_stay_cue_stay",
+            "task-baseline": "1/3*(task_stay_cue_switch+task_stay_cue_stay+task_switch_cue_switch)",
+        },
+    },
+    "directedForgetting": {
+        "conditions": {
+            "con": 'key_press == correct_response and response_time >= 0.2 and trial_type == "con"',
+            "pos": 'key_press == correct_response and response_time >= 0.2 and trial_type == "pos"',
+            "neg": 'key_press == correct_response and response_time >= 0.2 and trial_type == "neg"',
+            "memory_and_cue": 'trial_id == "test_stim" or trial_id == "test_cue"',
+        },
+        "durations": {"memory_and_cue": "duration"},
+        "after_confounds": ["memory_and_cue"],
+        "events_order": [
+            "omission", "commission", "rt_fast", "memory_and_cue", "con", "pos", "neg",
+        ],
+        "rt_subset": "key_press == correct_response and response_time >= 0.2 and trial_id == 'test_trial'",
+        "contrasts": {
+            "neg-con": "neg-con",
+            "task-baseline": "1/4*(con+pos+neg+memory_and_cue)",  # memory_and_cue
+        },
+    },
+    "flanker": {
+        "conditions": {
+            "congruent": "key_press == correct_response and response_time >= 0.2 and trial_type =='congruent'",
+            "incongruent": "key_press == correct_response and response_time >= 0.2 and trial_type =='incongruent'",
+        },
+        "events_order": ["omission", "commission", "rt_fast", "congruent", "incongruent"],
+        "rt_subset": "key_press == correct_response and response_time >= 0.2 and trial_id == 'test_trial'",
+        "contrasts": {
+            "incongruent-congruent": "incongruent-congruent",
+            "task-baseline": "1/2*congruent + 1/2*incongruent",
+        },
+    },
+    "goNogo": {
+        "nuisance_prefix": "go_",
+        "conditions": {
+            "go": "key_press == correct_response and response_time >= 0.2 and trial_type == 'go'",
+            "nogo_success": "trial_type == 'nogo_success'",
+            "nogo_failure": "trial_type == 'nogo_failure'",
+        },
+        "events_order": [
+            "go_omission", "go_commission", "go_rt_fast", "nogo_failure", "go", "nogo_success",
+        ],
+        "rt_subset": "key_press == correct_response and response_time >= 0.2 and trial_type == 'go'",
+        "contrasts": {
+            "go": "go",
+            "nogo_success": "nogo_success",
+            "nogo_success-go": "nogo_success-go",
+            "task-baseline": "1/2*go+1/2*nogo_success",
+        },
+    },
+    "nBack": {
+        "nuisance_subset": "trial_type != 'n/a'",
+        "conditions": {
+            "mismatch_1back": "key_press == correct_response and response_time >= 0.2 and trial_type == 'mismatch' and delay == 1",
+            "match_1back": "key_press == correct_response and response_time >= 0.2 and trial_type == 'match' and delay == 1",
+            "mismatch_2back": "key_press == correct_response and response_time >= 0.2 and trial_type == 'mismatch' and delay == 2",
+            "match_2back": "key_press == correct_response and response_time >= 0.2 and trial_type == 'match' and delay == 2",
+        },
+        "events_order": [
+            "omission", "commission", "rt_fast", "mismatch_1back", "match_1back",
+            "mismatch_2back", "match_2back",
+        ],
+        "rt_subset": "key_press == correct_response and response_time >= 0.2 and trial_type != 'n/a'",
+        "contrasts": {
+            "twoBack-oneBack": "1/2*(mismatch_2back+match_2back-mismatch_1back-match_1back)",
+            "match-mismatch": "1/2*(match_2back+match_1back-mismatch_2back-mismatch_1back)",
+            "task-baseline": "1/4*(mismatch_1back+match_1back+mismatch_2back+match_2back)",
+        },
+    },
+    "shapeMatching": {
+        "conditions": {
+            "SSS": "key_press == correct_response and response_time >= 0.2 and trial_type == 'SSS'",
+            "SDD": "key_press == correct_response and response_time >= 0.2 and trial_type == 'SDD'",
+            "SNN": "key_press == correct_response and response_time >= 0.2 and trial_type == 'SNN'",
+            "DSD": "key_press == correct_response and response_time >= 0.2 and trial_type == 'DSD'",
+            "DDD": "key_press == correct_response and response_time >= 0.2 and trial_type == 'DDD'",
+            "DDS": "key_press == correct_response and response_time >= 0.2 and trial_type == 'DDS'",
+            "DNN": "key_press == correct_response and response_time >= 0.2 and trial_type == 'DNN'",
+        },
+        "events_order": [
+            "omission", "commission", "rt_fast", "SSS", "SDD", "SNN", "DSD", "DDD", "DDS",
+            "DNN",
+        ],
+        "rt_subset": "key_press == correct_response and response_time >= 0.2 and trial_id == 'test_trial'",
+        "contrasts": {
+            "task-baseline": "1/7*(SSS+SDD+SNN+DSD+DDD+DDS+DNN)",
+            "main_vars": "1/3*(SDD+DDD+DDS)-1/2*(SNN+DNN)",
+            "SSS": "SSS",
+            "SDD": "SDD",
+            "SNN": "SNN",
+            "DSD": "DSD",
+            "DDD": "DDD",
+            "DDS": "DDS",
+            "DNN": "DNN",
+        },
+    },
+    "spatialTS": {
+        "nuisance_subset": "trial_type != 'n/a'",
+        "conditions": {
+            "task_stay_cue_switch": "key_press == correct_response and response_time >= 0.2 and trial_type == 'tstay_cswitch'",
+            "task_stay_cue_stay": "key_press == correct_response and response_time >= 0.2 and trial_type == 'tstay_cstay'",
+            "task_switch_cue_switch": "key_press == correct_response and response_time >= 0.2 and trial_type == 'tswitch_cswitch'",
+        },
+        "events_order": [
+            "omission", "commission", "rt_fast", "task_stay_cue_switch", "task_stay_cue_stay",
+            "task_switch_cue_switch",
+        ],
+        "rt_subset": "key_press == correct_response and response_time >= 0.2 and trial_type != 'n/a'",
+        "contrasts": {
+            "task_switch_cost": "task_switch_cue_switch-task_stay_cue_switch",
+            "cue_switch_cost": "task_stay_cue_switch-task_stay_cue_stay",
+            "task_switch_cue_switch-task_stay_cue_stay": "task_switch_cue_switch-task_stay_cue_stay",
+            "task-baseline": "1/3*(task_stay_cue_switch+task_stay_cue_stay+task_switch_cue_switch)",
+        },
+    },
+    "stopSignal": {
+        "nuisance_prefix": "go_",
+        "conditions": {
+            "go": "key_press == correct_response and response_time >= 0.2 and trial_type == 'go'",
+            "stop_success": "trial_type == 'stop_success'",
+            "stop_failure": "trial_type == 'stop_failure'",
+        },
+        "events_order": [
+            "go_omission", "go_commission", "go_rt_fast", "go", "stop_success", "stop_failure",
+        ],
+        "rt_subset": "key_press == correct_response and response_time >= 0.2 and trial_type == 'go'",
+        "contrasts": {
+            "go": "go",
+            "stop_success": "stop_success",
+            "stop_failure": "stop_failure",
+            "stop_success-go": "stop_success-go",
+            "stop_failure-go": "stop_failure-go",
+            "stop_success-stop_failure": "stop_success-stop_failure",
+            "stop_failure-stop_success": "stop_failure-stop_success",
+            "task-baseline": "1/3*go + 1/3*stop_failure + 1/3*stop_success",
+        },
+    },
+    "directedForgettingWFlanker": {
+        "conditions": {
+            "incongruent_con": 'key_press == correct_response and response_time >= 0.2 and trial_type == "incongruent_con"',
+            "incongruent_pos": 'key_press == correct_response and response_time >= 0.2 and trial_type == "incongruent_pos"',
+            "incongruent_neg": 'key_press == correct_response and response_time >= 0.2 and trial_type == "incongruent_neg"',
+            "congruent_con": 'key_press == correct_response and response_time >= 0.2 and trial_type == "congruent_con"',
+            "congruent_pos": 'key_press == correct_response and response_time >= 0.2 and trial_type == "congruent_pos"',
+            "congruent_neg": 'key_press == correct_response and response_time >= 0.2 and trial_type == "congruent_neg"',
+            "memory_and_cue": 'trial_id == "test_cue" or trial_id == "test_four_letters"',
+        },
+        "durations": {"memory_and_cue": "duration"},
+        "after_confounds": ["memory_and_cue"],
+        "events_order": [
+            "omission", "commission", "rt_fast", "incongruent_con", "incongruent_pos",
+            "incongruent_neg", "congruent_con", "congruent_pos", "congruent_neg",
+        ],
+        "rt_subset": "key_press == correct_response and response_time >= 0.2 and trial_id == 'test_trial'",
+        "contrasts": {
+            "congruent_neg-congruent_con": "congruent_neg-congruent_con",
+            "incongruent_con-congruent_con": "incongruent_con-congruent_con",
+            "(incongruent_neg-incongruent_con)-(congruent_neg-congruent_con)": "1/2*(incongruent_neg+congruent_con)-1/2*(incongruent_con+congruent_neg)",
+            "congruent_pos": "congruent_pos",
+            "congruent_neg": "congruent_neg",
+            "congruent_con": "congruent_con",
+            "incongruent_pos": "incongruent_pos",
+            "incongruent_neg": "incongruent_neg",
+            "incongruent_con": "incongruent_con",
+            "task-baseline": "1/7*(congruent_pos+congruent_neg+congruent_con+incongruent_pos+incongruent_neg+incongruent_con+memory_and_cue)",  # memory_and_cue
+        },
+    },
+    "stopSignalWDirectedForgetting": {
+        "nuisance_prefix": "go_",
+        "conditions": {
+            "go_pos": "key_press == correct_response and response_time >= 0.2 and trial_type == 'go_pos'",
+            "go_neg": "key_press == correct_response and response_time >= 0.2 and trial_type == 'go_neg'",
+            "go_con": "key_press == correct_response and response_time >= 0.2 and trial_type == 'go_con'",
+            "stop_success_pos": "trial_type == 'stop_success_pos'",
+            "stop_success_neg": "trial_type == 'stop_success_neg'",
+            "stop_success_con": "trial_type == 'stop_success_con'",
+            "stop_failure_pos": "trial_type == 'stop_failure_pos'",
+            "stop_failure_neg": "trial_type == 'stop_failure_neg'",
+            "stop_failure_con": "trial_type == 'stop_failure_con'",
+            "memory_and_cue": 'trial_id == "test_stim" or trial_id == "test_cue"',
+        },
+        "durations": {"memory_and_cue": "duration"},
+        "after_confounds": ["memory_and_cue"],
+        "rt_subset": "key_press == correct_response and response_time >= 0.2 and trial_id == 'test_trial'",
+        "contrasts": {
+            "(stop_success_con+stop_success_pos+stop_success_neg)-(go_con+go_pos_+go_neg)": "1/3*(stop_success_con+stop_success_pos+stop_success_neg)-1/3*(go_con+go_pos+go_neg)",
+            "(stop_failure_con+stop_failure_pos+stop_failure_neg)-(go_con+go_pos_+go_neg)": "1/3*(stop_failure_con+stop_failure_pos+stop_failure_neg)-1/3*(go_con+go_pos+go_neg)",
+            "(stop_success_neg-go_neg)-(stop_success_con-go_con)": "1/2*(stop_success_neg-go_neg)-1/2*(stop_success_con-go_con)",
+            "(stop_failure_neg-go_neg)-(stop_failure_con-go_con)": "1/2*(stop_failure_neg-go_neg)-1/2*(stop_failure_con-go_con)",
+            "go_neg-go_con": "go_neg-go_con",
+            "stop_success_con-go_con": "stop_success_con-go_con",
+            "go_pos": "go_pos",
+            "go_neg": "go_neg",
+            "go_con": "go_con",
+            "stop_success_pos": "stop_success_pos",
+            "stop_success_neg": "stop_success_neg",
+            "stop_success_con": "stop_success_con",
+            "stop_failure_pos": "stop_failure_pos",
+            "stop_failure_neg": "stop_failure_neg",
+            "stop_failure_con": "stop_failure_con",
+            "task-baseline": "1/10*(go_pos+go_neg+go_con+stop_success_pos+stop_success_neg+stop_success_con+stop_failure_pos+stop_failure_neg+stop_failure_con+memory_and_cue)",  # memory_and_cue
+        },
+    },
+    "stopSignalWFlanker": {
+        "nuisance_prefix": "go_",
+        "conditions": {
+            "go_incongruent": "key_press == correct_response and response_time >= 0.2 and trial_type == 'go_incongruent'",
+            "go_congruent": "key_press == correct_response and response_time >= 0.2 and trial_type == 'go_congruent'",
+            "stop_success_incongruent": "trial_type == 'stop_success_incongruent'",
+            "stop_success_congruent": "trial_type == 'stop_success_congruent'",
+            "stop_failure_incongruent": "trial_type == 'stop_failure_incongruent'",
+            "stop_failure_congruent": "trial_type == 'stop_failure_congruent'",
+        },
+        "events_order": [
+            "go_congruent", "go_incongruent", "stop_success_congruent",
+            "stop_success_incongruent", "stop_failure_congruent", "stop_failure_incongruent",
+            "go_omission", "go_commission", "go_rt_fast",
+        ],
+        "rt_subset": "key_press == correct_response and response_time >= 0.2 and (trial_type == 'go_congruent' or trial_type == 'go_incongruent')",
+        "contrasts": {
+            "(stop_success_congruent+stop_success_incongruent)-(go_congruent+go_incongruent)": "1/2*(stop_success_congruent+stop_success_incongruent)-1/2*(go_congruent+go_incongruent)",
+            "(stop_failure_congruent+stop_failure_incongruent)-(go_congruent+go_incongruent)": "1/2*(stop_failure_congruent+stop_failure_incongruent)-1/2*(go_congruent+go_incongruent)",
+            "(stop_success_incongruent-go_incongruent)-(stop_success_congruent-go_congruent)": "1/2*(stop_success_incongruent-go_incongruent)-1/2*(stop_success_congruent-go_congruent)",
+            "(stop_failure_incongruent-go_incongruent)-(stop_failure_congruent-go_congruent)": "1/2*(stop_failure_incongruent-go_incongruent)-1/2*(stop_failure_congruent-go_congruent)",
+            "stop_success_congruent-go_congruent": "stop_success_congruent-go_congruent",
+            "go_incongruent-go_congruent": "go_incongruent-go_congruent",
+            "go_congruent": "go_congruent",
+            "go_incongruent": "go_incongruent",
+            "stop_success_congruent": "stop_success_congruent",
+            "stop_success_incongruent": "stop_success_incongruent",
+            "stop_failure_congruent": "stop_failure_congruent",
+            "stop_failure_incongruent": "stop_failure_incongruent",
+            "task-baseline": "1/6*(go_congruent+go_incongruent+stop_success_congruent+stop_success_incongruent+stop_failure_congruent+stop_failure_incongruent)",
+        },
+    },
+    "spatialTSWCuedTS": {
+        "nuisance_subset": "trial_type != 'n/a'",
+        "conditions": {
+            "cuedtstaycstay_spatialtstaycstay": 'trial_type == "cuedtstaycstay_spatialtstaycstay" and key_press == correct_response and response_time >= 0.2',
+            "cuedtstaycstay_spatialtstaycswitch": 'trial_type == "cuedtstaycstay_spatialtstaycswitch" and key_press == correct_response and response_time >= 0.2',
+            "cuedtstaycstay_spatialtswitchcswitch": 'trial_type == "cuedtstaycstay_spatialtswitchcswitch" and key_press == correct_response and response_time >= 0.2',
+            "cuedtstaycswitch_spatialtstaycstay": 'trial_type == "cuedtstaycswitch_spatialtstaycstay" and key_press == correct_response and response_time >= 0.2',
+            "cuedtstaycswitch_spatialtstaycswitch": 'trial_type == "cuedtstaycswitch_spatialtstaycswitch" and key_press == correct_response and response_time >= 0.2',
+            "cuedtstaycswitch_spatialtswitchcswitch": 'trial_type == "cuedtstaycswitch_spatialtswitchcswitch" and key_press == correct_response and response_time >= 0.2',
+            "cuedtswitchcswitch_spatialtstaycstay": 'trial_type == "cuedtswitchcswitch_spatialtstaycstay" and key_press == correct_response and response_time >= 0.2',
+            "cuedtswitchcswitch_spatialtstaycswitch": 'trial_type == "cuedtswitchcswitch_spatialtstaycswitch" and key_press == correct_response and response_time >= 0.2',
+            "cuedtswitchcswitch_spatialtswitchcswitch": 'trial_type == "cuedtswitchcswitch_spatialtswitchcswitch" and key_press == correct_response and response_time >= 0.2',
+        },
+        "rt_subset": "trial_id == 'test_trial' and trial_type != 'n/a' and key_press == correct_response and response_time >= 0.2",
+        "contrasts": {
+            #each trial type - baseline
+            "cuedtstaycstay_spatialtstaycstay": "cuedtstaycstay_spatialtstaycstay",
+            "cuedtstaycstay_spatialtstaycswitch": "cuedtstaycstay_spatialtstaycswitch",
+            "cuedtstaycstay_spatialtswitchcswitch": "cuedtstaycstay_spatialtswitchcswitch",
+            "cuedtstaycswitch_spatialtstaycstay": "cuedtstaycswitch_spatialtstaycstay",
+            "cuedtstaycswitch_spatialtstaycswitch": "cuedtstaycswitch_spatialtstaycswitch",
+            "cuedtstaycswitch_spatialtswitchcswitch": "cuedtstaycswitch_spatialtswitchcswitch",
+            "cuedtswitchcswitch_spatialtstaycstay": "cuedtswitchcswitch_spatialtstaycstay",
+            "cuedtswitchcswitch_spatialtstaycswitch": "cuedtswitchcswitch_spatialtstaycswitch",
+            "cuedtswitchcswitch_spatialtswitchcswitch": "cuedtswitchcswitch_spatialtswitchcswitch",
+            #cue switch cost for cuedTS
+            "cuedtstaycswitch_spatialtstaycstay-cuedtstaycstay_spatialtstaycstay": "cuedtstaycswitch_spatialtstaycstay-cuedtstaycstay_spatialtstaycstay",
+            #task switch cost for cuedTS
+            "cuedtswitchcswitch_spatialtstaycstay-cuedtstaycswitch_spatialtstaycstay": "cuedtswitchcswitch_spatialtstaycstay-cuedtstaycswitch_spatialtstaycstay",
+            #cue switch cost for spatialTS
+            "cuedtstaycstay_spatialtstaycswitch-cuedtstaycstay_spatialtstaycstay": "cuedtstaycstay_spatialtstaycswitch-cuedtstaycstay_spatialtstaycstay",
+            #task switch cost for spatialTS
+            "cuedtstaycstay_spatialtswitchcswitch-cuedtstaycstay_spatialtstaycswitch": "cuedtstaycstay_spatialtswitchcswitch-cuedtstaycstay_spatialtstaycswitch",
+            #cue switch cost for cuedTS averaged across other trials
+            "(cuedtstaycswitch_spatialtstaycstay+cuedtstaycswitch_spatialtstaycswitch+cuedtstaycswitch_spatialtswitchcswitch)-(cuedtstaycstay_spatialtstaycstay+cuedtstaycstay_spatialtstaycswitch+cuedtstaycstay_spatialtswitchcswitch)":
+            "1/3*(cuedtstaycswitch_spatialtstaycstay+cuedtstaycswitch_spatialtstaycswitch+cuedtstaycswitch_spatialtswitchcswitch)-1/3*(cuedtstaycstay_spatialtstaycstay+cuedtstaycstay_spatialtstaycswitch+cuedtstaycstay_spatialtswitchcswitch)",
+            #task switch cost for cuedTS averaged across other trials
+            "(cuedtswitchcswitch_spatialtstaycstay+cuedtswitchcswitch_spatialtstaycswitch+cuedtswitchcswitch_spatialtswitchcswitch)-(cuedtstaycswitch_spatialtstaycstay+cuedtstaycswitch_spatialtstaycswitch+cuedtstaycswitch_spatialtswitchcswitch)":
+            "1/3*(cuedtswitchcswitch_spatialtstaycstay+cuedtswitchcswitch_spatialtstaycswitch+cuedtswitchcswitch_spatialtswitchcswitch)-1/3*(cuedtstaycswitch_spatialtstaycstay+cuedtstaycswitch_spatialtstaycswitch+cuedtstaycswitch_spatialtswitchcswitch)",
+            #cue switch cost for spatialTS averaged across other trials
+            "(cuedtstaycstay_spatialtstaycswitch+cuedtstaycswitch_spatialtstaycswitch+cuedtswitchcswitch_spatialtstaycswitch)-(cuedtstaycstay_spatialtstaycstay+cuedtstaycswitch_spatialtstaycstay+cuedtswitchcswitch_spatialtstaycstay)":
+            "1/3*(cuedtstaycstay_spatialtstaycswitch+cuedtstaycswitch_spatialtstaycswitch+cuedtswitchcswitch_spatialtstaycswitch)-1/3*(cuedtstaycstay_spatialtstaycstay+cuedtstaycswitch_spatialtstaycstay+cuedtswitchcswitch_spatialtstaycstay)",
+            #task switch cost for spatialTS averaged across other trials
+            "(cuedtstaycstay_spatialtswitchcswitch+cuedtstaycswitch_spatialtswitchcswitch+cuedtswitchcswitch_spatialtswitchcswitch)-(cuedtstaycstay_spatialtstaycswitch+cuedtstaycswitch_spatialtstaycswitch+cuedtswitchcswitch_spatialtstaycswitch)":
+            "1/3*(cuedtstaycstay_spatialtswitchcswitch+cuedtstaycswitch_spatialtswitchcswitch+cuedtswitchcswitch_spatialtswitchcswitch)-1/3*(cuedtstaycstay_spatialtstaycswitch+cuedtstaycswitch_spatialtstaycswitch+cuedtswitchcswitch_spatialtstaycswitch)",
+            #interaction for cue switch cost
+            "(cuedtstaycswitch_spatialtstaycswitch-cuedtstaycstay_spatialtstaycswitch)-(cuedtstaycswitch_spatialtstaycstay-cuedtstaycstay_spatialtstaycstay)":
+            "1/2*(cuedtstaycswitch_spatialtstaycswitch-cuedtstaycstay_spatialtstaycswitch)-1/2*(cuedtstaycswitch_spatialtstaycstay-cuedtstaycstay_spatialtstaycstay)",
+            #interaction for task switch cost
+            "(cuedtswitchcswitch_spatialtswitchcswitch-cuedtstaycswitch_spatialtswitchcswitch)-(cuedtswitchcswitch_spatialtstaycswitch-cuedtstaycswitch_spatialtstaycswitch)":
+            "1/2*(cuedtswitchcswitch_spatialtswitchcswitch-cuedtstaycswitch_spatialtswitchcswitch)-1/2*(cuedtswitchcswitch_spatialtstaycswitch-cuedtstaycswitch_spatialtstaycswitch)",
+            #task - baseline
+            "task-baseline": "1/9*(cuedtstaycstay_spatialtstaycstay+cuedtstaycstay_spatialtstaycswitch+cuedtstaycstay_spatialtswitchcswitch+cuedtstaycswitch_spatialtstaycstay+cuedtstaycswitch_spatialtstaycswitch+cuedtstaycswitch_spatialtswitchcswitch+cuedtswitchcswitch_spatialtstaycstay+cuedtswitchcswitch_spatialtstaycswitch+cuedtswitchcswitch_spatialtswitchcswitch)",
+        },
+    },
+    "flankerWShapeMatching": {
+        "conditions": {
+            "congruent_SSS": 'trial_type == "congruent_SSS" and key_press == correct_response and response_time >= 0.2',
+            "congruent_SDD": 'trial_type == "congruent_SDD" and key_press == correct_response and response_time >= 0.2',
+            "congruent_SNN": 'trial_type == "congruent_SNN" and key_press == correct_response and response_time >= 0.2',
+            "congruent_DSD": 'trial_type == "congruent_DSD" and key_press == correct_response and response_time >= 0.2',
+            "congruent_DNN": 'trial_type == "congruent_DNN" and key_press == correct_response and response_time >= 0.2',
+            "congruent_DDD": 'trial_type == "congruent_DDD" and key_press == correct_response and response_time >= 0.2',
+            "congruent_DDS": 'trial_type == "congruent_DDS" and key_press == correct_response and response_time >= 0.2',
+            "incongruent_SSS": 'trial_type == "incongruent_SSS" and key_press == correct_response and response_time >= 0.2',
+            "incongruent_SDD": 'trial_type == "incongruent_SDD" and key_press == correct_response and response_time >= 0.2',
+            "incongruent_SNN": 'trial_type == "incongruent_SNN" and key_press == correct_response and response_time >= 0.2',
+            "incongruent_DSD": 'trial_type == "incongruent_DSD" and key_press == correct_response and response_time >= 0.2',
+            "incongruent_DNN": 'trial_type == "incongruent_DNN" and key_press == correct_response and response_time >= 0.2',
+            "incongruent_DDD": 'trial_type == "incongruent_DDD" and key_press == correct_response and response_time >= 0.2',
+            "incongruent_DDS": 'trial_type == "incongruent_DDS" and key_press == correct_response and response_time >= 0.2',
+        },
+        "rt_subset": "trial_id == 'test_trial' and trial_type != 'n/a' and key_press == correct_response and response_time >= 0.2",
+        "contrasts": {
+            #each trial type - baseline
+            "congruent_SSS": "congruent_SSS",
+            "congruent_SDD": "congruent_SDD",
+            "congruent_SNN": "congruent_SNN",
+            "congruent_DSD": "congruent_DSD",
+            "congruent_DNN": "congruent_DNN",
+            "congruent_DDD": "congruent_DDD",
+            "congruent_DDS": "congruent_DDS",
+            "incongruent_SSS": "incongruent_SSS",
+            "incongruent_SDD": "incongruent_SDD",
+            "incongruent_SNN": "incongruent_SNN",
+            "incongruent_DSD": "incongruent_DSD",
+            "incongruent_DNN": "incongruent_DNN",
+            "incongruent_DDD": "incongruent_DDD",
+            "incongruent_DDS": "incongruent_DDS",
+            #incongruent-congruent while shapeMatching is "off"
+            "(incongruent_SNN+incongruent_DNN)-(congruent_SNN+congruent_DNN)": "1/2*(incongruent_SNN+incongruent_DNN)-1/2*(congruent_SNN+congruent_DNN)",
+            #main vars while flanker is "off"
+            "(congruent_SDD+congruent_DDD+congruent_DDS)-(congruent_SNN+congruent_DNN)": "1/3*(congruent_SDD+congruent_DDD+congruent_DDS)-1/2*(congruent_SNN+congruent_DNN)",
+            #incongruent-congruent across all other trial types in shapeMatching
+            "(incongruent_SSS+incongruent_SDD+incongruent_SNN+incongruent_DSD+incongruent_DNN+incongruent_DDD+incongruent_DDS)-(congruent_SSS+congruent_SDD+congruent_SNN+congruent_DSD+congruent_DNN+congruent_DDD+congruent_DDS)":
+            "1/7*(incongruent_SSS+incongruent_SDD+incongruent_SNN+incongruent_DSD+incongruent_DNN+incongruent_DDD+incongruent_DDS)-1/7*(congruent_SSS+congruent_SDD+congruent_SNN+congruent_DSD+congruent_DNN+congruent_DDD+congruent_DDS)",
+            #main vars across all other flanker trial types
+            "(congruent_SDD+congruent_DDD+congruent_DDS+incongruent_SDD+incongruent_DDD+incongruent_DDS)-(congruent_SNN+congruent_DNN+incongruent_SNN+incongruent_DNN)":
+            "1/6*(congruent_SDD+congruent_DDD+congruent_DDS+incongruent_SDD+incongruent_DDD+incongruent_DDS)-1/4*(congruent_SNN+congruent_DNN+incongruent_SNN+incongruent_DNN)",
+            #interaction for each trial type
+            "((incongruent_SDD+incongruent_DDD+incongruent_DDS)-(congruent_SDD+congruent_DDD+congruent_DDS))-((incongruent_SNN+incongruent_DNN)-(congruent_SNN+congruent_DNN))":
+            "(1/3*(incongruent_SDD+incongruent_DDD+incongruent_DDS)-1/3*(congruent_SDD+congruent_DDD+congruent_DDS))-(1/2*(incongruent_SNN+incongruent_DNN)-1/2*(congruent_SNN+congruent_DNN))",
+            #task - baseline
+            "task-baseline": "1/14*(congruent_SSS+congruent_SDD+congruent_SNN+congruent_DSD+congruent_DNN+congruent_DDD+congruent_DDS+incongruent_SSS+incongruent_SDD+incongruent_SNN+incongruent_DSD+incongruent_DNN+incongruent_DDD+incongruent_DDS)",
+        },
+    },
+    "cuedTSWFlanker": {
+        "nuisance_subset": '"cn/a_tn/a" not in trial_type',
+        "conditions": {
+            "cstay_tstay_congruent": 'trial_type == "cstay_tstay_congruent" and key_press == correct_response and response_time >= 0.2',
+            "cstay_tstay_incongruent": 'trial_type == "cstay_tstay_incongruent" and key_press == correct_response and response_time >= 0.2',
+            "cswitch_tswitch_congruent": 'trial_type == "cswitch_tswitch_congruent" and key_press == correct_response and response_time >= 0.2',
+            "cswitch_tswitch_incongruent": 'trial_type == "cswitch_tswitch_incongruent" and key_press == correct_response and response_time >= 0.2',
+            "cswitch_tstay_congruent": 'trial_type == "cswitch_tstay_congruent" and key_press == correct_response and response_time >= 0.2',
+            "cswitch_tstay_incongruent": 'trial_type == "cswitch_tstay_incongruent" and key_press == correct_response and response_time >= 0.2',
+        },
+        "rt_subset": "trial_id == 'test_trial' and trial_type != 'n/a' and key_press == correct_response and response_time >= 0.2",
+        "contrasts": {
+            #each trial type - baseline
+            "cstay_tstay_congruent": "cstay_tstay_congruent",
+            "cstay_tstay_incongruent": "cstay_tstay_incongruent",
+            "cswitch_tswitch_congruent": "cswitch_tswitch_congruent",
+            "cswitch_tswitch_incongruent": "cswitch_tswitch_incongruent",
+            "cswitch_tstay_congruent": "cswitch_tstay_congruent",
+            "cswitch_tstay_incongruent": "cswitch_tstay_incongruent",
+            #incongruent-congruent while cuedTS is "off"
+            "cstay_tstay_incongruent-cstay_tstay_congruent": "cstay_tstay_incongruent-cstay_tstay_congruent",
+            #cue switch cost while flanker is "off"
+            "cswitch_tstay_congruent-cstay_tstay_congruent": "cswitch_tstay_congruent-cstay_tstay_congruent",
+            #task switch cost while flanker is "off"
+            "cswitch_tswitch_congruent-cswitch_tstay_congruent": "cswitch_tswitch_congruent-cswitch_tstay_congruent",
+            #incongruent-congruent across all cuedTS trial types
+            "(cstay_tstay_incongruent+cswitch_tswitch_incongruent+cswitch_tstay_incongruent)-(cstay_tstay_congruent+cswitch_tswitch_congruent+cswitch_tstay_congruent)":
+            "1/3*(cstay_tstay_incongruent+cswitch_tswitch_incongruent+cswitch_tstay_incongruent)-1/3*(cstay_tstay_congruent+cswitch_tswitch_congruent+cswitch_tstay_congruent)",
+            #cue switch cost across all flanker trial types
+            "(cswitch_tstay_congruent+cswitch_tstay_incongruent)-(cstay_tstay_congruent+cstay_tstay_incongruent)":
+            "1/2*(cswitch_tstay_congruent+cswitch_tstay_incongruent)-1/2*(cstay_tstay_congruent+cstay_tstay_incongruent)",
+            #task switch cost across all flanker trial types
+            "(cswitch_tswitch_congruent+cswitch_tswitch_incongruent)-(cswitch_tstay_congruent+cswitch_tstay_incongruent)":
+            "1/2*(cswitch_tswitch_congruent+cswitch_tswitch_incongruent)-1/2*(cswitch_tstay_congruent+cswitch_tstay_incongruent)",
+            #interaction for cue switch cost
+            "(cswitch_tstay_incongruent-cstay_tstay_incongruent)-(cswitch_tstay_congruent-cstay_tstay_congruent)":
+            "1/2*(cswitch_tstay_incongruent-cstay_tstay_incongruent)-1/2*(cswitch_tstay_congruent-cstay_tstay_congruent)",
+            #interaction for task switch cost
+            "(cswitch_tswitch_incongruent-cswitch_tstay_incongruent)-(cswitch_tswitch_congruent-cswitch_tstay_congruent)":
+            "1/2*(cswitch_tswitch_incongruent-cswitch_tstay_incongruent)-1/2*(cswitch_tswitch_congruent-cswitch_tstay_congruent)",
+            #task - baseline
+            "task-baseline": "1/6*(cstay_tstay_congruent+cstay_tstay_incongruent+cswitch_tswitch_congruent+cswitch_tswitch_incongruent+cswitch_tstay_congruent+cswitch_tstay_incongruent)",
+        },
+    },
+    "spatialTSWShapeMatching": {
+        "nuisance_subset": 'trial_type != "n/a"',
+        "conditions": {
+            "tstay_cstay_SSS": 'trial_type == "tstay_cstay_SSS" and key_press == correct_response and response_time >= 0.2',
+            "tstay_cstay_SDD": 'trial_type == "tstay_cstay_SDD" and key_press == correct_response and response_time >= 0.2',
+            "tstay_cstay_SNN": 'trial_type == "tstay_cstay_SNN" and key_press == correct_response and response_time >= 0.2',
+            "tstay_cstay_DSD": 'trial_type == "tstay_cstay_DSD" and key_press == correct_response and response_time >= 0.2',
+            "tstay_cstay_DNN": 'trial_type == "tstay_cstay_DNN" and key_press == correct_response and response_time >= 0.2',
+            "tstay_cstay_DDD": 'trial_type == "tstay_cstay_DDD" and key_press == correct_response and response_time >= 0.2',
+            "tstay_cstay_DDS": 'trial_type == "tstay_cstay_DDS" and key_press == correct_response and response_time >= 0.2',
+            "tstay_cswitch_SSS": 'trial_type == "tstay_cswitch_SSS" and key_press == correct_response and response_time >= 0.2',
+            "tstay_cswitch_SDD": 'trial_type == "tstay_cswitch_SDD" and key_press == correct_response and response_time >= 0.2',
+            "tstay_cswitch_SNN": 'trial_type == "tstay_cswitch_SNN" and key_press == correct_response and response_time >= 0.2',
+            "tstay_cswitch_DSD": 'trial_type == "tstay_cswitch_DSD" and key_press == correct_response and response_time >= 0.2',
+            "tstay_cswitch_DNN": 'trial_type == "tstay_cswitch_DNN" and key_press == correct_response and response_time >= 0.2',
+            "tstay_cswitch_DDD": 'trial_type == "tstay_cswitch_DDD" and key_press == correct_response and response_time >= 0.2',
+            "tstay_cswitch_DDS": 'trial_type == "tstay_cswitch_DDS" and key_press == correct_response and response_time >= 0.2',
+            "tswitch_cswitch_SSS": 'trial_type == "tswitch_cswitch_SSS" and key_press == correct_response and response_time >= 0.2',
+            "tswitch_cswitch_SDD": 'trial_type == "tswitch_cswitch_SDD" and key_press == correct_response and response_time >= 0.2',
+            "tswitch_cswitch_SNN": 'trial_type == "tswitch_cswitch_SNN" and key_press == correct_response and response_time >= 0.2',
+            "tswitch_cswitch_DSD": 'trial_type == "tswitch_cswitch_DSD" and key_press == correct_response and response_time >= 0.2',
+            "tswitch_cswitch_DNN": 'trial_type == "tswitch_cswitch_DNN" and key_press == correct_response and response_time >= 0.2',
+            "tswitch_cswitch_DDD": 'trial_type == "tswitch_cswitch_DDD" and key_press == correct_response and response_time >= 0.2',
+            "tswitch_cswitch_DDS": 'trial_type == "tswitch_cswitch_DDS" and key_press == correct_response and response_time >= 0.2',
+        },
+        "rt_subset": "trial_id == 'test_trial' and trial_type != 'n/a' and key_press == correct_response and response_time >= 0.2",
+        "contrasts": {
+            #each trial type - baseline
+            "tstay_cstay_SSS": "tstay_cstay_SSS",
+            "tstay_cstay_SDD": "tstay_cstay_SDD",
+            "tstay_cstay_SNN": "tstay_cstay_SNN",
+            "tstay_cstay_DSD": "tstay_cstay_DSD",
+            "tstay_cstay_DNN": "tstay_cstay_DNN",
+            "tstay_cstay_DDD": "tstay_cstay_DDD",
+            "tstay_cstay_DDS": "tstay_cstay_DDS",
+            "tstay_cswitch_SSS": "tstay_cswitch_SSS",
+            "tstay_cswitch_SDD": "tstay_cswitch_SDD",
+            "tstay_cswitch_SNN": "tstay_cswitch_SNN",
+            "tstay_cswitch_DSD": "tstay_cswitch_DSD",
+            "tstay_cswitch_DNN": "tstay_cswitch_DNN",
+            "tstay_cswitch_DDD": "tstay_cswitch_DDD",
+            "tstay_cswitch_DDS": "tstay_cswitch_DDS",
+            "tswitch_cswitch_SSS": "tswitch_cswitch_SSS",
+            "tswitch_cswitch_SDD": "tswitch_cswitch_SDD",
+            "tswitch_cswitch_SNN": "tswitch_cswitch_SNN",
+            "tswitch_cswitch_DSD": "tswitch_cswitch_DSD",
+            "tswitch_cswitch_DNN": "tswitch_cswitch_DNN",
+            "tswitch_cswitch_DDD": "tswitch_cswitch_DDD",
+            "tswitch_cswitch_DDS": "tswitch_cswitch_DDS",
+            #spatialTS cue switch cost while shapeMatching is "off"
+            "(tstay_cswitch_SNN+tstay_cswitch_DNN)-(tstay_cstay_SNN+tstay_cstay_DNN)": "1/2*(tstay_cswitch_SNN+tstay_cswitch_DNN)-1/2*(tstay_cstay_SNN+tstay_cstay_DNN)",
+            #spatialTS task switch cost while shapeMatching is "off"
+            "(tswitch_cswitch_SNN+tswitch_cswitch_DNN)-(tstay_cswitch_SNN+tstay_cswitch_DNN)": "1/2*(tswitch_cswitch_SNN+tswitch_cswitch_DNN)-1/2*(tstay_cswitch_SNN+tstay_cswitch_DNN)",
+            #main vars while spatialTS is "off"
+            "(tstay_cstay_SDD+tstay_cstay_DDD+tstay_cstay_DDS)-(tstay_cstay_SNN+tstay_cstay_DNN)": "1/3*(tstay_cstay_SDD+tstay_cstay_DDD+tstay_cstay_DDS)-1/2*(tstay_cstay_SNN+tstay_cstay_DNN)",
+            #spatialTS cue switch cost across all other shapeMatching trial types
+            "(tstay_cswitch_SSS+tstay_cswitch_SDD+tstay_cswitch_SNN+tstay_cswitch_DSD+tstay_cswitch_DNN+tstay_cswitch_DDD+tstay_cswitch_DDS)-(tstay_cstay_SSS+tstay_cstay_SDD+tstay_cstay_SNN+tstay_cstay_DSD+tstay_cstay_DNN+tstay_cstay_DDD+tstay_cstay_DDS)":
+            "1/7*(tstay_cswitch_SSS+tstay_cswitch_SDD+tstay_cswitch_SNN+tstay_cswitch_DSD+tstay_cswitch_DNN+tstay_cswitch_DDD+tstay_cswitch_DDS)-1/7*(tstay_cstay_SSS+tstay_cstay_SDD+tstay_cstay_SNN+tstay_cstay_DSD+tstay_cstay_DNN+tstay_cstay_DDD+tstay_cstay_DDS)",
+            #spatialTS task switch cost across all other shapeMatching trial types
+            "(tswitch_cswitch_SSS+tswitch_cswitch_SDD+tswitch_cswitch_SNN+tswitch_cswitch_DSD+tswitch_cswitch_DNN+tswitch_cswitch_DDD+tswitch_cswitch_DDS)-(tstay_cswitch_SSS+tstay_cswitch_SDD+tstay_cswitch_SNN+tstay_cswitch_DSD+tstay_cswitch_DNN+tstay_cswitch_DDD+tstay_cswitch_DDS)":
+            "1/7*(tswitch_cswitch_SSS+tswitch_cswitch_SDD+tswitch_cswitch_SNN+tswitch_cswitch_DSD+tswitch_cswitch_DNN+tswitch_cswitch_DDD+tswitch_cswitch_DDS)-1/7*(tstay_cswitch_SSS+tstay_cswitch_SDD+tstay_cswitch_SNN+tstay_cswitch_DSD+tstay_cswitch_DNN+tstay_cswitch_DDD+tstay_cswitch_DDS)",
+            #main vars across all other spatialTS trial types
+            "(tstay_cstay_SDD+tstay_cstay_DDD+tstay_cstay_DDS+tstay_cswitch_SDD+tstay_cswitch_DDD+tstay_cswitch_DDS+tswitch_cswitch_SDD+tswitch_cswitch_DDD+tswitch_cswitch_DDS)-(tstay_cstay_SNN+tstay_cstay_DNN+tstay_cswitch_SNN+tstay_cswitch_DNN+tswitch_cswitch_SNN+tswitch_cswitch_DNN)":
+            "1/9*(tstay_cstay_SDD+tstay_cstay_DDD+tstay_cstay_DDS+tstay_cswitch_SDD+tstay_cswitch_DDD+tstay_cswitch_DDS+tswitch_cswitch_SDD+tswitch_cswitch_DDD+tswitch_cswitch_DDS)-1/6*(tstay_cstay_SNN+tstay_cstay_DNN+tstay_cswitch_SNN+tstay_cswitch_DNN+tswitch_cswitch_SNN+tswitch_cswitch_DNN)",
+            #interaction for cue switch cost
+            "((tstay_cswitch_SDD+tstay_cswitch_DDD+tstay_cswitch_DDS)-(tstay_cstay_SDD+tstay_cstay_DDD+tstay_cstay_DDS))-((tstay_cswitch_SNN+tstay_cswitch_DNN)-(tstay_cstay_SNN+tstay_cstay_DNN))":
+            "1/3*(tstay_cswitch_SDD+tstay_cswitch_DDD+tstay_cswitch_DDS)-1/3*(tstay_cstay_SDD+tstay_cstay_DDD+tstay_cstay_DDS)-1/2*(tstay_cswitch_SNN+tstay_cswitch_DNN)+1/2*(tstay_cstay_SNN+tstay_cstay_DNN)",
+            #interaction for task switch cost
+            "((tswitch_cswitch_SDD+tswitch_cswitch_DDD+tswitch_cswitch_DDS)-(tstay_cswitch_SDD+tstay_cswitch_DDD+tstay_cswitch_DDS))-((tswitch_cswitch_SNN+tswitch_cswitch_DNN)-(tstay_cswitch_SNN+tstay_cswitch_DNN))":
+            "1/3*(tswitch_cswitch_SDD+tswitch_cswitch_DDD+tswitch_cswitch_DDS)-1/3*(tstay_cswitch_SDD+tstay_cswitch_DDD+tstay_cswitch_DDS)-1/2*(tswitch_cswitch_SNN+tswitch_cswitch_DNN)+1/2*(tstay_cswitch_SNN+tstay_cswitch_DNN)",
+            #task - baseline
+            "task-baseline": "1/21*(tstay_cstay_SSS+tstay_cstay_SDD+tstay_cstay_SNN+tstay_cstay_DSD+tstay_cstay_DNN+tstay_cstay_DDD+tstay_cstay_DDS+" +
+                            "tstay_cswitch_SSS+tstay_cswitch_SDD+tstay_cswitch_SNN+tstay_cswitch_DSD+tstay_cswitch_DNN+tstay_cswitch_DDD+tstay_cswitch_DDS+" +
+                            "tswitch_cswitch_SSS+tswitch_cswitch_SDD+tswitch_cswitch_SNN+tswitch_cswitch_DSD+tswitch_cswitch_DNN+tswitch_cswitch_DDD+tswitch_cswitch_DDS)",
+            },
+    },
+    "nBackWShapeMatching": {
+        "nuisance_subset": 'trial_type != "n/a"',
+        "conditions": {
+            "match_td_same_1back": 'trial_type == "match_td_same_1back" and key_press == correct_response and response_time >=0.2',
+            "match_td_same_2back": 'trial_type == "match_td_same_2back" and key_press == correct_response and response_time >= 0.2',
+            "match_td_diff_1back": 'trial_type == "match_td_diff_1back" and key_press == correct_response and response_time >= 0.2',
+            "match_td_diff_2back": 'trial_type == "match_td_diff_2back" and key_press == correct_response and response_time >= 0.2',
+            "match_td_na_1back": 'trial_type == "match_td_na_1back" and key_press == correct_response and response_time >= 0.2',
+            "match_td_na_2back": 'trial_type == "match_td_na_2back" and key_press == correct_response and response_time >= 0.2',
+            "mismatch_td_same_1back": 'trial_type == "mismatch_td_same_1back" and key_press == correct_response and response_time >= 0.2',
+            "mismatch_td_same_2back": 'trial_type == "mismatch_td_same_2back" and key_press == correct_response and response_time >= 0.2',
+            "mismatch_td_diff_1back": 'trial_type == "mismatch_td_diff_1back" and key_press == correct_response and response_time >= 0.2',
+            "mismatch_td_diff_2back": 'trial_type == "mismatch_td_diff_2back" and key_press == correct_response and response_time >= 0.2',
+            "mismatch_td_na_1back": 'trial_type == "mismatch_td_na_1back" and key_press == correct_response and response_time >= 0.2',
+            "mismatch_td_na_2back": 'trial_type == "mismatch_td_na_2back" and key_press == correct_response and response_time >= 0.2',
+        },
+        "rt_subset": "trial_id == 'test_trial' and trial_type != 'n/a' and key_press == correct_response and response_time >= 0.2",
+        "contrasts": {
+            #each trial type - baseline
+            "match_td_same_1back": "match_td_same_1back",
+            "match_td_same_2back": "match_td_same_2back",
+            "match_td_diff_1back": "match_td_diff_1back",
+            "match_td_diff_2back": "match_td_diff_2back",
+            "match_td_na_1back": "match_td_na_1back",
+            "match_td_na_2back": "match_td_na_2back",
+            "mismatch_td_same_1back": "mismatch_td_same_1back",
+            "mismatch_td_same_2back": "mismatch_td_same_2back",
+            "mismatch_td_diff_1back": "mismatch_td_diff_1back",
+            "mismatch_td_diff_2back": "mismatch_td_diff_2back",
+            "mismatch_td_na_1back": "mismatch_td_na_1back",
+            "mismatch_td_na_2back": "mismatch_td_na_2back",
+            #2back-1back when shapeMatching is "off"
+            "(match_td_na_2back+mismatch_td_na_2back)-(match_td_na_1back+mismatch_td_na_1back)":
+            "1/2*(match_td_na_2back+mismatch_td_na_2back)-1/2*(match_td_na_1back+mismatch_td_na_1back)",
+            #main vars when nBack is "off"
+            "(match_td_diff_1back+mismatch_td_diff_1back)-(match_td_na_1back+mismatch_td_na_1back)": "1/2*(match_td_diff_1back+mismatch_td_diff_1back)-1/2*(match_td_na_1back+mismatch_td_na_1back)",
+            #2back-1back across all shapeMatching trial types
+            "(match_td_same_2back+match_td_diff_2back+match_td_na_2back+mismatch_td_same_2back+mismatch_td_diff_2back+mismatch_td_na_2back)-(match_td_same_1back+match_td_diff_1back+match_td_na_1back+mismatch_td_same_1back+mismatch_td_diff_1back+mismatch_td_na_1back)":
+            "1/6*(match_td_same_2back+match_td_diff_2back+match_td_na_2back+mismatch_td_same_2back+mismatch_td_diff_2back+mismatch_td_na_2back)-1/6*(match_td_same_1back+match_td_diff_1back+match_td_na_1back+mismatch_td_same_1back+mismatch_td_diff_1back+mismatch_td_na_1back)",
+            #main vars across all other nBack trial types
+            "(match_td_diff_2back+match_td_diff_1back+mismatch_td_diff_2back+mismatch_td_diff_1back)-(match_td_na_2back+match_td_na_1back+mismatch_td_na_2back+mismatch_td_na_1back)":
+            "1/4*(match_td_diff_2back+match_td_diff_1back+mismatch_td_diff_2back+mismatch_td_diff_1back)-1/4*(match_td_na_2back+match_td_na_1back+mismatch_td_na_2back+mismatch_td_na_1back)",
+            #interaction
+            "((match_td_diff_2back+mismatch_td_diff_2back)-(match_td_na_2back+mismatch_td_na_2back))-((match_td_diff_1back+mismatch_td_diff_1back)-(match_td_na_1back+mismatch_td_na_1back))":
+            "1/2*(match_td_diff_2back+mismatch_td_diff_2back)-1/2*(match_td_na_2back+mismatch_td_na_2back)-1/2*(match_td_diff_1back+mismatch_td_diff_1back)+1/2*(match_td_na_1back+mismatch_td_na_1back)",
+            #task - baseline
+            "task-baseline": "1/12*(match_td_same_1back+match_td_same_2back+match_td_diff_1back+match_td_diff_2back+match_td_na_1back+match_td_na_2back+" +
+                            "mismatch_td_same_1back+mismatch_td_same_2back+mismatch_td_diff_1back+mismatch_td_diff_2back+mismatch_td_na_1back+mismatch_td_na_2back)",
+            },
+    },
+    "nBackWSpatialTS": {
+        "nuisance_subset": 'trial_type != "n/a"',
+        "lowercase_trial_type": True,
+        "conditions": {
+            "mismatch_tstay_cstay_1back": 'trial_type == "mismatch_tstay_cstay" and task == "1-back" and key_press == correct_response and response_time >= 0.2',
+            "mismatch_tstay_cswitch_1back": 'trial_type == "mismatch_tstay_cswitch" and task == "1-back" and key_press == correct_response and response_time >= 0.2',
+            "mismatch_tswitch_cswitch_1back": 'trial_type == "mismatch_tswitch_cswitch" and task == "1-back" and key_press == correct_response and response_time >= 0.2',
+            "match_tstay_cstay_1back": 'trial_type == "match_tstay_cstay" and task == "1-back" and key_press == correct_response and response_time >= 0.2',
+            "match_tstay_cswitch_1back": 'trial_type == "match_tstay_cswitch" and task == "1-back" and key_press == correct_response and response_time >= 0.2',
+            "match_tswitch_cswitch_1back": 'trial_type == "match_tswitch_cswitch" and task == "1-back" and key_press == correct_response and response_time >= 0.2',
+            "mismatch_tstay_cstay_2back": 'trial_type == "mismatch_tstay_cstay" and task == "2-back" and key_press == correct_response and response_time >= 0.2',
+            "mismatch_tstay_cswitch_2back": 'trial_type == "mismatch_tstay_cswitch" and task == "2-back" and key_press == correct_response and response_time >= 0.2',
+            "mismatch_tswitch_cswitch_2back": 'trial_type == "mismatch_tswitch_cswitch" and task == "2-back" and key_press == correct_response and response_time >= 0.2',
+            "match_tstay_cstay_2back": 'trial_type == "match_tstay_cstay" and task == "2-back" and key_press == correct_response and response_time >= 0.2',
+            "match_tstay_cswitch_2back": 'trial_type == "match_tstay_cswitch" and task == "2-back" and key_press == correct_response and response_time >= 0.2',
+            "match_tswitch_cswitch_2back": 'trial_type == "match_tswitch_cswitch" and task == "2-back" and key_press == correct_response and response_time >= 0.2',
+        },
+        "rt_subset": "trial_id == 'test_trial' and trial_type != 'n/a' and key_press == correct_response and response_time >= 0.2",
+        "contrasts": {
+            #each trial type - baseline
+            "mismatch_tstay_cstay_1back": "mismatch_tstay_cstay_1back",
+            "mismatch_tstay_cswitch_1back": "mismatch_tstay_cswitch_1back",
+            "mismatch_tswitch_cswitch_1back": "mismatch_tswitch_cswitch_1back",
+            "match_tstay_cstay_1back": "match_tstay_cstay_1back",
+            "match_tstay_cswitch_1back": "match_tstay_cswitch_1back",
+            "match_tswitch_cswitch_1back": "match_tswitch_cswitch_1back",
+            "mismatch_tstay_cstay_2back": "mismatch_tstay_cstay_2back",
+            "mismatch_tstay_cswitch_2back": "mismatch_tstay_cswitch_2back",
+            "mismatch_tswitch_cswitch_2back": "mismatch_tswitch_cswitch_2back",
+            "match_tstay_cstay_2back": "match_tstay_cstay_2back",
+            "match_tstay_cswitch_2back": "match_tstay_cswitch_2back",
+            "match_tswitch_cswitch_2back": "match_tswitch_cswitch_2back",
+            #2back-1back when spatialTS is "off"
+            "(match_tstay_cstay_2back+mismatch_tstay_cstay_2back)-(match_tstay_cstay_1back+mismatch_tstay_cstay_1back)":
+            "1/2*(match_tstay_cstay_2back+mismatch_tstay_cstay_2back)-1/2*(match_tstay_cstay_1back+mismatch_tstay_cstay_1back)",
+            #cue switch cost when nBack is "off"
+            "(match_tstay_cswitch_1back+mismatch_tstay_cswitch_1back)-(match_tstay_cstay_1back+mismatch_tstay_cstay_1back)":
+            "1/2*(match_tstay_cswitch_1back+mismatch_tstay_cswitch_1back)-1/2*(match_tstay_cstay_1back+mismatch_tstay_cstay_1back)",
+            #task switch cost when nBack is "off"
+            "(match_tswitch_cswitch_1back+mismatch_tswitch_cswitch_1back)-(match_tstay_cswitch_1back+mismatch_tstay_cswitch_1back)":
+            "1/2*(match_tswitch_cswitch_1back+mismatch_tswitch_cswitch_1back)-1/2*(match_tstay_cswitch_1back+mismatch_tstay_cswitch_1back)",
+            #2back-1back across all spatialTS trial types
+            "(match_tstay_cstay_2back+match_tstay_cswitch_2back+match_tswitch_cswitch_2back+mismatch_tstay_cstay_2back+mismatch_tstay_cswitch_2back+mismatch_tswitch_cswitch_2back)-(match_tstay_cstay_1back+match_tstay_cswitch_1back+match_tswitch_cswitch_1back+mismatch_tstay_cstay_1back+mismatch_tstay_cswitch_1back+mismatch_tswitch_cswitch_1back)":
+            "1/6*(match_tstay_cstay_2back+match_tstay_cswitch_2back+match_tswitch_cswitch_2back+mismatch_tstay_cstay_2back+mismatch_tstay_cswitch_2back+mismatch_tswitch_cswitch_2back)-1/6*(match_tstay_cstay_1back+match_tstay_cswitch_1back+match_tswitch_cswitch_1back+mismatch_tstay_cstay_1back+mismatch_tstay_cswitch_1back+mismatch_tswitch_cswitch_1back)",
+            #cue switch cost across all other nBack trial types
+            "(match_tstay_cswitch_1back+match_tstay_cswitch_2back+mismatch_tstay_cswitch_1back+mismatch_tstay_cswitch_2back)-(match_tstay_cstay_1back+match_tstay_cstay_2back+mismatch_tstay_cstay_1back+mismatch_tstay_cstay_2back)":
+            "1/4*(match_tstay_cswitch_1back+match_tstay_cswitch_2back+mismatch_tstay_cswitch_1back+mismatch_tstay_cswitch_2back)-1/4*(match_tstay_cstay_1back+match_tstay_cstay_2back+mismatch_tstay_cstay_1back+mismatch_tstay_cstay_2back)",
+            #task switch cost across all other nBack trial types
+            "(match_tswitch_cswitch_1back+match_tswitch_cswitch_2back+mismatch_tswitch_cswitch_1back+mismatch_tswitch_cswitch_2back)-(match_tstay_cswitch_1back+match_tstay_cswitch_2back+mismatch_tstay_cswitch_1back+mismatch_tstay_cswitch_2back)":
+            "1/4*(match_tswitch_cswitch_1back+match_tswitch_cswitch_2back+mismatch_tswitch_cswitch_1back+mismatch_tswitch_cswitch_2back)-1/4*(match_tstay_cswitch_1back+match_tstay_cswitch_2back+mismatch_tstay_cswitch_1back+mismatch_tstay_cswitch_2back)",
+            #cue switch cost interaction
+            "((match_tstay_cswitch_2back+mismatch_tstay_cswitch_2back)-(match_tstay_cstay_2back+mismatch_tstay_cstay_2back))-((match_tstay_cswitch_1back+mismatch_tstay_cswitch_1back)-(match_tstay_cstay_1back+mismatch_tstay_cstay_1back))":
+            "(1/2*(match_tstay_cswitch_2back+mismatch_tstay_cswitch_2back)-1/2*(match_tstay_cstay_2back+mismatch_tstay_cstay_2back))-(1/2*(match_tstay_cswitch_1back+mismatch_tstay_cswitch_1back)-1/2*(match_tstay_cstay_1back+mismatch_tstay_cstay_1back))",
+            #task switch cost interaction
+            "((match_tswitch_cswitch_2back+mismatch_tswitch_cswitch_2back)-(match_tstay_cswitch_2back+mismatch_tstay_cswitch_2back))-((match_tswitch_cswitch_1back+mismatch_tswitch_cswitch_1back)-(match_tstay_cswitch_1back+mismatch_tstay_cswitch_1back))":
+            "(1/2*(match_tswitch_cswitch_2back+mismatch_tswitch_cswitch_2back)-1/2*(match_tstay_cswitch_2back+mismatch_tstay_cswitch_2back))-(1/2*(match_tswitch_cswitch_1back+mismatch_tswitch_cswitch_1back)-1/2*(match_tstay_cswitch_1back+mismatch_tstay_cswitch_1back))",
+            #task - baseline
+            "task-baseline": "1/12*(mismatch_tstay_cstay_1back+mismatch_tstay_cswitch_1back+mismatch_tswitch_cswitch_1back+match_tstay_cstay_1back+match_tstay_cswitch_1back+match_tswitch_cswitch_1back+mismatch_tstay_cstay_2back+mismatch_tstay_cswitch_2back+mismatch_tswitch_cswitch_2back+match_tstay_cstay_2back+match_tstay_cswitch_2back+match_tswitch_cswitch_2back)",
+            },
+    },
+    "directedForgettingWCuedTS": {
+        "nuisance_subset": 'trial_type != "n/a"',
+        "conditions": {
+            "neg_tswitch_cswitch": 'trial_type == "neg_tswitch_cswitch" and key_press == correct_response and response_time >= 0.2',
+            "neg_tstay_cswitch": 'trial_type == "neg_tstay_cswitch" and key_press == correct_response and response_time >= 0.2',
+            "neg_tstay_cstay": 'trial_type == "neg_tstay_cstay" and key_press == correct_response and response_time >= 0.2',
+            "pos_tswitch_cswitch": 'trial_type == "pos_tswitch_cswitch" and key_press == correct_response and response_time >= 0.2',
+            "pos_tstay_cswitch": 'trial_type == "pos_tstay_cswitch" and key_press == correct_response and response_time >= 0.2',
+            "pos_tstay_cstay": 'trial_type == "pos_tstay_cstay" and key_press == correct_response and response_time >= 0.2',
+            "con_tswitch_cswitch": 'trial_type == "con_tswitch_cswitch" and key_press == correct_response and response_time >= 0.2',
+            "con_tstay_cswitch": 'trial_type == "con_tstay_cswitch" and key_press == correct_response and response_time >= 0.2',
+            "con_tstay_cstay": 'trial_type == "con_tstay_cstay" and key_press == correct_response and response_time >= 0.2',
+        },
+        "rt_subset": "trial_id == 'test_trial' and trial_type != 'n/a' and key_press == correct_response and response_time >= 0.2",
+        "contrasts": {
+            #each trial type - baseline
+            "neg_tswitch_cswitch": "neg_tswitch_cswitch",
+            "neg_tstay_cswitch": "neg_tstay_cswitch",
+            "neg_tstay_cstay": "neg_tstay_cstay",
+            "pos_tswitch_cswitch": "pos_tswitch_cswitch",
+            "pos_tstay_cswitch": "pos_tstay_cswitch",
+            "pos_tstay_cstay": "pos_tstay_cstay",
+            "con_tswitch_cswitch": "con_tswitch_cswitch",
+            "con_tstay_cswitch": "con_tstay_cswitch",
+            "con_tstay_cstay": "con_tstay_cstay",
+            #cue switch cost while directedForgetting is "off"
+            "con_tstay_cswitch-con_tstay_cstay": "con_tstay_cswitch-con_tstay_cstay",
+            #task switch cost while directedForgetting is "off"
+            "con_tswitch_cswitch-con_tstay_cswitch": "con_tswitch_cswitch-con_tstay_cswitch",
+            #directedForgetting contrast while cuedTS is "off"
+            "neg_tstay_cstay-con_tstay_cstay": "neg_tstay_cstay-con_tstay_cstay",
+            #cue switch cost across all DF conditions
+            "(neg_tstay_cswitch+pos_tstay_cswitch+con_tstay_cswitch)-(neg_tstay_cstay+pos_tstay_cstay+con_tstay_cstay)":
+            "1/3*(neg_tstay_cswitch+pos_tstay_cswitch+con_tstay_cswitch)-1/3*(neg_tstay_cstay+pos_tstay_cstay+con_tstay_cstay)",
+            #task switch cost across all DF conditions
+            "(neg_tswitch_cswitch+pos_tswitch_cswitch+con_tswitch_cswitch)-(neg_tstay_cswitch+pos_tstay_cswitch+con_tstay_cswitch)":
+            "1/3*(neg_tswitch_cswitch+pos_tswitch_cswitch+con_tswitch_cswitch)-1/3*(neg_tstay_cswitch+pos_tstay_cswitch+con_tstay_cswitch)",
+            #directedForgetting contrast across all cuedTS conditions
+            "(neg_tstay_cstay+neg_tstay_cswitch+neg_tswitch_cswitch)-(con_tstay_cstay+con_tstay_cswitch+con_tswitch_cswitch)":
+            "1/3*(neg_tstay_cstay+neg_tstay_cswitch+neg_tswitch_cswitch)-1/3*(con_tstay_cstay+con_tstay_cswitch+con_tswitch_cswitch)",
+            #cue switch cost interaction
+            "(neg_tstay_cswitch-con_tstay_cswitch)-(neg_tstay_cstay-con_tstay_cstay)": "1/2*(neg_tstay_cswitch-con_tstay_cswitch)-1/2*(neg_tstay_cstay-con_tstay_cstay)",
+            #task switch cost interaction
+            "(neg_tswitch_cswitch-con_tswitch_cswitch)-(neg_tstay_cswitch-con_tstay_cswitch)": "1/2*(neg_tswitch_cswitch-con_tswitch_cswitch)-1/2*(neg_tstay_cswitch-con_tstay_cswitch)",
+            #task - baseline
+            "task-baseline": "1/9*(neg_tswitch_cswitch+neg_tstay_cswitch+neg_tstay_cstay+pos_tswitch_cswitch+pos_tstay_cswitch+pos_tstay_cstay+con_tswitch_cswitch+con_tstay_cswitch+con_tstay_cstay)",
+            },
+    },
+}
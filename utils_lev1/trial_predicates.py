@@ -0,0 +1,197 @@
+"""
+Trial subsets (the DataFrame.query expressions used in utils_lev1.task_specs)
+compiled once into small expression trees and evaluated directly on the
+events columns as numpy arrays.  Comparisons shared between subsets (e.g.
+"key_press == correct_response") are only evaluated once per run.
+
+Supported syntax: and/or/not (also &, |, ~), comparisons (==, !=, <, <=, >,
+>=, in, not in), column names, string/number/bool literals and lists.  As in
+DataFrame.query, "in"/"not in" with a single value is the same as ==/!=.
+"""
+import ast
+import functools
+import io
+import operator
+import tokenize
+
+import numpy as np
+
+_COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+
+def _compile_node(node, expression):
+    if isinstance(node, ast.BoolOp):
+        op = "and" if isinstance(node.op, ast.And) else "or"
+        return (op, tuple(_compile_node(value, expression) for value in node.values))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.Invert)):
+        return ("not", _compile_node(node.operand, expression))
+    if isinstance(node, ast.Compare):
+        terms = [_compile_node(term, expression) for term in [node.left] + node.comparators]
+        comparisons = []
+        for op, left, right in zip(node.ops, terms[:-1], terms[1:]):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                comparisons.append(_compile_membership(op, left, right, expression))
+            elif type(op) in _COMPARISONS:
+                comparisons.append(("compare", type(op).__name__, left, right))
+            else:
+                raise ValueError(f"Unsupported comparison in subset: {expression}")
+        return comparisons[0] if len(comparisons) == 1 else ("and", tuple(comparisons))
+    if isinstance(node, ast.Name):
+        return ("column", node.id)
+    if isinstance(node, ast.Constant):
+        return ("value", node.value)
+    if isinstance(node, (ast.List, ast.Tuple)):
+        values = [_compile_node(element, expression) for element in node.elts]
+        if any(value[0] != "value" for value in values):
+            raise ValueError(f"Only literal lists are supported in subset: {expression}")
+        return ("list", tuple(value[1] for value in values))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        operand = _compile_node(node.operand, expression)
+        if operand[0] == "value":
+            return ("value", -operand[1])
+    raise ValueError(f"Unsupported syntax in subset: {expression}")
+
+
+def _compile_membership(op, left, right, expression):
+    negate = isinstance(op, ast.NotIn)
+    if left[0] == "column" and right[0] == "list":
+        node = ("isin", left, right[1])
+    elif left[0] == "value" and right[0] == "column":
+        node = ("compare", "Eq", right, left)
+    elif left[0] == "column" and right[0] == "value":
+        node = ("compare", "Eq", left, right)
+    else:
+        raise ValueError(f"Unsupported use of in/not in in subset: {expression}")
+    return ("not", node) if negate else node
+
+
+def _replace_booleans(expression):
+    # like DataFrame.query, & and | bind like and/or (looser than comparisons)
+    tokens = tokenize.generate_tokens(io.StringIO(expression.strip()).readline)
+    replaced = []
+    for token in tokens:
+        if token.type == tokenize.OP and token.string in ("&", "|"):
+            token = (tokenize.NAME, "and" if token.string == "&" else "or")
+        else:
+            token = (token.type, token.string)
+        replaced.append(token)
+    return tokenize.untokenize(replaced)
+
+
+@functools.lru_cache(maxsize=None)
+def compile_predicate(expression):
+    """
+    Parses a subset expression once (cached)
+    output:
+        expression tree of nested tuples, see evaluate_predicates
+    """
+    try:
+        tree = ast.parse(_replace_booleans(expression), mode="eval")
+    except (SyntaxError, tokenize.TokenError):
+        raise ValueError(f"Could not parse subset: {expression}")
+    return _compile_node(tree.body, expression)
+
+
+def _predicate_columns(node):
+    if node[0] == "column":
+        return {node[1]}
+    if node[0] in ("and", "or"):
+        return set().union(*(_predicate_columns(child) for child in node[1]))
+    if node[0] == "not":
+        return _predicate_columns(node[1])
+    if node[0] == "compare":
+        return _predicate_columns(node[2]) | _predicate_columns(node[3])
+    if node[0] == "isin":
+        return _predicate_columns(node[1])
+    return set()
+
+
+@functools.lru_cache(maxsize=None)
+def compile_predicates(expressions):
+    """
+    Compiles a set of subsets evaluated together (e.g. all subsets of a task)
+    input:
+        expressions: tuple of subset expressions
+    output:
+        dictionary with the expression trees and the event columns they use
+    """
+    trees = tuple(compile_predicate(expression) for expression in expressions)
+    columns = sorted(set().union(set(), *(_predicate_columns(tree) for tree in trees)))
+    return {"expressions": expressions, "trees": trees, "columns": columns}
+
+
+def get_event_columns(events_df, columns):
+    """
+    The events columns used by the predicates as numpy arrays
+    """
+    missing = [column for column in columns if column not in events_df.columns]
+    if missing:
+        raise ValueError(f"Events are missing columns used in trial subsets: {missing}")
+    return {column: events_df[column].to_numpy() for column in columns}
+
+
+def _evaluate(node, columns, n_trials, cache):
+    if node in cache:
+        return cache[node]
+    kind = node[0]
+    if kind == "column":
+        result = columns[node[1]]
+    elif kind == "value":
+        result = node[1]
+    elif kind == "and":
+        result = np.logical_and.reduce(
+            [_as_mask(_evaluate(child, columns, n_trials, cache), n_trials) for child in node[1]]
+        )
+    elif kind == "or":
+        result = np.logical_or.reduce(
+            [_as_mask(_evaluate(child, columns, n_trials, cache), n_trials) for child in node[1]]
+        )
+    elif kind == "not":
+        result = ~_as_mask(_evaluate(node[1], columns, n_trials, cache), n_trials)
+    elif kind == "compare":
+        compare = _COMPARISONS[getattr(ast, node[1])]
+        left = _evaluate(node[2], columns, n_trials, cache)
+        right = _evaluate(node[3], columns, n_trials, cache)
+        with np.errstate(invalid="ignore"):
+            result = _as_mask(compare(left, right), n_trials)
+    elif kind == "isin":
+        values = _evaluate(node[1], columns, n_trials, cache)
+        result = np.zeros(n_trials, dtype=bool)
+        for value in node[2]:
+            result = result | _as_mask(values == value, n_trials)
+    else:
+        raise ValueError(f"Unknown predicate node {kind}")
+    cache[node] = result
+    return result
+
+
+def _as_mask(result, n_trials):
+    return np.broadcast_to(np.asarray(result, dtype=bool), (n_trials,))
+
+
+def evaluate_predicates(predicates, events_df, columns=None):
+    """
+    Evaluates compiled predicates for one run
+    input:
+        predicates: output of compile_predicates
+        events_df: events data frame
+        columns (optional): event columns as arrays (get_event_columns), e.g.
+            to evaluate against modified columns
+    output:
+        trials x predicates boolean array
+    """
+    if columns is None:
+        columns = get_event_columns(events_df, predicates["columns"])
+    n_trials = len(events_df)
+    cache = {}
+    masks = np.zeros((n_trials, len(predicates["trees"])), dtype=bool)
+    for idx, tree in enumerate(predicates["trees"]):
+        masks[:, idx] = _as_mask(_evaluate(tree, columns, n_trials, cache), n_trials)
+    return masks
@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+"""
+Columnar store of level 1 VIFs (contrast VIFs and the per-regressor VIFs of
+est_vif) for all subjects, sessions and model variants.
+
+Records are collected in a batch for each session and appended as one part
+file per partition, <store_dir>/task=<task>/variant=<variant>/part-*.npz,
+with one array per column (strings as fixed width unicode, so no pickling).
+Every writer uses its own part file names, so parallel jobs never touch the
+same file.  A rerun appends new parts instead of rewriting old ones, so
+records are keyed on KEY_COLUMNS and only the one from the newest part (by
+the write time in the part name) is kept.  read_vif_table loads the whole
+table (or some tasks/variants) in one call, compact_vif_store merges the
+parts of each partition and import_vif_json_files converts the old
+per-session json files.
+    python -m utils_lev1.vif_store <store_dir> [--import <vif_data dir>]
+"""
+import glob
+import json
+import os
+import socket
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+VIF_COLUMNS = [
+    "kind",
+    "subject",
+    "session",
+    "task",
+    "variant",
+    "model_break",
+    "add_deriv",
+    "only_breaks_with_performance_feedback",
+    "name",
+    "vif",
+]
+
+# a rerun of a session replaces the records with the same key
+KEY_COLUMNS = ["subject", "session", "task", "variant", "kind", "name"]
+
+
+def get_vif_variant(model_break, add_deriv, only_breaks_with_performance_feedback):
+    """
+    Variant label, same naming as the old vif_data directories
+    """
+    if model_break:
+        if only_breaks_with_performance_feedback:
+            variant = "break_performance_feedback_only"
+        else:
+            variant = "break"
+    else:
+        variant = "no_break"
+    if add_deriv == "deriv_yes":
+        return f"{variant}_deriv"
+    return f"{variant}_no_deriv"
+
+
+def new_vif_batch():
+    return []
+
+
+def add_vifs_to_batch(
+    batch,
+    subid,
+    session,
+    task,
+    model_break,
+    add_deriv,
+    only_breaks_with_performance_feedback,
+    vif_contrasts=None,
+    vif_data=None,
+):
+    """
+    Adds the VIFs of one session/variant to a batch
+    input:
+      batch: list from new_vif_batch
+      vif_contrasts: get_all_contrast_vif output (contrast, VIF)
+      vif_data: est_vif output (regressor, VIF)
+    """
+    variant = get_vif_variant(model_break, add_deriv, only_breaks_with_performance_feedback)
+    for kind, vifs, name_column in [
+        ("contrast", vif_contrasts, "contrast"),
+        ("regressor", vif_data, "regressor"),
+    ]:
+        if vifs is None:
+            continue
+        batch.append(pd.DataFrame({
+            "kind": kind,
+            "subject": subid,
+            "session": session,
+            "task": task,
+            "variant": variant,
+            "model_break": bool(model_break),
+            "add_deriv": add_deriv,
+            "only_breaks_with_performance_feedback": bool(only_breaks_with_performance_feedback),
+            "name": [str(name) for name in vifs[name_column]],
+            "vif": vifs["VIF"].to_numpy(dtype=float),
+        }, columns=VIF_COLUMNS))
+
+
+def _write_part(partition_dir, table):
+    os.makedirs(partition_dir, exist_ok=True)
+    part_file = (
+        f"{partition_dir}/part-{socket.gethostname()}-{os.getpid()}-{int(time.time() * 1e6)}.npz"
+    )
+    arrays = {}
+    for column in VIF_COLUMNS:
+        values = table[column].to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        arrays[column] = values
+    tmp_file = f"{part_file}.tmp"
+    with open(tmp_file, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp_file, part_file)
+    return part_file
+
+
+def write_vif_batch(store_dir, batch):
+    """
+    Appends a batch to the store, one part file per (task, variant), and
+    empties it
+    output:
+      list of part files written
+    """
+    if not batch:
+        return []
+    table = pd.concat(batch, ignore_index=True)
+    part_files = []
+    for (task, variant), partition in table.groupby(["task", "variant"], sort=False):
+        part_files.append(_write_part(f"{store_dir}/task={task}/variant={variant}", partition))
+    del batch[:]
+    return part_files
+
+
+def _read_part(part_file):
+    with np.load(part_file, allow_pickle=False) as arrays:
+        return pd.DataFrame({column: arrays[column] for column in VIF_COLUMNS})
+
+
+def _part_time(part_file):
+    # part-<host>-<pid>-<microseconds>.npz
+    return int(os.path.basename(part_file)[:-len(".npz")].rsplit("-", 1)[1])
+
+
+def _read_parts(part_files):
+    """
+    Table of several part files, keeping the newest record of each key
+    """
+    part_files = sorted(part_files, key=lambda part_file: (_part_time(part_file), part_file))
+    table = pd.concat([_read_part(part_file) for part_file in part_files], ignore_index=True)
+    return table.drop_duplicates(KEY_COLUMNS, keep="last").reset_index(drop=True)
+
+
+def read_vif_table(store_dir, tasks=None, variants=None, kind=None):
+    """
+    The VIF table of the whole store
+    input:
+      store_dir: store directory
+      tasks, variants (optional): only read these partitions
+      kind (optional): "contrast" or "regressor"
+    output:
+      data frame with VIF_COLUMNS, one row per key (the newest)
+    """
+    part_files = []
+    for task in tasks or ["*"]:
+        for variant in variants or ["*"]:
+            part_files += glob.glob(f"{store_dir}/task={task}/variant={variant}/part-*.npz")
+    if not part_files:
+        return pd.DataFrame(columns=VIF_COLUMNS)
+    table = _read_parts(part_files)
+    if kind is not None:
+        table = table[table["kind"] == kind].reset_index(drop=True)
+    return table
+
+
+def compact_vif_store(store_dir):
+    """
+    Merges the part files of each partition into one, dropping records
+    replaced by newer parts.  Should not run while jobs are appending to the
+    store.
+    """
+    for partition_dir in sorted(glob.glob(f"{store_dir}/task=*/variant=*")):
+        part_files = sorted(glob.glob(f"{partition_dir}/part-*.npz"))
+        if len(part_files) < 2:
+            continue
+        _write_part(partition_dir, _read_parts(part_files))
+        for part_file in part_files:
+            os.remove(part_file)
+
+
+def import_vif_json_files(vif_data_dir, store_dir):
+    """
+    Adds the json files of write_contrast_vifs_to_json
+    (<vif_data_dir>/<subject>/<task>[_break...]_<deriv|no_deriv>/*.json) to
+    the store
+    """
+    batch = new_vif_batch()
+    for json_file in sorted(glob.glob(f"{vif_data_dir}/*/*/*.json")):
+        with open(json_file) as f:
+            vif_entry = json.load(f)
+        variant_dir = os.path.basename(os.path.dirname(json_file))
+        variant = variant_dir[len(vif_entry["task"]):]
+        add_vifs_to_batch(
+            batch,
+            vif_entry["subject"],
+            vif_entry["session"],
+            vif_entry["task"],
+            variant.startswith("_break"),
+            vif_entry["add_deriv"],
+            variant.startswith("_break_performance_feedback_only"),
+            vif_contrasts=pd.DataFrame(vif_entry["contrasts"], columns=["contrast", "VIF"]),
+        )
+    return write_vif_batch(store_dir, batch)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [2, 4] or (len(sys.argv) == 4 and sys.argv[2] != "--import"):
+        print(__doc__)
+        sys.exit(1)
+    if len(sys.argv) == 4:
+        import_vif_json_files(sys.argv[3], sys.argv[1])
+    compact_vif_store(sys.argv[1])
+    print(read_vif_table(sys.argv[1]).groupby(["task", "variant", "kind"]).size())
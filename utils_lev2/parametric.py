@@ -0,0 +1,104 @@
+"""
+Parametric mass-univariate OLS for level 2, for quick looks without
+permutations.
+
+Each model is a design (None for the one sample t-test), the rows of the
+data it uses (subjects differ between models when regressors are missing)
+and its contrasts.  Every design is QR factorized once, then the data are
+read one chunk of voxels at a time and all models are fitted on that chunk,
+so the data are only read once however many models there are:
+    Q'Y, beta = R^-1 Q'Y, RSS = |Y|^2 - |Q'Y|^2
+    t = c beta / sqrt(RSS / df * |R^-T c'|^2),  F = t^2 (1DF F-tests)
+"""
+import numpy as np
+
+
+def get_ols_model(desmat, contrast_matrix, rows):
+    """
+    QR factorization and contrast variance factors of one design
+    input:
+        desmat: subjects x regressors design (None: intercept only)
+        contrast_matrix: contrasts x regressors
+        rows: rows of the data the design describes
+    """
+    from scipy.linalg import solve_triangular
+
+    rows = np.asarray(rows)
+    desmat = np.ones((len(rows), 1)) if desmat is None else np.asarray(desmat, dtype=float)
+    contrast_matrix = np.atleast_2d(np.asarray(contrast_matrix, dtype=float))
+    Q, R = np.linalg.qr(desmat)
+    if np.linalg.matrix_rank(desmat) < desmat.shape[1]:
+        raise ValueError("Design matrix is rank deficient, remove redundant regressors")
+    if desmat.shape[0] <= desmat.shape[1]:
+        raise ValueError("Design matrix has no residual degrees of freedom")
+    return {
+        "rows": rows,
+        "Q": Q,
+        "R": R,
+        "contrast_matrix": contrast_matrix,
+        "var_factor": (solve_triangular(R, contrast_matrix.T, trans="T") ** 2).sum(axis=0),
+        "df": desmat.shape[0] - desmat.shape[1],
+    }
+
+
+def fit_ols_models(data, models, chunk_size=20000):
+    """
+    t and F statistics of several level 2 models in one pass over the data
+    input:
+        data: subjects x voxels array (can be a memory map)
+        models: dictionary of model name: (desmat, contrast_matrix, rows),
+            desmat None for the one sample t-test, rows None for all rows
+        chunk_size: voxels per chunk
+    output:
+        dictionary of model name: dictionary of contrasts x voxels arrays
+        cope, tstat, p_tstat (one sided), fstat and p_fstat, plus df
+    """
+    from scipy import stats
+    from scipy.linalg import solve_triangular
+
+    n_voxels = data.shape[1]
+    ols_models = {
+        name: get_ols_model(desmat, contrast_matrix, np.arange(data.shape[0]) if rows is None else rows)
+        for name, (desmat, contrast_matrix, rows) in models.items()
+    }
+    results = {
+        name: {
+            stat: np.zeros((len(model["contrast_matrix"]), n_voxels), dtype=np.float32)
+            for stat in ["cope", "tstat", "fstat"]
+        }
+        for name, model in ols_models.items()
+    }
+    for start in range(0, n_voxels, chunk_size):
+        chunk = np.asarray(data[:, start:start + chunk_size], dtype=np.float64)
+        for name, model in ols_models.items():
+            Y = chunk[model["rows"]]
+            QtY = model["Q"].T @ Y
+            betas = solve_triangular(model["R"], QtY)
+            rss = np.maximum((Y ** 2).sum(axis=0) - (QtY ** 2).sum(axis=0), 0)
+            cope = model["contrast_matrix"] @ betas
+            with np.errstate(divide="ignore", invalid="ignore"):
+                tstat = cope / np.sqrt(rss[None, :] / model["df"] * model["var_factor"][:, None])
+            tstat = np.nan_to_num(tstat, nan=0.0)
+            results[name]["cope"][:, start:start + chunk_size] = cope
+            results[name]["tstat"][:, start:start + chunk_size] = tstat
+            results[name]["fstat"][:, start:start + chunk_size] = tstat ** 2
+    for name, model in ols_models.items():
+        results[name]["p_tstat"] = stats.t.sf(results[name]["tstat"], model["df"]).astype(np.float32)
+        results[name]["p_fstat"] = stats.f.sf(results[name]["fstat"], 1, model["df"]).astype(np.float32)
+        results[name]["df"] = model["df"]
+    return results
+
+
+def write_ols_maps(results, mask_img, out_root):
+    """
+    Writes {out_root}_model_{model}_{stat}{contrast number}.nii.gz for every
+    model and statistic, p maps as 1 - p like randomise
+    """
+    from utils_lev2.permutation import write_masked_map
+
+    for name, maps in results.items():
+        for stat in ["cope", "tstat", "p_tstat", "fstat", "p_fstat"]:
+            for idx, values in enumerate(maps[stat]):
+                if stat.startswith("p_"):
+                    values = 1 - values
+                write_masked_map(values, mask_img, f"{out_root}_model_{name}_{stat}{idx + 1}.nii.gz")
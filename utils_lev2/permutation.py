@@ -0,0 +1,311 @@
+"""
+Mass-univariate permutation inference for level 2 (replaces FSL randomise).
+
+For each contrast the design is partitioned into the regressors being tested
+(X, the columns the contrast uses) and nuisance regressors (Z, the rest).
+The data are reduced to the residuals of Z, Rz, and every permutation is
+applied to Rz (Freedman-Lane).  If X is constant (the intercept, e.g. the
+one sample t-test) rows are sign flipped instead of permuted.  Rows are only
+permuted within exchangeability groups.
+
+Permutations and sign flips keep the sum of squares of each voxel, so with
+the full design's orthonormal basis U and contrast weights w = c pinv(M):
+    t* = w' P Rz / sqrt((|Rz|^2 - |U' P Rz|^2) / df * c (M'M)^+ c')
+and a batch of permutations is one matrix product of the stacked rows of
+w' P and U' P with Rz.  Batches are spread over a process pool reading the
+data from a memory-mapped .npy file.
+
+As in randomise, t statistics are one-sided (positive effects), every
+F-test is one contrast (F = t^2), the first permutation is the unpermuted
+data, sign flips are enumerated exhaustively when there are fewer than the
+requested number, and p-value maps are stored as 1 - p.  With an adjacency
+(utils_lev2.tfce.get_adjacency, randomise -T) the t and F maps of every
+permutation are also TFCE enhanced, giving the tfce_p_* and tfce_corrp_*
+maps.
+"""
+import os
+
+import numpy as np
+
+
+def partition_design(desmat, contrast):
+    """
+    Columns tested by a contrast (X) and nuisance columns (Z)
+    input:
+        desmat: subjects x regressors array
+        contrast: contrast vector
+    output:
+        X, Z arrays
+    """
+    tested = np.asarray(contrast) != 0
+    return desmat[:, tested], desmat[:, ~tested]
+
+
+def is_sign_flip(X):
+    # the tested regressor is constant, permuting rows would change nothing
+    return np.allclose(X, X[:1, :])
+
+
+def make_permutations(n_subjects, n_perm, sign_flip, groups=None, seed=0):
+    """
+    Row orders and signs of every permutation (the first one is the identity)
+    input:
+        n_subjects: number of rows
+        n_perm: number of permutations
+        sign_flip: flip signs instead of permuting rows
+        groups (optional): exchangeability group of each row, rows are only
+            permuted within their group
+    output:
+        orders: n_perm x n_subjects int array
+        signs: n_perm x n_subjects array of +-1
+    """
+    rng = np.random.RandomState(seed)
+    identity = np.arange(n_subjects)
+    if sign_flip:
+        if 2 ** n_subjects <= n_perm:
+            print(f"Enumerating all {2 ** n_subjects} sign flips")
+            flips = np.arange(2 ** n_subjects)[:, None] >> identity[None, :] & 1
+        else:
+            flips = rng.randint(0, 2, size=(n_perm, n_subjects))
+            flips[0] = 0
+        signs = 1 - 2 * flips.astype(np.int8)
+        orders = np.tile(identity, (len(signs), 1))
+        return orders, signs
+
+    groups = np.ones(n_subjects) if groups is None else np.asarray(groups)
+    orders = np.tile(identity, (n_perm, 1))
+    for group in np.unique(groups):
+        members = np.flatnonzero(groups == group)
+        for idx in range(1, n_perm):
+            orders[idx, members] = members[rng.permutation(len(members))]
+    signs = np.ones((n_perm, n_subjects), dtype=np.int8)
+    return orders, signs
+
+
+def get_contrast_model(desmat, contrast):
+    """
+    Everything the permutation statistics need from the design, for one
+    contrast
+    """
+    from scipy.linalg import pinv
+
+    desmat = np.asarray(desmat, dtype=float)
+    contrast = np.asarray(contrast, dtype=float)
+    X, Z = partition_design(desmat, contrast)
+    U, singular_values, _ = np.linalg.svd(desmat, full_matrices=False)
+    rank = int((singular_values > singular_values.max() * max(desmat.shape) * np.finfo(float).eps).sum())
+    pinv_desmat = pinv(desmat)
+    return {
+        "contrast": contrast,
+        "sign_flip": is_sign_flip(X),
+        "Z": Z,
+        "U": U[:, :rank],
+        "weights": contrast @ pinv_desmat,
+        "var_factor": float(contrast @ pinv_desmat @ pinv_desmat.T @ contrast),
+        "df": desmat.shape[0] - rank,
+    }
+
+
+def nuisance_residuals(Y, Z):
+    """
+    Residuals of the data after regressing out the nuisance regressors
+    """
+    Y = np.asarray(Y, dtype=np.float64)
+    if Z.shape[1] == 0:
+        return Y
+    return Y - Z @ np.linalg.lstsq(Z, Y, rcond=None)[0]
+
+
+def permuted_tstats(Rz, sum_squares, model, orders, signs):
+    """
+    t statistics of a batch of permutations
+    input:
+        Rz: subjects x voxels nuisance residuals
+        sum_squares: column sums of squares of Rz
+        model: get_contrast_model output
+        orders, signs: batch of permutations (make_permutations)
+    output:
+        permutations x voxels t statistics
+    """
+    n_batch, n_subjects = orders.shape
+    U = model["U"]
+    n_basis = U.shape[1]
+    # row i of the permuted data is signs[i] * Rz[orders[i]], so each
+    # weight vector a gives a' Y* = (a moved to orders, times signs)' Rz
+    rows = np.zeros((n_batch, n_basis + 1, n_subjects))
+    weights = np.vstack([model["weights"][None, :], U.T])
+    batch_index = np.arange(n_batch)[:, None, None]
+    row_index = np.arange(n_basis + 1)[None, :, None]
+    rows[batch_index, row_index, orders[:, None, :]] = weights[None, :, :] * signs[:, None, :]
+    projected = (rows.reshape(-1, n_subjects) @ Rz).reshape(n_batch, n_basis + 1, -1)
+    effect = projected[:, 0, :]
+    rss = np.maximum(sum_squares[None, :] - (projected[:, 1:, :] ** 2).sum(axis=1), 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tstats = effect / np.sqrt(rss / model["df"] * model["var_factor"])
+    return np.nan_to_num(tstats, nan=0.0)
+
+
+def get_stat_maps(tstats, adjacency=None):
+    """
+    The statistics that get p-values: t and F (t^2), plus their TFCE
+    enhanced versions when there is an adjacency
+    output:
+        dictionary of map name: permutations x voxels array
+    """
+    stat_maps = {"tstat": tstats, "fstat": tstats ** 2}
+    if adjacency is not None:
+        from utils_lev2.tfce import tfce_batch
+
+        stat_maps["tfce_tstat"] = tfce_batch(tstats, adjacency)
+        stat_maps["tfce_fstat"] = tfce_batch(stat_maps["fstat"], adjacency)
+    return stat_maps
+
+
+def _permutation_task(data_file, model, orders, signs, observed, batch_size, adjacency=None):
+    """
+    Exceedance counts and maximum statistics of each statistic map for a
+    range of permutations (runs in a worker process)
+    """
+    Y = np.load(data_file, mmap_mode="r")
+    Rz = nuisance_residuals(Y, model["Z"])
+    sum_squares = (Rz ** 2).sum(axis=0)
+    counts = {name: np.zeros(values.shape, dtype=np.int64) for name, values in observed.items()}
+    maxima = {name: np.zeros(len(orders)) for name in observed}
+    for start in range(0, len(orders), batch_size):
+        stop = min(start + batch_size, len(orders))
+        tstats = permuted_tstats(Rz, sum_squares, model, orders[start:stop], signs[start:stop])
+        for name, values in get_stat_maps(tstats, adjacency).items():
+            counts[name] += (values >= observed[name][None, :]).sum(axis=0)
+            maxima[name][start:stop] = values.max(axis=1)
+    return counts, maxima
+
+
+def permutation_test(
+    data_file, desmat, contrast, n_perm=5000, groups=None, n_jobs=1, batch_size=32, seed=0,
+    adjacency=None
+):
+    """
+    Permutation inference for one contrast
+    input:
+        data_file: .npy file with the subjects x voxels data
+        desmat: subjects x regressors design
+        contrast: contrast vector
+        n_perm: number of permutations (including the unpermuted data)
+        groups (optional): exchangeability group of each subject
+        n_jobs: number of processes
+        batch_size: permutations per matrix product
+        adjacency (optional): mask adjacency for TFCE
+    output:
+        dictionary of voxel maps: tstat, vox_p_tstat, vox_corrp_tstat,
+        fstat, vox_p_fstat, vox_corrp_fstat and with an adjacency
+        tfce_p_tstat, tfce_corrp_tstat, tfce_p_fstat, tfce_corrp_fstat
+        (p maps as 1 - p)
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    Y = np.load(data_file, mmap_mode="r")
+    model = get_contrast_model(desmat, contrast)
+    orders, signs = make_permutations(Y.shape[0], n_perm, model["sign_flip"], groups, seed)
+    Rz = nuisance_residuals(Y, model["Z"])
+    tstats = permuted_tstats(Rz, (Rz ** 2).sum(axis=0), model, orders[:1], signs[:1])
+    observed = {name: values[0] for name, values in get_stat_maps(tstats, adjacency).items()}
+    del Rz
+
+    n_tasks = max(1, min(len(orders) // batch_size, 4 * n_jobs))
+    splits = np.array_split(np.arange(len(orders)), n_tasks)
+    tasks = [
+        (data_file, model, orders[split], signs[split], observed, batch_size, adjacency)
+        for split in splits
+    ]
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(_permutation_task, *zip(*tasks)))
+    else:
+        results = [_permutation_task(*task) for task in tasks]
+
+    maps = {"tstat": observed["tstat"], "fstat": observed["fstat"]}
+    for name, values in observed.items():
+        counts = sum(result[0][name] for result in results)
+        maxima = np.concatenate([result[1][name] for result in results])
+        # vox_p_tstat1, tfce_corrp_fstat1, ...
+        prefix, stat = ("tfce", name[len("tfce_"):]) if name.startswith("tfce_") else ("vox", name)
+        maps[f"{prefix}_p_{stat}"] = 1 - counts / len(orders)
+        maps[f"{prefix}_corrp_{stat}"] = 1 - _fwe_p(maxima, values)
+    return maps
+
+
+def _fwe_p(max_null, observed):
+    # share of permutations whose maximum is at least the observed value
+    max_null = np.sort(max_null)
+    return 1 - np.searchsorted(max_null, observed, side="left") / len(max_null)
+
+
+def load_masked_data(data_file, mask_file):
+    """
+    4D image (one volume per subject) as a subjects x voxels float32 array
+    output:
+        data, mask image
+    """
+    import nibabel as nib
+
+    mask_img = nib.load(mask_file)
+    mask = np.asanyarray(mask_img.dataobj) > 0
+    data = np.asanyarray(nib.load(data_file).dataobj)
+    return np.ascontiguousarray(data[mask].T, dtype=np.float32), mask_img
+
+
+def write_masked_map(values, mask_img, out_file):
+    import nibabel as nib
+
+    mask = np.asanyarray(mask_img.dataobj) > 0
+    volume = np.zeros(mask.shape, dtype=np.float32)
+    volume[mask] = values
+    nib.Nifti1Image(volume, mask_img.affine).to_filename(out_file)
+
+
+def run_permutation_inference(
+    data_file, mask_file, desmat, contrast_matrix, out_root, n_perm=5000, groups=None, n_jobs=1, seed=0,
+    tfce=True, data=None
+):
+    """
+    randomise replacement: tests every contrast and writes the maps with
+    randomise's file names, {out_root}_tstat1.nii.gz,
+    {out_root}_vox_corrp_tstat1.nii.gz, ...
+    input:
+        data_file, mask_file: 4D input and mask written for randomise
+        desmat: subjects x regressors design (None for the one sample
+            t-test, a column of ones)
+        contrast_matrix: contrasts x regressors
+        groups (optional): exchangeability group of each subject (default
+            all exchangeable)
+        out_root: output file root (randomise -o)
+        tfce: also TFCE (randomise -T)
+        data (optional): subjects x in-mask voxels array, if already loaded
+            (e.g. utils_lev2.stack.masked_stack)
+    """
+    if data is None:
+        data, mask_img = load_masked_data(data_file, mask_file)
+    else:
+        import nibabel as nib
+
+        mask_img = nib.load(mask_file)
+    adjacency = None
+    if tfce:
+        from utils_lev2.tfce import get_adjacency
+
+        adjacency = get_adjacency(np.asanyarray(mask_img.dataobj) > 0)
+    if desmat is None:
+        desmat = np.ones((data.shape[0], 1))
+    npy_file = f"{out_root}_data.{os.getpid()}.npy"
+    np.save(npy_file, data)
+    del data
+    try:
+        for idx, contrast in enumerate(np.atleast_2d(contrast_matrix)):
+            print(f"Permutation test for contrast {idx + 1} ({n_perm} permutations)")
+            maps = permutation_test(
+                npy_file, desmat, contrast, n_perm, groups, n_jobs, seed=seed, adjacency=adjacency
+            )
+            for map_name, values in maps.items():
+                write_masked_map(values, mask_img, f"{out_root}_{map_name}{idx + 1}.nii.gz")
+    finally:
+        os.remove(npy_file)
@@ -0,0 +1,113 @@
+"""
+Level 2 data layer: the subject maps of a run as one subjects x voxels
+float32 array, memory mapped from a .npy file.
+
+build_subject_stack streams the maps into the file one subject at a time
+(instead of concat_images holding all of them in memory, and get_fdata a
+float64 copy), and everything else in the run reads from it: the 4D
+randomise input, the mask, the html summary and the in-process engines.
+Voxels are the C order ravel of the volume, and the volume shape, affine
+and the file the header comes from are kept in a json next to it.
+"""
+import json
+import os
+
+import numpy as np
+
+
+def build_subject_stack(bold_files, stack_file):
+    """
+    Writes the maps of bold_files (one per subject, same grid) to stack_file
+    output:
+        stack_file
+    """
+    import nibabel as nib
+
+    first_img = nib.load(str(bold_files[0]))
+    shape = first_img.shape[:3]
+    tmp_file = f"{stack_file}.{os.getpid()}.tmp"
+    stack = np.lib.format.open_memmap(
+        tmp_file, mode="w+", dtype=np.float32, shape=(len(bold_files), int(np.prod(shape)))
+    )
+    for idx, bold_file in enumerate(bold_files):
+        img = nib.load(str(bold_file))
+        if img.shape[:3] != shape or not np.allclose(img.affine, first_img.affine):
+            raise ValueError(f"{bold_file} is not on the same grid as {bold_files[0]}")
+        stack[idx] = np.asarray(img.dataobj, dtype=np.float32).ravel()
+    stack.flush()
+    del stack
+    with open(f"{tmp_file}.json", "w") as f:
+        json.dump({
+            "shape": list(shape),
+            "affine": first_img.affine.tolist(),
+            "header_file": str(bold_files[0]),
+        }, f)
+    os.replace(f"{tmp_file}.json", f"{stack_file}.json")
+    os.replace(tmp_file, stack_file)
+    return stack_file
+
+
+def remove_subject_stack(stack_file):
+    os.remove(stack_file)
+    os.remove(f"{stack_file}.json")
+
+
+def load_subject_stack(stack_file):
+    """
+    output:
+        stack (read only memory map), volume shape, affine
+    """
+    with open(f"{stack_file}.json") as f:
+        info = json.load(f)
+    stack = np.load(stack_file, mmap_mode="r")
+    return stack, tuple(info["shape"]), np.array(info["affine"])
+
+
+def stack_to_img(stack_file):
+    """
+    4D image (subjects last) viewing the memory map, nothing is copied
+    until the data are used
+    """
+    import nibabel as nib
+
+    with open(f"{stack_file}.json") as f:
+        info = json.load(f)
+    stack, shape, affine = load_subject_stack(stack_file)
+    header = nib.load(info["header_file"]).header.copy()
+    header.set_data_dtype(np.float32)
+    return nib.Nifti1Image(stack.T.reshape(shape + (stack.shape[0],)), affine, header)
+
+
+def stack_mean_img(stack_file, chunk_size=100000):
+    """
+    Mean over subjects as a 3D image (what nilearn's mask functions compute
+    from the 4D image), read in voxel chunks
+    """
+    import nibabel as nib
+
+    stack, shape, affine = load_subject_stack(stack_file)
+    mean = np.zeros(stack.shape[1])
+    for start in range(0, stack.shape[1], chunk_size):
+        mean[start:start + chunk_size] = stack[:, start:start + chunk_size].mean(axis=0, dtype=np.float64)
+    return nib.Nifti1Image(mean.reshape(shape), affine)
+
+
+def masked_stack(stack_file, mask_img):
+    """
+    subjects x in-mask voxels float32 array (data[mask] order)
+    """
+    stack, shape, affine = load_subject_stack(stack_file)
+    mask = np.asanyarray(mask_img.dataobj).reshape(-1) > 0
+    return np.ascontiguousarray(stack[:, mask])
+
+
+def stack_nonzero_quantile(stack_file, quantile, chunk_size=100000):
+    """
+    Quantile of the absolute values of the nonzero data
+    """
+    stack, shape, affine = load_subject_stack(stack_file)
+    values = []
+    for start in range(0, stack.shape[1], chunk_size):
+        chunk = np.abs(stack[:, start:start + chunk_size])
+        values.append(chunk[chunk != 0])
+    return np.quantile(np.concatenate(values), quantile)